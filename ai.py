@@ -2,7 +2,10 @@ from typing import List, Optional, Tuple, Dict
 from collections import deque
 
 from constants import MAP_WIDTH, MAP_HEIGHT
-from map import is_walkable_tile
+from occupancy import blocked_board, clearance_for, tile_blocked
+from clearance import fits
+from distance_fields import INF, NEIGHBOURS
+from path_table import table_for
 
 
 def init_ai(enemy, player, enemies: List):
@@ -31,6 +34,7 @@ def begin_turn(enemy, player, enemies: List, initiative: Optional[List] = None):
             continue
         if k not in enemies or getattr(k, 'hp', 0) <= 0:
             enemy.hate_map.pop(k, None)
+    _hate_changed(enemy)
 
     # Select current target with tie-breakers
     enemy.current_target = select_target(enemy, player, enemies, initiative)
@@ -82,79 +86,189 @@ def adjust_hate_on_hit(attacker, victim, damage, player):
     # If victim is an enemy with a hate_map (not the player) and attacker is an enemy, increase their hate toward attacker
     if hasattr(victim, 'hate_map') and victim is not player:
         victim.hate_map[attacker] = victim.hate_map.get(attacker, 0) + delta
+        _hate_changed(victim)
+    _hate_changed(attacker)
+
+
+def _hate_changed(enemy):
+    # Hate maps are updated in place, so tell the room hash explicitly
+    zobrist = getattr(enemy, 'zobrist', None)
+    if zobrist is not None:
+        zobrist.refresh(enemy)
 
 
 def get_attack_positions_adjacent(enemy, target) -> List[Tuple[int, int]]:
     positions = []
     for dx, dy in [(1, 0), (-1, 0), (0, 1), (0, -1)]:
         tx, ty = target.x + dx, target.y + dy
-        if 0 <= tx < MAP_WIDTH and 0 <= ty < MAP_HEIGHT:
-            tile = enemy.tilemap.tiles[ty][tx]
-            door_info = enemy.tilemap.tile_states.get((tx, ty))
-            if is_walkable_tile(tile, door_info):
-                positions.append((tx, ty))
+        if enemy.tilemap.is_walkable(tx, ty):
+            positions.append((tx, ty))
     return positions
 
 
 def _tile_occupied(enemy, x: int, y: int, all_entities: List) -> bool:
-    for e in all_entities:
-        if e is enemy:
-            continue
-        if e.occupies(x, y):
-            return True
-    return False
+    return tile_blocked(all_entities, x, y, enemy)
+
+
+def reconstruct_path(parents: Dict, node: Tuple[int, int]) -> List[Tuple[int, int]]:
+    """Walk parent links back from `node` to the search start (whose parent is None)."""
+    path = []
+    while node is not None:
+        path.append(node)
+        node = parents[node]
+    path.reverse()
+    return path
 
 
 def _pathfinding_avoid_entities(enemy, goal_x: int, goal_y: int, all_entities: List) -> Optional[List[Tuple[int, int]]]:
+    # The entity-free path from the room's table is the answer unless an entity stands on it
+    path = table_for(enemy.tilemap, enemy.width, enemy.height).path((enemy.x, enemy.y), (goal_x, goal_y))
+    if path is None:
+        return None
+    if enemy.width > 1 or enemy.height > 1:
+        # Table path tiles are walkable for the footprint; only entities can make one not fit
+        clear = clearance_for(all_entities, enemy.tilemap.walkable, enemy)
+        if all(fits(clear, x, y, enemy.width, enemy.height) for (x, y) in path[1:]):
+            return path
+    elif not any(_footprint_blocked(enemy, x, y, all_entities) for (x, y) in path[1:]):
+        return path
+    return _search_avoid_entities(enemy, {(goal_x, goal_y): 0}, all_entities)
+
+
+def _footprint_blocked(enemy, x: int, y: int, all_entities: List) -> bool:
+    for i in range(enemy.width):
+        for j in range(enemy.height):
+            if tile_blocked(all_entities, x + i, y + j, enemy):
+                return True
+    return False
+
+
+def _search_avoid_entities(enemy, goals: Dict[Tuple[int, int], int], all_entities: List) -> Optional[List[Tuple[int, int]]]:
+    """BFS from the enemy to the nearest of `goals` (tile -> rank); ties go to the lowest rank."""
     start = (enemy.x, enemy.y)
-    q = deque([[start]])
-    visited = set([start])
+    q = deque([start])
+    parents: Dict[Tuple[int, int], Optional[Tuple[int, int]]] = {start: None}
+    depth = {start: 0}
+    walkable = enemy.tilemap.walkable
+    clear = None
+    if enemy.width > 1 or enemy.height > 1:
+        clear = clearance_for(all_entities, walkable, enemy)
 
     def _footprint_clear(x: int, y: int) -> bool:
+        if clear is not None:
+            return fits(clear, x, y, enemy.width, enemy.height)
         for i in range(enemy.width):
             for j in range(enemy.height):
                 tx, ty = x + i, y + j
                 if not (0 <= tx < MAP_WIDTH and 0 <= ty < MAP_HEIGHT):
                     return False
-                tile = enemy.tilemap.tiles[ty][tx]
-                door_info = enemy.tilemap.tile_states.get((tx, ty))
-                if not is_walkable_tile(tile, door_info):
+                if not walkable[ty * MAP_WIDTH + tx]:
+                    return False
+                if tile_blocked(all_entities, tx, ty, enemy):
                     return False
-                for e in all_entities:
-                    if e is enemy:
-                        continue
-                    if e.occupies(tx, ty):
-                        return False
         return True
 
     while q:
-        path = q.popleft()
-        x, y = path[-1]
-        if (x, y) == (goal_x, goal_y):
-            return path
+        node = q.popleft()
+        if node in goals:
+            # The rest of this BFS layer is already queued; a lower-ranked goal
+            # among it has an equally short path
+            d, rank = depth[node], goals[node]
+            for other in q:
+                if depth[other] != d:
+                    break
+                if other in goals and goals[other] < rank:
+                    node, rank = other, goals[other]
+            return reconstruct_path(parents, node)
+        x, y = node
+        d = depth[node] + 1
         for dx, dy in ((1,0),(-1,0),(0,1),(0,-1)):
-            nx, ny = x + dx, y + dy
-            if (nx, ny) in visited:
+            nxt = (x + dx, y + dy)
+            if nxt in parents:
                 continue
-            if not _footprint_clear(nx, ny):
+            if not _footprint_clear(nxt[0], nxt[1]):
                 continue
-            visited.add((nx, ny))
-            q.append(path + [(nx, ny)])
+            parents[nxt] = node
+            depth[nxt] = d
+            q.append(nxt)
     return None
 
 
-def find_closest_attack_position(enemy, target, all_entities: List) -> Optional[List[Tuple[int, int]]]:
+def _descend_field(enemy, goals: Dict[Tuple[int, int], int], field: List[int], all_entities: List, total: int | None = None):
+    """_search_avoid_entities limited to tiles whose field value drops by one per step.
+
+    Every tile's BFS parent lies on a shortest path as well, so the restricted
+    search settles the same parents and goal; None if entities block it.
+    """
+    start = enemy.y * MAP_WIDTH + enemy.x
+    if total is None:
+        total = field[start]
+    ranks = {gy * MAP_WIDTH + gx: rank for (gx, gy), rank in goals.items()}
+    parents: Dict[int, int] = {start: -1}
+    layer = [start]
+    for d in range(1, total + 1):
+        need = total - d
+        nxt = []
+        for i in layer:
+            for j in NEIGHBOURS[i]:
+                if field[j] != need or j in parents or tile_blocked(all_entities, j % MAP_WIDTH, j // MAP_WIDTH, enemy):
+                    continue
+                parents[j] = i
+                nxt.append(j)
+        if not nxt:
+            return None
+        layer = nxt
+    # Layer `total` holds only goal tiles (field value 0); the first-queued lowest rank wins
+    best = None
+    for i in layer:
+        if i in ranks and (best is None or ranks[i] < ranks[best]):
+            best = i
+    if best is None:
+        return None
+    path = []
+    while best != -1:
+        path.append((best % MAP_WIDTH, best // MAP_WIDTH))
+        best = parents[best]
+    path.reverse()
+    return path
+
+
+def find_closest_attack_position(enemy, target, all_entities: List, fields=None, searches=None) -> Optional[List[Tuple[int, int]]]:
+    # One search toward every free candidate; ties keep the earlier candidate
     candidates = enemy.get_attack_positions(target)
-    best_path = None
-    best_len = 10 ** 9
-    for (gx, gy) in candidates:
+    goals: Dict[Tuple[int, int], int] = {}
+    for rank, (gx, gy) in enumerate(candidates):
         if _tile_occupied(enemy, gx, gy, all_entities):
             continue
-        path = _pathfinding_avoid_entities(enemy, gx, gy, all_entities)
-        if path and len(path) < best_len:
-            best_len = len(path)
-            best_path = path
-    return best_path
+        goals.setdefault((gx, gy), rank)
+    if not goals:
+        return None
+    if searches is not None and enemy.width == 1 and enemy.height == 1:
+        # The repaired field (see incremental) counts every entity as a wall,
+        # so the descent always finds the path the full search would
+        if (enemy.x, enemy.y) in goals:
+            return [(enemy.x, enemy.y)]
+        search = searches.get(candidates)
+        goal_bits = 0
+        for (gx, gy) in candidates:
+            if 0 <= gx < MAP_WIDTH and 0 <= gy < MAP_HEIGHT:
+                goal_bits |= 1 << (gy * MAP_WIDTH + gx)
+        search.update(enemy.tilemap.walkable_bits & ~blocked_board(all_entities), goal_bits)
+        total = search.settle((enemy.x, enemy.y))
+        if total >= INF:
+            return None
+        path = _descend_field(enemy, goals, search.g, all_entities, total)
+        if path is not None:
+            return path
+    elif fields is not None and enemy.width == 1 and enemy.height == 1:
+        # The shared field (see distance_fields) covers occupied candidates too
+        field = fields.get(candidates)
+        if field[enemy.y * MAP_WIDTH + enemy.x] >= INF:
+            return None
+        path = _descend_field(enemy, goals, field, all_entities)
+        if path is not None:
+            return path
+    return _search_avoid_entities(enemy, goals, all_entities)
 
 
 def move_towards_target(enemy, target, all_entities: List):
@@ -173,11 +287,10 @@ def move_towards_target(enemy, target, all_entities: List):
 def get_attack_positions_slime(enemy, target) -> List[Tuple[int, int]]:
     # Same row or column with clear LoS; prefer even distance so slime can shoot every second tile
     positions: List[Tuple[int, int]] = []
+    walkable = enemy.tilemap.walkable
     y = target.y
     for x in range(MAP_WIDTH):
-        tile = enemy.tilemap.tiles[y][x]
-        door_info = enemy.tilemap.tile_states.get((x, y))
-        if not is_walkable_tile(tile, door_info):
+        if not walkable[y * MAP_WIDTH + x]:
             continue
         blocked = False
         if x < target.x:
@@ -185,9 +298,7 @@ def get_attack_positions_slime(enemy, target) -> List[Tuple[int, int]]:
         else:
             rng = range(target.x + 1, x)
         for cx in rng:
-            t = enemy.tilemap.tiles[y][cx]
-            d = enemy.tilemap.tile_states.get((cx, y))
-            if not is_walkable_tile(t, d):
+            if not walkable[y * MAP_WIDTH + cx]:
                 blocked = True
                 break
         if not blocked and (abs(x - target.x) % 2 == 0):
@@ -195,9 +306,7 @@ def get_attack_positions_slime(enemy, target) -> List[Tuple[int, int]]:
 
     x = target.x
     for y in range(MAP_HEIGHT):
-        tile = enemy.tilemap.tiles[y][x]
-        door_info = enemy.tilemap.tile_states.get((x, y))
-        if not is_walkable_tile(tile, door_info):
+        if not walkable[y * MAP_WIDTH + x]:
             continue
         blocked = False
         if y < target.y:
@@ -205,9 +314,7 @@ def get_attack_positions_slime(enemy, target) -> List[Tuple[int, int]]:
         else:
             rng = range(target.y + 1, y)
         for cy in rng:
-            t = enemy.tilemap.tiles[cy][x]
-            d = enemy.tilemap.tile_states.get((x, cy))
-            if not is_walkable_tile(t, d):
+            if not walkable[cy * MAP_WIDTH + x]:
                 blocked = True
                 break
         if not blocked and (abs(y - target.y) % 2 == 0):
@@ -236,11 +343,7 @@ def telegraph_slime(enemy, target):
         x = enemy.x
         while True:
             x += 2 * direction
-            if not (0 <= x < MAP_WIDTH):
-                break
-            tile = enemy.tilemap.tiles[y][x]
-            door_info = enemy.tilemap.tile_states.get((x, y))
-            if not is_walkable_tile(tile, door_info):
+            if not enemy.tilemap.is_walkable(x, y):
                 break
             path.append((x, y))
     # Vertical alignment
@@ -250,11 +353,7 @@ def telegraph_slime(enemy, target):
         y = enemy.y
         while True:
             y += 2 * direction
-            if not (0 <= y < MAP_HEIGHT):
-                break
-            tile = enemy.tilemap.tiles[y][x]
-            door_info = enemy.tilemap.tile_states.get((x, y))
-            if not is_walkable_tile(tile, door_info):
+            if not enemy.tilemap.is_walkable(x, y):
                 break
             path.append((x, y))
     if not path:
@@ -7,7 +7,10 @@ import pyxel
 from constants import TILE_SIZE
 
 class AssetManager:
-    def __init__(self):
+    def __init__(self, load_images: bool = True):
+        # Headless runs only need the name/variant mappings; skip pyxel image
+        # banks, which require pyxel.init().
+        self.load_images = load_images
         self.tile_map = {}
         self.anim_map = {}
         self.decor_names = []
@@ -27,11 +30,11 @@ class AssetManager:
         self.parse_tile_mapping("static_assets/floors.txt", 2, floors_png, rows_per_variant=3)
 
         # Load all sprite assets into image bank 0 at different y-coordinates
-        pyxel.images[0].load(0, 0, "sprite_assets/char_1.png")
-        pyxel.images[0].load(0, 16, "sprite_assets/slime.png")
-        pyxel.images[0].load(0, 32, "sprite_assets/spider.png")
-        pyxel.images[0].load(0, 64, "static_assets/door_closed.png") # Door closed at (0, 64)
-        pyxel.images[0].load(0, 80, "static_assets/door_open.png")   # Door open at (0, 80)
+        self._load_image(0, 0, 0, "sprite_assets/char_1.png")
+        self._load_image(0, 0, 16, "sprite_assets/slime.png")
+        self._load_image(0, 0, 32, "sprite_assets/spider.png")
+        self._load_image(0, 0, 64, "static_assets/door_closed.png") # Door closed at (0, 64)
+        self._load_image(0, 0, 80, "static_assets/door_open.png")   # Door open at (0, 80)
         # Decor and treasure: keep in bank 0 but place at x=128 to avoid overlapping sprite strips
         try:
             decor_h = self._png_height("static_assets/decor.png")
@@ -39,27 +42,27 @@ class AssetManager:
             decor_h = 0
         base_decor_x = 128
         base_decor_y = 0
-        pyxel.images[0].load(base_decor_x, base_decor_y, "static_assets/decor.png")
+        self._load_image(0, base_decor_x, base_decor_y, "static_assets/decor.png")
         # Place treasure directly beneath decor (aligned to 16px rows)
         def _align16(v: int) -> int:
             return (v + 15) // 16 * 16
         base_treasure_x = 128
         base_treasure_y = _align16(base_decor_y + max(0, decor_h))
-        pyxel.images[0].load(base_treasure_x, base_treasure_y, "static_assets/treasure.png")
+        self._load_image(0, base_treasure_x, base_treasure_y, "static_assets/treasure.png")
 
         # Spinner animations: 16x16 strips for idle and attack
         # Place below doors at y=96/112
         spinner_idle_y = 96
         spinner_attack_y = 112
         try:
-            pyxel.images[0].load(0, spinner_idle_y, "sprite_assets/spinner_idle.png")
+            self._load_image(0, 0, spinner_idle_y, "sprite_assets/spinner_idle.png")
             iw = self._png_width("sprite_assets/spinner_idle.png")
             frames = max(1, iw // 16)
             self._register_anim_strip("spinner_idle", 0, spinner_idle_y, frames, frame_w=16, base_x=0)
         except Exception:
             pass
         try:
-            pyxel.images[0].load(0, spinner_attack_y, "sprite_assets/spinner_attack.png")
+            self._load_image(0, 0, spinner_attack_y, "sprite_assets/spinner_attack.png")
             iw = self._png_width("sprite_assets/spinner_attack.png")
             frames = max(1, iw // 16)
             self._register_anim_strip("spinner_attack", 0, spinner_attack_y, frames, frame_w=16, base_x=0)
@@ -69,12 +72,12 @@ class AssetManager:
         phantom_idle_right_y = 128
         phantom_idle_left_y = 144
         try:
-            pyxel.images[0].load(0, phantom_idle_right_y, "sprite_assets/phantom_idle_anim_right_strip_4.png")
+            self._load_image(0, 0, phantom_idle_right_y, "sprite_assets/phantom_idle_anim_right_strip_4.png")
             self._register_anim_strip("phantom_idle_right", 0, phantom_idle_right_y, 4, frame_w=16, base_x=0)
         except Exception:
             pass
         try:
-            pyxel.images[0].load(0, phantom_idle_left_y, "sprite_assets/phantom_idle_anim_left_strip_4.png")
+            self._load_image(0, 0, phantom_idle_left_y, "sprite_assets/phantom_idle_anim_left_strip_4.png")
             self._register_anim_strip("phantom_idle_left", 0, phantom_idle_left_y, 4, frame_w=16, base_x=0)
         except Exception:
             pass
@@ -192,11 +195,15 @@ class AssetManager:
             height = int.from_bytes(data[4:8], 'big')
             return height if height > 0 else 0
 
+    def _load_image(self, img_bank: int, x: int, y: int, png_path: str):
+        if self.load_images:
+            pyxel.images[img_bank].load(x, y, png_path)
+
     def _load_tileset(self, png_path: str, img_bank: int):
         height = self._png_height(png_path)
         width = self._png_width(png_path)
-        if height <= 256:
-            pyxel.images[img_bank].load(0, 0, png_path)
+        if height <= 256 or not self.load_images:
+            self._load_image(img_bank, 0, 0, png_path)
             self._tileset_chunk_span[img_bank] = width
             return
 
@@ -210,7 +217,7 @@ class AssetManager:
             )
         for idx, chunk_path in enumerate(chunks):
             x_offset = idx * width
-            pyxel.images[img_bank].load(x_offset, 0, chunk_path)
+            self._load_image(img_bank, x_offset, 0, chunk_path)
             os.remove(chunk_path)
         self._tileset_chunk_span[img_bank] = width
 
@@ -0,0 +1,282 @@
+"""Informed pathfinding for rooms of any size: A* and jump point search.
+
+The game's 10x10 rooms are searched with breadth-first search (ai,
+path_table), which expands every tile it can reach before the goal. For
+large arenas (64x64, 128x128) these searches expand far fewer nodes:
+
+    passable = passable_grid(walkable, width, height)          # flat, y * width + x
+    path = astar_path(passable, width, height, start, goal)    # [start, ..., goal] or None
+    path = jps_path(passable, width, height, start, goal)      # same length, fewer expansions
+
+Both use the Manhattan distance as heuristic and return a shortest
+4-connected path. The path can differ from the BFS one among equally short
+paths, so the game keeps BFS where its tie-breaking matters. jps_path is
+jump point search for 4-connected, uniform-cost grids: it only pushes tiles
+where the path may turn, and fills in the straight runs between them. It
+expands the fewest nodes, but its scans along rows and columns cost more
+than A*'s expansions in open rooms (see tools/path_bench.py), so the
+adapters below default to astar_path.
+
+pathfinding and pathfinding_avoid_entities take the same arguments as
+Entity.pathfinding and ai._pathfinding_avoid_entities, and read the grid
+size from tilemap.width / tilemap.height (MAP_WIDTH x MAP_HEIGHT if unset).
+Pass `stats={}` to any search to count expanded nodes ('expanded').
+"""
+import heapq
+from collections import deque
+from typing import List, Optional, Tuple
+
+from constants import MAP_WIDTH, MAP_HEIGHT
+
+_DIRS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+
+
+def passable_grid(walkable, width: int, height: int, foot_w: int = 1, foot_h: int = 1, blocked=()) -> bytearray:
+    """1 where a foot_w x foot_h footprint anchored at the tile is in bounds, walkable and clear of `blocked` tiles."""
+    free = bytearray(walkable)
+    for (x, y) in blocked:
+        if 0 <= x < width and 0 <= y < height:
+            free[y * width + x] = 0
+    if foot_w == 1 and foot_h == 1:
+        return free
+    out = bytearray(width * height)
+    for y in range(height - foot_h + 1):
+        for x in range(width - foot_w + 1):
+            out[y * width + x] = all(
+                free[(y + j) * width + x + i] for j in range(foot_h) for i in range(foot_w)
+            )
+    return out
+
+
+def _unwind(parents: dict, node: int, width: int) -> List[Tuple[int, int]]:
+    path = []
+    while node != -1:
+        path.append((node % width, node // width))
+        node = parents[node]
+    path.reverse()
+    return path
+
+
+def _count(stats, expanded: int):
+    if stats is not None:
+        stats['expanded'] = stats.get('expanded', 0) + expanded
+
+
+def _endpoints_ok(passable, width: int, height: int, start, goal) -> bool:
+    (sx, sy), (gx, gy) = start, goal
+    return (0 <= sx < width and 0 <= sy < height and 0 <= gx < width and 0 <= gy < height
+            and passable[gy * width + gx])
+
+
+def bfs_path(passable, width: int, height: int, start, goal, stats=None) -> Optional[List[Tuple[int, int]]]:
+    """Uninformed breadth-first search, for comparison."""
+    if start == goal:
+        return [start]
+    if not _endpoints_ok(passable, width, height, start, goal):
+        return None
+    s = start[1] * width + start[0]
+    g = goal[1] * width + goal[0]
+    parents = {s: -1}
+    q = deque([s])
+    expanded = 0
+    while q:
+        i = q.popleft()
+        expanded += 1
+        x, y = i % width, i // width
+        for dx, dy in _DIRS:
+            nx, ny = x + dx, y + dy
+            if not (0 <= nx < width and 0 <= ny < height):
+                continue
+            j = ny * width + nx
+            if j in parents or not passable[j]:
+                continue
+            parents[j] = i
+            if j == g:
+                _count(stats, expanded)
+                return _unwind(parents, j, width)
+            q.append(j)
+    _count(stats, expanded)
+    return None
+
+
+def astar_path(passable, width: int, height: int, start, goal, stats=None) -> Optional[List[Tuple[int, int]]]:
+    """A* with the Manhattan heuristic; among equal f, the node closer to the goal goes first."""
+    if start == goal:
+        return [start]
+    if not _endpoints_ok(passable, width, height, start, goal):
+        return None
+    gx, gy = goal
+    s = start[1] * width + start[0]
+    g_goal = gy * width + gx
+    best = {s: 0}
+    parents = {s: -1}
+    h0 = abs(start[0] - gx) + abs(start[1] - gy)
+    heap = [(h0, h0, 0, s)]
+    closed = set()
+    counter = 1
+    expanded = 0
+    while heap:
+        _, _, _, i = heapq.heappop(heap)
+        if i in closed:
+            continue
+        if i == g_goal:
+            _count(stats, expanded)
+            return _unwind(parents, i, width)
+        closed.add(i)
+        expanded += 1
+        x, y = i % width, i // width
+        cost = best[i] + 1
+        for dx, dy in _DIRS:
+            nx, ny = x + dx, y + dy
+            if not (0 <= nx < width and 0 <= ny < height):
+                continue
+            j = ny * width + nx
+            if not passable[j] or j in closed or cost >= best.get(j, cost + 1):
+                continue
+            best[j] = cost
+            parents[j] = i
+            h = abs(nx - gx) + abs(ny - gy)
+            heapq.heappush(heap, (cost + h, h, counter, j))
+            counter += 1
+    _count(stats, expanded)
+    return None
+
+
+def jps_path(passable, width: int, height: int, start, goal, stats=None) -> Optional[List[Tuple[int, int]]]:
+    """Jump point search on a 4-connected grid where every step costs 1."""
+    if start == goal:
+        return [start]
+    if not _endpoints_ok(passable, width, height, start, goal):
+        return None
+    gx, gy = goal
+
+    def open_at(x: int, y: int) -> bool:
+        return 0 <= x < width and 0 <= y < height and passable[y * width + x] != 0
+
+    # Horizontal jump results, shared by every tile of the run that was walked
+    runs: dict = {}
+
+    def jump_row(x: int, y: int, dx: int):
+        key = (y * width + x, dx)
+        if key in runs:
+            return runs[key]
+        walked = []
+        found = None
+        while open_at(x, y):
+            i = (y * width + x, dx)
+            if i in runs:
+                found = runs[i]
+                break
+            walked.append(i)
+            if (x == gx and y == gy) or (open_at(x, y - 1) and not open_at(x - dx, y - 1)) or \
+                    (open_at(x, y + 1) and not open_at(x - dx, y + 1)):
+                found = (x, y)
+                break
+            x += dx
+        for i in walked:
+            runs[i] = found
+        return found
+
+    def jump(x: int, y: int, dx: int, dy: int):
+        # Walk from (x, y) in (dx, dy) until a tile where the path may have to turn
+        if dx:
+            return jump_row(x, y, dx)
+        while open_at(x, y):
+            if x == gx and y == gy:
+                return x, y
+            if (open_at(x - 1, y) and not open_at(x - 1, y - dy)) or \
+                    (open_at(x + 1, y) and not open_at(x + 1, y - dy)):
+                return x, y
+            # Vertical runs stop where a horizontal run would find a jump point
+            if jump_row(x + 1, y, 1) or jump_row(x - 1, y, -1):
+                return x, y
+            y += dy
+        return None
+
+    def directions(x: int, y: int, px: int, py: int):
+        if px < 0:
+            return _DIRS
+        dx = (x > px) - (x < px)
+        dy = (y > py) - (y < py)
+        if dx:
+            return ((dx, 0), (0, 1), (0, -1))
+        return ((0, dy), (1, 0), (-1, 0))
+
+    sx, sy = start
+    best = {(sx, sy): 0}
+    parents = {(sx, sy): None}
+    h0 = abs(sx - gx) + abs(sy - gy)
+    heap = [(h0, h0, 0, sx, sy)]
+    closed = set()
+    counter = 1
+    expanded = 0
+    while heap:
+        _, _, _, x, y = heapq.heappop(heap)
+        if (x, y) in closed:
+            continue
+        if x == gx and y == gy:
+            _count(stats, expanded)
+            # Fill in the straight runs between jump points
+            points = []
+            node = (x, y)
+            while node is not None:
+                points.append(node)
+                node = parents[node]
+            points.reverse()
+            path = [points[0]]
+            for (ax, ay), (bx, by) in zip(points, points[1:]):
+                stepx = (bx > ax) - (bx < ax)
+                stepy = (by > ay) - (by < ay)
+                while (ax, ay) != (bx, by):
+                    ax += stepx
+                    ay += stepy
+                    path.append((ax, ay))
+            return path
+        closed.add((x, y))
+        expanded += 1
+        parent = parents[(x, y)]
+        px, py = parent if parent is not None else (-1, -1)
+        for dx, dy in directions(x, y, px, py):
+            found = jump(x + dx, y + dy, dx, dy)
+            if found is None or found in closed:
+                continue
+            jx, jy = found
+            cost = best[(x, y)] + abs(jx - x) + abs(jy - y)
+            if cost >= best.get(found, cost + 1):
+                continue
+            best[found] = cost
+            parents[found] = (x, y)
+            h = abs(jx - gx) + abs(jy - gy)
+            heapq.heappush(heap, (cost + h, h, counter, jx, jy))
+            counter += 1
+    _count(stats, expanded)
+    return None
+
+
+def _grid_size(tilemap) -> Tuple[int, int]:
+    return getattr(tilemap, 'width', MAP_WIDTH), getattr(tilemap, 'height', MAP_HEIGHT)
+
+
+def pathfinding(entity, target_x: int, target_y: int, search=astar_path) -> Optional[List[Tuple[int, int]]]:
+    """Entity.pathfinding: a path that ignores other entities."""
+    width, height = _grid_size(entity.tilemap)
+    passable = passable_grid(entity.tilemap.walkable, width, height, entity.width, entity.height)
+    return search(passable, width, height, (entity.x, entity.y), (target_x, target_y))
+
+
+def pathfinding_avoid_entities(enemy, goal_x: int, goal_y: int, all_entities, search=astar_path) -> Optional[List[Tuple[int, int]]]:
+    """ai._pathfinding_avoid_entities: a path whose footprint never overlaps another entity."""
+    width, height = _grid_size(enemy.tilemap)
+    blocked = [
+        (tx, ty)
+        for ent in all_entities if ent is not enemy
+        for ty in range(ent.y, ent.y + ent.height)
+        for tx in range(ent.x, ent.x + ent.width)
+        if ent.occupies(tx, ty)
+    ]
+    passable = passable_grid(enemy.tilemap.walkable, width, height, enemy.width, enemy.height, blocked)
+    start = enemy.y * width + enemy.x
+    if 0 <= enemy.x < width and 0 <= enemy.y < height:
+        # The enemy's own anchor stays usable whatever it overlaps
+        passable[start] = 1
+    return search(passable, width, height, (enemy.x, enemy.y), (goal_x, goal_y))
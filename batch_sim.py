@@ -0,0 +1,695 @@
+"""NumPy batch simulator: B rooms stepped in lockstep, one phase at a time.
+
+Every room is a fixed-shape slice of stacked arrays (walkability, decor,
+treasure, player/enemy positions and hp, hate, telegraphs), and each phase of
+the CombatManager turn is a handful of vectorised operations over all rooms:
+
+    rooms = BatchRooms.random(10_000, progress=0.5, seed=1)
+    while not rooms.dead.all():
+        tx, ty = my_policy(rooms)           # (B,) target tiles, -1 = stay
+        rooms.step(tx, ty)
+
+The rules mirror CombatManager/ai.py, including the breadth-first search
+tie-breaking of ai.find_closest_attack_position, so a room loaded with
+BatchRooms.from_combat_managers evolves like the live game. Rooms are
+independent: there are no door transitions, and cosmetic state (VFX, sprite
+names, animation timers) is not modelled.
+
+Requires: numpy (pip install numpy)
+"""
+import numpy as np
+
+from constants import MAP_WIDTH, MAP_HEIGHT
+from map import is_walkable_tile
+from map_layout import get_layout
+from spawn_tables import decor_range, enemy_weights, load_tables, treasure_odds
+
+# Enemy kinds (0 marks an empty slot)
+EMPTY, SLIME, SPIDER, SPINNER, PHANTOM = 0, 1, 2, 3, 4
+KIND_NAMES = {SLIME: 'DumbSlime', SPIDER: 'Spider', SPINNER: 'Spinner', PHANTOM: 'Phantom'}
+KIND_SPEED = np.array([0, 1, 3, 2, 3], dtype=np.int16)
+KIND_HP = np.array([0, 5, 2, 2, 3], dtype=np.int16)
+
+# Telegraph kinds
+TELE_NONE, TELE_PROJECTILE, TELE_TILES, TELE_DIR = 0, 1, 2, 3
+
+# Neighbour order used by ai._pathfinding_avoid_entities; BFS tie-breaking depends on it
+DIRS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+DIR_OFFSETS = np.array([dy * MAP_WIDTH + dx for dx, dy in DIRS], dtype=np.int64)
+
+MAX_ENEMIES = 5
+MAX_PROJECTILE = 5
+PLAYER_HP = 3
+PLAYER_MOVES = 4
+INF = np.iinfo(np.int16).max
+_KEY_MAX = np.iinfo(np.int64).max
+
+
+def _shift(a, offset: int, fill):
+    """out[:, v] = a[:, v - offset] on flattened (N, H*W) boards."""
+    out = np.full_like(a, fill)
+    if offset > 0:
+        out[:, offset:] = a[:, :-offset]
+    else:
+        out[:, :offset] = a[:, -offset:]
+    return out
+
+
+def _dilate(mask):
+    out = mask.copy()
+    out[..., 1:, :] |= mask[..., :-1, :]
+    out[..., :-1, :] |= mask[..., 1:, :]
+    out[..., :, 1:] |= mask[..., :, :-1]
+    out[..., :, :-1] |= mask[..., :, 1:]
+    return out
+
+
+def _dense_rank(key, layer):
+    """Replace keys in `layer` by their per-room rank so they stay small."""
+    flat = np.where(layer, key, _KEY_MAX)
+    order = np.argsort(flat, axis=1, kind='stable')
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.broadcast_to(np.arange(flat.shape[1]), order.shape), axis=1)
+    return np.where(layer, ranks, 0)
+
+
+def _bfs_tree(free, start, goal):
+    """Breadth-first search trees identical to ai._pathfinding_avoid_entities.
+
+    Boards are flattened to (N, H*W); the wall border keeps row wrap-around
+    from ever linking two free tiles. Nodes of each layer carry a key ordering
+    them as the FIFO queue would, so a node's parent is the first dequeued
+    neighbour, exactly as in the per-object search. A room stops once a goal
+    tile is settled. Returns (dist, parent_dir), both (N, H*W).
+    """
+    n, size = free.shape
+    dist = np.full((n, size), INF, dtype=np.int16)
+    pdir = np.full((n, size), -1, dtype=np.int8)
+    rows = np.arange(n)
+    dist[rows, start] = 0
+    frontier = dist == 0
+    key = np.zeros((n, size), dtype=np.int64)
+    # Rooms still searching; boards are compacted as rooms finish
+    work = rows
+    w_dist, w_pdir, w_free, w_goal = dist, pdir, free, goal
+    k = 0
+    while True:
+        pending = frontier.any(axis=1) & ~(w_goal & frontier).any(axis=1)
+        if not pending.any():
+            break
+        if 2 * pending.sum() < len(work):
+            dist[work], pdir[work] = w_dist, w_pdir
+            work = work[pending]
+            w_dist, w_pdir = w_dist[pending], w_pdir[pending]
+            w_free, w_goal = w_free[pending], w_goal[pending]
+            frontier, key = frontier[pending], key[pending]
+        else:
+            frontier &= pending[:, None]
+        k += 1
+        best = np.full(frontier.shape, _KEY_MAX, dtype=np.int64)
+        best_dir = np.full(frontier.shape, -1, dtype=np.int8)
+        for d, offset in enumerate(DIR_OFFSETS):
+            cand = _shift(key, offset, 0) * 4 + d
+            better = _shift(frontier, offset, False) & (cand < best)
+            np.copyto(best, cand, where=better)
+            best_dir[better] = d
+        new = (best_dir >= 0) & w_free & (w_dist == INF)
+        w_dist[new] = k
+        w_pdir[new] = best_dir[new]
+        key = np.where(new, best, 0)
+        if k % 24 == 0:
+            # Keys grow 4x per layer; re-rank before int64 overflows
+            key = _dense_rank(key, new)
+        frontier = new
+    if work is not rows:
+        dist[work], pdir[work] = w_dist, w_pdir
+    return dist, pdir
+
+
+def _layout_walkable():
+    tiles = get_layout()
+    return np.array([[is_walkable_tile(tiles[y][x], None) for x in range(MAP_WIDTH)]
+                     for y in range(MAP_HEIGHT)], dtype=bool)
+
+
+def _kind_of(enemy) -> int:
+    name = type(enemy).__name__
+    if name in ('Slime', 'DumbSlime'):
+        return SLIME
+    for kind, kind_name in KIND_NAMES.items():
+        if name == kind_name:
+            return kind
+    raise ValueError(f"Unsupported enemy type for batch simulation: {name}")
+
+
+class BatchRooms:
+    # Per-room state arrays; every one has the room as its first axis
+    ARRAYS = (
+        'walkable', 'decor', 'treasure', 'px', 'py', 'player_hp', 'coins', 'kills', 'turns',
+        'kind', 'ex', 'ey', 'hp', 'alive', 'hate', 'target', 'tele_kind', 'tele_tiles',
+        'proj_x', 'proj_y', 'proj_len', 'plan_x', 'plan_y', 'planned',
+    )
+
+    def __init__(self, batch: int, enemies: int = MAX_ENEMIES):
+        h, w, e, p = MAP_HEIGHT, MAP_WIDTH, enemies, MAX_PROJECTILE
+        self.batch = batch
+        self.walkable = np.zeros((batch, h, w), dtype=bool)
+        self.decor = np.zeros((batch, h, w), dtype=bool)
+        self.treasure = np.zeros((batch, h, w), dtype=bool)
+        self.px = np.zeros(batch, dtype=np.int16)
+        self.py = np.zeros(batch, dtype=np.int16)
+        self.player_hp = np.full(batch, PLAYER_HP, dtype=np.int16)
+        self.coins = np.zeros(batch, dtype=np.int32)
+        self.kills = np.zeros(batch, dtype=np.int32)
+        self.turns = np.zeros(batch, dtype=np.int32)
+        # Enemy slots in initiative order
+        self.kind = np.zeros((batch, e), dtype=np.int8)
+        self.ex = np.zeros((batch, e), dtype=np.int16)
+        self.ey = np.zeros((batch, e), dtype=np.int16)
+        self.hp = np.zeros((batch, e), dtype=np.int16)
+        self.alive = np.zeros((batch, e), dtype=bool)
+        # hate[b, i, 0] is enemy i's hate toward the player, hate[b, i, j + 1] toward enemy j
+        self.hate = np.zeros((batch, e, e + 1), dtype=np.int16)
+        self.target = np.full((batch, e), -1, dtype=np.int8)
+        self.tele_kind = np.zeros((batch, e), dtype=np.int8)
+        self.tele_tiles = np.zeros((batch, e, h, w), dtype=bool)
+        self.proj_x = np.zeros((batch, e, p), dtype=np.int16)
+        self.proj_y = np.zeros((batch, e, p), dtype=np.int16)
+        self.proj_len = np.zeros((batch, e), dtype=np.int8)
+        self.plan_x = np.zeros((batch, e), dtype=np.int16)
+        self.plan_y = np.zeros((batch, e), dtype=np.int16)
+        self.planned = np.zeros((batch, e), dtype=bool)
+        self._rooms = np.arange(batch)
+
+    # --- Construction -------------------------------------------------------
+    @classmethod
+    def from_arrays(cls, arrays: dict) -> 'BatchRooms':
+        """Wrap existing state arrays (e.g. shared memory views) without copying them."""
+        rooms = cls.__new__(cls)
+        for name in cls.ARRAYS:
+            setattr(rooms, name, arrays[name])
+        rooms.batch = len(rooms.px)
+        rooms._rooms = np.arange(rooms.batch)
+        return rooms
+
+    def view(self, start: int, stop: int) -> 'BatchRooms':
+        """Rooms [start, stop) sharing memory with this batch; stepping the view steps them here."""
+        return BatchRooms.from_arrays({name: getattr(self, name)[start:stop] for name in self.ARRAYS})
+
+    def assign(self, other: 'BatchRooms'):
+        """Copy another batch of the same shape into this one in place."""
+        for name in self.ARRAYS:
+            getattr(self, name)[...] = getattr(other, name)
+
+    @classmethod
+    def from_combat_managers(cls, managers):
+        """Load rooms from CombatManagers waiting in PLAYER_ACTION."""
+        managers = list(managers)
+        slots = max([MAX_ENEMIES] + [len(cm.enemies) for cm in managers])
+        rooms = cls(len(managers), slots)
+        for b, cm in enumerate(managers):
+            tm = cm.tilemap
+            rooms.walkable[b] = np.frombuffer(tm.walkable, dtype=np.uint8).reshape(MAP_HEIGHT, MAP_WIDTH)
+            for d in cm.decor_objects:
+                if not d.is_rubble:
+                    rooms.decor[b, d.y, d.x] = True
+            for t in cm.treasure_objects:
+                rooms.treasure[b, t.y, t.x] = True
+            for pending in cm.treasure_pending:
+                if rooms.walkable[b, pending['y'], pending['x']]:
+                    rooms.treasure[b, pending['y'], pending['x']] = True
+            rooms.px[b], rooms.py[b] = cm.player.x, cm.player.y
+            rooms.player_hp[b] = cm.player.hp
+            rooms.coins[b] = getattr(cm.player, 'coins', 0)
+            rooms.kills[b] = cm.monsters_killed
+            rooms.turns[b] = cm.turn_count
+            ordered = [e for e in cm.enemy_initiative if e in cm.enemies]
+            ordered += [e for e in cm.enemies if e not in ordered]
+            slot_of = {}
+            for i, enemy in enumerate(ordered):
+                slot_of[enemy] = i
+                rooms.kind[b, i] = _kind_of(enemy)
+                rooms.ex[b, i], rooms.ey[b, i] = enemy.x, enemy.y
+                rooms.hp[b, i] = enemy.hp
+                rooms.alive[b, i] = enemy.hp > 0
+            rooms.hate[b, :, 0] = 1
+            for i, enemy in enumerate(ordered):
+                target = getattr(enemy, 'current_target', None)
+                rooms.target[b, i] = 0 if target is cm.player else slot_of.get(target, -2) + 1
+            for tele in cm.telegraphs:
+                i = slot_of.get(tele.get('attacker'))
+                if i is None:
+                    continue
+                kind = tele.get('type')
+                if kind == 'bouncing':
+                    rooms.tele_kind[b, i] = TELE_PROJECTILE
+                    path = tele['path'][:MAX_PROJECTILE]
+                    rooms.proj_len[b, i] = len(path)
+                    for k, (x, y) in enumerate(path):
+                        rooms.proj_x[b, i, k], rooms.proj_y[b, i, k] = x, y
+                elif kind == 'melee_dir':
+                    rooms.tele_kind[b, i] = TELE_DIR
+                else:
+                    tiles = tele.get('tiles') or [tele['pos']]
+                    rooms.tele_kind[b, i] = TELE_TILES
+                    for (x, y) in tiles:
+                        if 0 <= x < MAP_WIDTH and 0 <= y < MAP_HEIGHT:
+                            rooms.tele_tiles[b, i, y, x] = True
+        return rooms
+
+    @classmethod
+    def random(cls, batch: int, progress: float = 0.0, seed=None, player_xy=(MAP_WIDTH // 3, 1),
+               tables: dict | None = None):
+        """Fresh rooms spawned like CombatManager._spawn_room_contents, then telegraphed."""
+        rng = np.random.default_rng(seed)
+        tables = tables if tables is not None else load_tables()
+        rooms = cls(batch)
+        walk = _layout_walkable()
+        rooms.walkable[:] = walk
+        rooms.px[:], rooms.py[:] = player_xy
+        free = np.broadcast_to(walk, rooms.walkable.shape).copy()
+        free[:, player_xy[1], player_xy[0]] = False
+
+        # Mirrors CombatManager._sample_decor_count
+        min_decor, max_decor = decor_range(tables, progress)
+        rooms.decor = rooms._shuffled_pick(rng, free, rng.integers(min_decor, max_decor + 1, batch))
+        free &= ~rooms.decor
+
+        # Mirrors CombatManager._sample_enemy_count
+        weights = np.array(enemy_weights(tables, progress)[:MAX_ENEMIES])
+        counts = np.arange(1, len(weights) + 1)
+        n_enemies = rng.choice(counts, size=batch, p=weights / weights.sum())
+        order = rooms._shuffle_order(rng, free)
+        n_enemies = np.minimum(n_enemies, free.reshape(batch, -1).sum(axis=1))
+        for i in range(MAX_ENEMIES):
+            use = n_enemies > i
+            flat = order[:, i]
+            rooms.ex[use, i] = (flat % MAP_WIDTH)[use]
+            rooms.ey[use, i] = (flat // MAP_WIDTH)[use]
+            kinds = rng.integers(SLIME, PHANTOM + 1, batch)
+            rooms.kind[use, i] = kinds[use]
+            rooms.hp[use, i] = KIND_HP[kinds[use]]
+            rooms.alive[use, i] = True
+            free[rooms._rooms[use], rooms.ey[use, i], rooms.ex[use, i]] = False
+
+        # Mirrors CombatManager._sample_free_treasure
+        attempts, chance = treasure_odds(tables, progress)
+        rooms.treasure = rooms._shuffled_pick(rng, free, rng.binomial(attempts, chance, batch))
+
+        rooms.plan_enemy_moves()
+        rooms.enemy_move_telegraph()
+        return rooms
+
+    def _shuffle_order(self, rng, candidates):
+        keys = rng.random(candidates.shape).reshape(self.batch, -1)
+        keys[~candidates.reshape(self.batch, -1)] = np.inf
+        return np.argsort(keys, axis=1)
+
+    def _shuffled_pick(self, rng, candidates, counts):
+        order = self._shuffle_order(rng, candidates)
+        rank = np.empty_like(order)
+        np.put_along_axis(rank, order, np.broadcast_to(np.arange(order.shape[1]), order.shape), axis=1)
+        return (rank < counts[:, None]).reshape(candidates.shape) & candidates
+
+    # --- Queries --------------------------------------------------------------
+    @property
+    def live(self):
+        return self.player_hp > 0
+
+    @property
+    def dead(self):
+        return self.player_hp <= 0
+
+    @property
+    def cleared(self):
+        return ~self.alive.any(axis=1)
+
+    @property
+    def telegraph_mask(self):
+        """Union of tiles attacked by the pending telegraphs, (B, H, W)."""
+        mask = (self.tele_tiles & (self.tele_kind == TELE_TILES)[:, :, None, None]).any(axis=1)
+        for i in range(self.kind.shape[1]):
+            proj = self.tele_kind[:, i] == TELE_PROJECTILE
+            for k in range(MAX_PROJECTILE):
+                on = proj & (self.proj_len[:, i] > k)
+                mask[self._rooms[on], self.proj_y[on, i, k], self.proj_x[on, i, k]] = True
+            aim = self.tele_kind[:, i] == TELE_DIR
+            ok, x, y = self._spider_tile(i, aim)
+            inside = ok & (x >= 0) & (x < MAP_WIDTH) & (y >= 0) & (y < MAP_HEIGHT)
+            mask[self._rooms[inside], y[inside], x[inside]] = True
+        return mask
+
+    def _onehot(self, xs, ys, rooms):
+        out = np.zeros(self.walkable.shape, dtype=bool)
+        out[self._rooms[rooms], ys[rooms], xs[rooms]] = True
+        return out
+
+    def _enemy_occupancy(self, exclude=None):
+        occ = np.zeros(self.walkable.shape, dtype=bool)
+        for j in range(self.kind.shape[1]):
+            if j == exclude:
+                continue
+            on = self.alive[:, j]
+            occ[self._rooms[on], self.ey[on, j], self.ex[on, j]] = True
+        return occ
+
+    def player_reachable(self, moves: int = PLAYER_MOVES):
+        """Tiles the player can reach this turn (Player.reach_layers), (B, H, W)."""
+        free = self.walkable & ~self.decor & ~self._enemy_occupancy()
+        reach = self._onehot(self.px, self.py, self.live)
+        for _ in range(moves):
+            reach = _dilate(reach) & (free | reach)
+        return reach
+
+    def _target_xy(self, i):
+        t = self.target[:, i].astype(np.int64)
+        is_player = t == 0
+        j = np.clip(t - 1, 0, self.kind.shape[1] - 1)
+        tx = np.where(is_player, self.px, self.ex[self._rooms, j])
+        ty = np.where(is_player, self.py, self.ey[self._rooms, j])
+        valid = is_player & self.live | (t > 0) & self.alive[self._rooms, j] & (self.hp[self._rooms, j] > 0)
+        return valid, tx, ty
+
+    # --- Enemy planning -------------------------------------------------------
+    def _select_targets(self):
+        e = self.kind.shape[1]
+        # _compute_enemy_plan rebuilds hate each turn: player 1, other enemies 0
+        self.hate[:, :, 0] = 1
+        self.hate[:, :, 1:] = 0
+        for i in range(e):
+            cand = np.concatenate([self.live[:, None], self.alive], axis=1)
+            cand[:, i + 1] = False
+            score = np.where(cand, self.hate[:, i, :].astype(np.int32), np.iinfo(np.int32).min)
+            # argmax takes the first maximum: player first, then initiative order
+            pick = np.argmax(score, axis=1)
+            self.target[:, i] = np.where(cand.any(axis=1) & self.alive[:, i], pick, -1)
+
+    def _goal_ranks(self, rooms, i, tx, ty):
+        """Attack positions of enemy i in `rooms`, valued by candidate order (INF where none)."""
+        big = np.int16(INF)
+        walk = self.walkable[rooms]
+        n = len(rooms)
+        shape = walk.shape
+        r = np.arange(n)
+        kind = self.kind[rooms, i]
+        adj = np.full(shape, big, dtype=np.int16)
+        for d, (dx, dy) in enumerate(DIRS):
+            gx, gy = tx + dx, ty + dy
+            ok = (gx >= 0) & (gx < MAP_WIDTH) & (gy >= 0) & (gy < MAP_HEIGHT)
+            ok[ok] &= walk[r[ok], gy[ok], gx[ok]]
+            adj[r[ok], gy[ok], gx[ok]] = np.minimum(adj[r[ok], gy[ok], gx[ok]], d)
+
+        # Slime: same row/column, clear line of sight, even distance
+        slime = np.full(shape, big, dtype=np.int16)
+        xs = np.arange(MAP_WIDTH)
+        row = walk[r, ty, :]
+        blocked = np.concatenate([np.zeros((n, 1), dtype=np.int16),
+                                  np.cumsum(~row, axis=1, dtype=np.int16)], axis=1)
+        lo = np.minimum(xs[None, :], tx[:, None]) + 1
+        hi = np.maximum(xs[None, :], tx[:, None])
+        between = np.where(hi >= lo, np.take_along_axis(blocked, hi, 1) - np.take_along_axis(blocked, lo, 1), 0)
+        ok_row = row & (between == 0) & ((xs[None, :] - tx[:, None]) % 2 == 0)
+        slime[r[:, None], ty[:, None], xs[None, :]] = np.where(ok_row, xs[None, :], big)
+        ys = np.arange(MAP_HEIGHT)
+        col = walk[r, :, tx]
+        blocked = np.concatenate([np.zeros((n, 1), dtype=np.int16),
+                                  np.cumsum(~col, axis=1, dtype=np.int16)], axis=1)
+        lo = np.minimum(ys[None, :], ty[:, None]) + 1
+        hi = np.maximum(ys[None, :], ty[:, None])
+        between = np.where(hi >= lo, np.take_along_axis(blocked, hi, 1) - np.take_along_axis(blocked, lo, 1), 0)
+        ok_col = col & (between == 0) & ((ys[None, :] - ty[:, None]) % 2 == 0)
+        cur = slime[r[:, None], ys[None, :], tx[:, None]]
+        slime[r[:, None], ys[None, :], tx[:, None]] = np.minimum(cur, np.where(ok_col, MAP_WIDTH + ys[None, :], big))
+
+        # Phantom: distance 1, else distance 2, else stay put
+        phantom = np.full(shape, big, dtype=np.int16)
+        placed = np.zeros(n, dtype=bool)
+        for dist in (1, 2):
+            ring = np.zeros(n, dtype=bool)
+            for d, (dx, dy) in enumerate(((-dist, 0), (dist, 0), (0, -dist), (0, dist))):
+                gx, gy = tx + dx, ty + dy
+                ok = ~placed & (gx >= 0) & (gx < MAP_WIDTH) & (gy >= 0) & (gy < MAP_HEIGHT)
+                ok[ok] &= walk[r[ok], gy[ok], gx[ok]]
+                phantom[r[ok], gy[ok], gx[ok]] = d
+                ring |= ok
+            placed |= ring
+        stay = ~placed
+        phantom[r[stay], self.ey[rooms[stay], i], self.ex[rooms[stay], i]] = 0
+
+        ranks = np.where((kind == SLIME)[:, None, None], slime, adj)
+        return np.where((kind == PHANTOM)[:, None, None], phantom, ranks)
+
+    def plan_enemy_moves(self):
+        """CombatManager._compute_enemy_plan: pick targets and end tiles in initiative order."""
+        self._select_targets()
+        live = self.live
+        decor_player = self.decor | self._onehot(self.px, self.py, live)
+        start_x, start_y = self.ex.copy(), self.ey.copy()
+        no_goal = np.iinfo(np.int32).max
+        for i in range(self.kind.shape[1]):
+            valid, tx, ty = self._target_xy(i)
+            active = live & self.alive[:, i] & valid
+            self.planned[:, i] = active
+            self.plan_x[:, i], self.plan_y[:, i] = self.ex[:, i], self.ey[:, i]
+            rooms = np.nonzero(active)[0]
+            if not len(rooms):
+                continue
+            n = len(rooms)
+            r = np.arange(n)
+            occ = (decor_player | self._enemy_occupancy(exclude=i))[rooms].reshape(n, -1)
+            ranks = self._goal_ranks(rooms, i, tx[rooms], ty[rooms]).reshape(n, -1)
+            goal = (ranks < INF) & ~occ
+            free = self.walkable[rooms].reshape(n, -1) & ~occ
+            start = self.ey[rooms, i].astype(np.int64) * MAP_WIDTH + self.ex[rooms, i]
+            dist, pdir = _bfs_tree(free, start, goal)
+            score = np.where(goal & (dist < INF), dist.astype(np.int32) * 1024 + ranks, no_goal)
+            cur = score.argmin(axis=1)
+            found = score[r, cur] < no_goal
+            cur_d = np.where(found, dist[r, cur], 0)
+            stop = np.minimum(KIND_SPEED[self.kind[rooms, i]], cur_d)
+            # Walk the BFS parents back from the goal to the last tile within move_speed
+            while True:
+                back = cur_d > stop
+                if not back.any():
+                    break
+                cur[back] -= DIR_OFFSETS[pdir[r[back], cur[back]]]
+                cur_d[back] -= 1
+            moved = rooms[found]
+            cx = (cur[found] % MAP_WIDTH).astype(np.int16)
+            cy = (cur[found] // MAP_WIDTH).astype(np.int16)
+            # Later enemies plan around the tiles earlier ones will move to
+            self.ex[moved, i], self.ey[moved, i] = cx, cy
+            self.plan_x[moved, i], self.plan_y[moved, i] = cx, cy
+        self.ex[:], self.ey[:] = start_x, start_y
+
+    # --- Phases -----------------------------------------------------------------
+    def player_action(self, tx, ty):
+        """Move each player to (tx, ty) if reachable; -1 (or any unreachable tile) ends the turn in place."""
+        tx = np.asarray(tx, dtype=np.int16)
+        ty = np.asarray(ty, dtype=np.int16)
+        live = self.live
+        inside = live & (tx >= 0) & (tx < MAP_WIDTH) & (ty >= 0) & (ty < MAP_HEIGHT)
+        reach = self.player_reachable()
+        ok = inside.copy()
+        ok[inside] = reach[self._rooms[inside], ty[inside], tx[inside]]
+        self.px[ok], self.py[ok] = tx[ok], ty[ok]
+        self.turns[live] += 1
+        self._pickup()
+
+    def enemy_move_telegraph(self):
+        """Apply the locked plan for surviving enemies, then telegraph their attacks."""
+        moved = self.planned & self.alive & self.live[:, None]
+        self.ex[moved], self.ey[moved] = self.plan_x[moved], self.plan_y[moved]
+        self.planned[:] = False
+        self.tele_kind[:] = TELE_NONE
+        self.tele_tiles[:] = False
+        self.proj_len[:] = 0
+        for i in range(self.kind.shape[1]):
+            valid, tx, ty = self._target_xy(i)
+            on = self.live & self.alive[:, i]
+            kind = self.kind[:, i]
+            self._telegraph_slime(i, on & valid & (kind == SLIME), tx, ty)
+            self.tele_kind[on & (kind == SPIDER), i] = TELE_DIR
+            self._telegraph_spinner(i, on & (kind == SPINNER))
+            self._telegraph_phantom(i, on & valid & (kind == PHANTOM), tx, ty)
+
+    def _telegraph_slime(self, i, on, tx, ty):
+        x, y = self.ex[:, i], self.ey[:, i]
+        horiz = on & (y == ty) & (x != tx)
+        vert = on & ~horiz & (x == tx) & (y != ty)
+        sx = np.where(horiz, np.sign(tx - x), 0).astype(np.int16) * 2
+        sy = np.where(vert, np.sign(ty - y), 0).astype(np.int16) * 2
+        cont = horiz | vert
+        for k in range(MAX_PROJECTILE):
+            nx, ny = x + sx * (k + 1), y + sy * (k + 1)
+            cont &= (nx >= 0) & (nx < MAP_WIDTH) & (ny >= 0) & (ny < MAP_HEIGHT)
+            cont[cont] &= self.walkable[self._rooms[cont], ny[cont], nx[cont]]
+            self.proj_x[cont, i, k], self.proj_y[cont, i, k] = nx[cont], ny[cont]
+            self.proj_len[cont, i] = k + 1
+        self.tele_kind[on & (self.proj_len[:, i] > 0), i] = TELE_PROJECTILE
+
+    def _telegraph_spinner(self, i, on):
+        for dx, dy in DIRS:
+            nx, ny = self.ex[:, i] + dx, self.ey[:, i] + dy
+            ok = on & (nx >= 0) & (nx < MAP_WIDTH) & (ny >= 0) & (ny < MAP_HEIGHT)
+            self.tele_tiles[self._rooms[ok], i, ny[ok], nx[ok]] = True
+        self.tele_kind[on, i] = TELE_TILES
+
+    def _telegraph_phantom(self, i, on, tx, ty):
+        x, y = self.ex[:, i], self.ey[:, i]
+        dx, dy = tx - x, ty - y
+        horiz = np.abs(dx) >= np.abs(dy)
+        step_x = np.where(horiz, np.sign(dx), 0).astype(np.int16)
+        step_y = np.where(horiz, 0, np.sign(dy)).astype(np.int16)
+        step_x[(step_x == 0) & (step_y == 0)] = 1
+        cont = on.copy()
+        for k in (1, 2):
+            nx, ny = x + step_x * k, y + step_y * k
+            inside = (nx >= 0) & (nx < MAP_WIDTH) & (ny >= 0) & (ny < MAP_HEIGHT)
+            if k == 1:
+                # No first tile means no telegraph at all
+                cont &= inside
+            cont[cont & inside] &= self.walkable[self._rooms[cont & inside], ny[cont & inside], nx[cont & inside]]
+            hit = cont & inside
+            self.tele_tiles[self._rooms[hit], i, ny[hit], nx[hit]] = True
+        self.tele_kind[on & self.tele_tiles[:, i].any(axis=(1, 2)), i] = TELE_TILES
+
+    def _spider_tile(self, i, on):
+        valid, tx, ty = self._target_xy(i)
+        x, y = self.ex[:, i], self.ey[:, i]
+        dx, dy = tx - x, ty - y
+        horiz = np.abs(dx) >= np.abs(dy)
+        ax = x + np.where(horiz, np.sign(dx), 0).astype(np.int16)
+        ay = y + np.where(horiz, 0, np.sign(dy)).astype(np.int16)
+        return on & valid, ax, ay
+
+    def _adjust_hate(self, attacker, victim, rooms):
+        """ai.adjust_hate_on_hit for one hit; victim -1 is the player."""
+        if victim < 0:
+            self.hate[rooms, attacker, 0] = np.maximum(1, self.hate[rooms, attacker, 0] - 2)
+            return
+        self.hate[rooms, attacker, victim + 1] = np.maximum(0, self.hate[rooms, attacker, victim + 1] - 2)
+        self.hate[rooms, victim, attacker + 1] += 2
+
+    def enemy_attack(self):
+        """handle_enemy_attack_phase: fire projectiles, then resolve melee simultaneously."""
+        live = self.live
+        e = self.kind.shape[1]
+        # Slimes pay 1 hp per shot; a slime killed by its own shot dies without treasure
+        shooters = live[:, None] & (self.tele_kind == TELE_PROJECTILE) & (self.kind == SLIME)
+        self.hp[shooters] -= 1
+        recoil = shooters & self.alive & (self.hp <= 0)
+        self.alive[recoil] = False
+        self.kills += recoil.sum(axis=1, dtype=np.int32)
+
+        tiles = np.zeros((self.batch, e) + self.walkable.shape[1:], dtype=bool)
+        melee = live[:, None] & (self.tele_kind == TELE_TILES)
+        tiles[melee] = self.tele_tiles[melee]
+        for i in range(e):
+            ok, ax, ay = self._spider_tile(i, live & (self.tele_kind[:, i] == TELE_DIR))
+            ok &= (ax >= 0) & (ax < MAP_WIDTH) & (ay >= 0) & (ay < MAP_HEIGHT)
+            tiles[self._rooms[ok], i, ay[ok], ax[ok]] = True
+
+        player_hits = tiles[self._rooms, :, self.py, self.px]                 # (B, attackers)
+        victims_x = np.clip(self.ex, 0, MAP_WIDTH - 1)
+        victims_y = np.clip(self.ey, 0, MAP_HEIGHT - 1)
+        enemy_hits = tiles[self._rooms[:, None, None], np.arange(e)[None, :, None],
+                           victims_y[:, None, :], victims_x[:, None, :]]    # (B, attackers, victims)
+        enemy_hits &= self.alive[:, None, :]
+        broken = tiles.any(axis=1) & self.decor
+
+        self.player_hp -= player_hits.sum(axis=1, dtype=np.int16)
+        survived = self.player_hp > 0
+        self.player_hp[~survived] = 0
+        # Player death ends the room before enemy damage is applied
+        enemy_hits &= survived[:, None, None]
+        broken &= survived[:, None, None]
+
+        pre = self.hp.copy()
+        self.hp -= enemy_hits.sum(axis=1, dtype=np.int16)
+        killed = self.alive & (pre > 0) & (self.hp <= 0)
+        for i in range(e):
+            hit_player = live & survived & player_hits[:, i]
+            self._adjust_hate(i, -1, self._rooms[hit_player])
+            for j in range(e):
+                hit = enemy_hits[:, i, j]
+                if hit.any():
+                    self._adjust_hate(i, j, self._rooms[hit])
+        self.decor &= ~broken
+        queued = broken | self._slot_mask(killed)
+        self.alive &= ~killed
+        self.kills += killed.sum(axis=1, dtype=np.int32)
+        self._spawn_treasure(queued)
+        self.tele_kind[self.tele_kind != TELE_PROJECTILE] = TELE_NONE
+
+    def projectile_resolution(self):
+        """update_projectiles: every shot advances one tile per segment, hitting the first thing on it."""
+        e = self.kind.shape[1]
+        flying = self.live[:, None] & (self.tele_kind == TELE_PROJECTILE)
+        length = np.where(flying, self.proj_len, 0)
+        queued = np.zeros(self.walkable.shape, dtype=bool)
+        for k in range(MAX_PROJECTILE):
+            if not (length > k).any():
+                break
+            # Enemies killed this segment can still be hit until the end-of-frame prune
+            present = self.alive.copy()
+            for i in range(e):
+                on = (length[:, i] > k) & self.live
+                if not on.any():
+                    continue
+                rooms = self._rooms[on]
+                x, y = self.proj_x[on, i, k], self.proj_y[on, i, k]
+                stop = np.zeros(self.batch, dtype=bool)
+                hit_player = (self.px[on] == x) & (self.py[on] == y)
+                pr = rooms[hit_player]
+                self.player_hp[pr] -= 1
+                stop[pr] = True
+                self._adjust_hate(i, -1, pr[self.player_hp[pr] > 0])
+                self.player_hp[self.player_hp < 0] = 0
+                for j in range(e):
+                    hit = present[rooms, j] & (self.ex[rooms, j] == x) & (self.ey[rooms, j] == y) & (self.player_hp[rooms] > 0)
+                    hr = rooms[hit]
+                    if not len(hr):
+                        continue
+                    killed = self.hp[hr, j] > 0
+                    self.hp[hr, j] -= 1
+                    killed &= self.hp[hr, j] <= 0
+                    queued[hr[killed], self.ey[hr[killed], j], self.ex[hr[killed], j]] = True
+                    self._adjust_hate(i, j, hr)
+                    stop[hr] = True
+                smash = self.decor[rooms, y, x] & (self.player_hp[rooms] > 0)
+                sr = rooms[smash]
+                self.decor[sr, y[smash], x[smash]] = False
+                queued[sr, y[smash], x[smash]] = True
+                stop[sr] = True
+                length[stop, i] = k + 1
+            dead = self.alive & (self.hp <= 0)
+            self.alive &= ~dead
+            self.kills += dead.sum(axis=1, dtype=np.int32)
+        self._spawn_treasure(queued)
+        self.tele_kind[:] = TELE_NONE
+        self.proj_len[:] = 0
+
+    def step(self, tx, ty):
+        """One full turn: player move, attacks, projectiles, then enemy moves and telegraphs."""
+        self.player_action(tx, ty)
+        self.plan_enemy_moves()
+        self.enemy_attack()
+        self.projectile_resolution()
+        self.enemy_move_telegraph()
+
+    # --- Treasure ----------------------------------------------------------------
+    def _slot_mask(self, slots):
+        out = np.zeros(self.walkable.shape, dtype=bool)
+        rooms, idx = np.nonzero(slots)
+        out[rooms, self.ey[rooms, idx], self.ex[rooms, idx]] = True
+        return out
+
+    def _spawn_treasure(self, queued):
+        self.treasure |= queued & self.walkable & self.live[:, None, None]
+        self._pickup()
+
+    def _pickup(self):
+        here = self.treasure[self._rooms, self.py, self.px] & self.live
+        self.coins += here
+        self.treasure[self._rooms[here], self.py[here], self.px[here]] = False
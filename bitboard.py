@@ -0,0 +1,125 @@
+"""Room-sized bitboards: one Python int per tile set, bit y * MAP_WIDTH + x.
+
+Player reachability is a flood fill of `moves_left` rounds of shift-and-mask
+over the board of free tiles, instead of a BFS that asks can_occupy about
+every neighbour:
+
+    layers = flood(bit(x, y), free, moves)      # layers[k]: tiles first reached in k steps
+    path = path_to(layers, (tx, ty))            # only for the tile actually clicked
+
+path_to returns the same path as a FIFO breadth-first search that expands
+neighbours in STEP_DIRS order: the one whose direction sequence from the
+origin is smallest.
+"""
+from constants import MAP_WIDTH, MAP_HEIGHT
+
+TILES = MAP_WIDTH * MAP_HEIGHT
+FULL = (1 << TILES) - 1
+_ROW = (1 << MAP_WIDTH) - 1
+# Columns a shift must not wrap into
+_NOT_FIRST_COL = FULL ^ sum(1 << (y * MAP_WIDTH) for y in range(MAP_HEIGHT))
+_NOT_LAST_COL = FULL ^ sum(1 << (y * MAP_WIDTH + MAP_WIDTH - 1) for y in range(MAP_HEIGHT))
+# _FIRST_COLS[k] / _LAST_COLS[k]: the k leftmost / rightmost columns
+_FIRST_COLS = [sum(((1 << k) - 1) << (y * MAP_WIDTH) for y in range(MAP_HEIGHT)) for k in range(MAP_WIDTH + 1)]
+_LAST_COLS = [sum(((1 << k) - 1) << (y * MAP_WIDTH + MAP_WIDTH - k) for y in range(MAP_HEIGHT))
+              for k in range(MAP_WIDTH + 1)]
+# Neighbour order of the player's movement search (see path_to)
+STEP_DIRS = ((0, 1), (0, -1), (1, 0), (-1, 0))
+
+
+def bit(x: int, y: int) -> int:
+    return 1 << (y * MAP_WIDTH + x)
+
+
+def has(board: int, x: int, y: int) -> bool:
+    return 0 <= x < MAP_WIDTH and 0 <= y < MAP_HEIGHT and (board >> (y * MAP_WIDTH + x)) & 1 == 1
+
+
+def from_grid(grid) -> int:
+    """Board of the non-zero cells of a flat y * MAP_WIDTH + x grid."""
+    board = 0
+    for i, v in enumerate(grid):
+        if v:
+            board |= 1 << i
+    return board
+
+
+# Byte value -> its eight bits as 0/1 bytes, lowest first
+_UNPACK = [bytes((b >> k) & 1 for k in range(8)) for b in range(256)]
+
+
+def to_grid(board: int) -> bytearray:
+    """Inverse of from_grid: 1 at y * MAP_WIDTH + x for every set bit."""
+    raw = board.to_bytes((TILES + 7) // 8, 'little')
+    return bytearray(b''.join([_UNPACK[b] for b in raw])[:TILES])
+
+
+def tiles(board: int):
+    """(x, y) of every set bit, in row order."""
+    while board:
+        low = board & -board
+        i = low.bit_length() - 1
+        yield (i % MAP_WIDTH, i // MAP_WIDTH)
+        board ^= low
+
+
+def shift(board: int, dx: int, dy: int) -> int:
+    """Move every tile by (dx, dy); tiles pushed off the room are dropped."""
+    if dx > 0:
+        board = (board & ~_LAST_COLS[min(dx, MAP_WIDTH)]) << dx
+    elif dx < 0:
+        board = (board & ~_FIRST_COLS[min(-dx, MAP_WIDTH)]) >> -dx
+    if dy > 0:
+        board <<= dy * MAP_WIDTH
+    elif dy < 0:
+        board >>= -dy * MAP_WIDTH
+    return board & FULL
+
+
+def grow(board: int) -> int:
+    """Tiles at most one orthogonal step away from the board."""
+    return (
+        board
+        | ((board & _NOT_LAST_COL) << 1)
+        | ((board & _NOT_FIRST_COL) >> 1)
+        | (board << MAP_WIDTH)
+        | (board >> MAP_WIDTH)
+    ) & FULL
+
+
+def flood(origin: int, free: int, steps: int) -> list:
+    """Frontiers of a flood fill from `origin` through `free`: layers[k] is first reached in k steps."""
+    layers = [origin]
+    seen = origin
+    frontier = origin
+    for _ in range(steps):
+        frontier = grow(frontier) & free & ~seen
+        if not frontier:
+            break
+        layers.append(frontier)
+        seen |= frontier
+    return layers
+
+
+def path_to(layers: list, tile: tuple, dirs=STEP_DIRS) -> list:
+    """Tiles stepped through from the origin to `tile` (origin excluded); [] if not reached."""
+    x, y = tile
+    target = bit(x, y) if 0 <= x < MAP_WIDTH and 0 <= y < MAP_HEIGHT else 0
+    cost = next((k for k, layer in enumerate(layers) if layer & target), None)
+    if cost is None:
+        return []
+    # back[m]: tiles of layer cost - m that lie on a shortest path to the target
+    back = [target]
+    for m in range(1, cost + 1):
+        back.append(grow(back[-1]) & layers[cost - m])
+    # Walk forward taking the first direction that stays on a shortest path
+    ox, oy = next(tiles(layers[0]))
+    path = []
+    for k in range(1, cost + 1):
+        on_path = back[cost - k]
+        for dx, dy in dirs:
+            if has(on_path, ox + dx, oy + dy):
+                ox, oy = ox + dx, oy + dy
+                break
+        path.append((ox, oy))
+    return path
@@ -0,0 +1,182 @@
+"""Player policies for headless runs.
+
+A policy is called by input_provider.PolicyInput with the CombatManager
+whenever its action queue is empty during PLAYER_ACTION and returns a list of
+scripted actions (see input_provider for the format).
+"""
+import random
+from typing import List, Optional, Set, Tuple
+
+from constants import MAP_HEIGHT
+from solver import TurnSolver
+
+END_TURN = [["right_click"]]
+
+
+def move_to(tile: Tuple[int, int]) -> List[list]:
+    # First click previews the move, second click confirms it
+    return [["click", tile[0], tile[1]], ["click", tile[0], tile[1]]]
+
+
+def door_entries(cm) -> List[Tuple[Tuple[int, int], Tuple[int, int]]]:
+    """(door tile, tile in front of it) pairs for the current room."""
+    pairs = []
+    for x in getattr(cm.tilemap, 'top_door_xs', []):
+        pairs.append(((x, 0), (x, 1)))
+    for x in getattr(cm.tilemap, 'bottom_door_xs', []):
+        pairs.append(((x, MAP_HEIGHT - 1), (x, MAP_HEIGHT - 2)))
+    return pairs
+
+
+def danger_tiles(cm) -> Set[Tuple[int, int]]:
+    """Tiles hit by the telegraphs currently on screen (conservative for spiders)."""
+    tiles: Set[Tuple[int, int]] = set()
+    for t in cm.telegraphs:
+        kind = t.get('type')
+        if kind == 'bouncing':
+            tiles.update(t.get('path', []))
+        elif kind in ('plus', 'phantom_dash'):
+            tiles.update(t.get('tiles', []))
+        elif kind == 'melee_dir':
+            sx, sy = t['start']
+            tiles.update(((sx + 1, sy), (sx - 1, sy), (sx, sy + 1), (sx, sy - 1)))
+        elif t.get('pos') is not None:
+            tiles.add(tuple(t['pos']))
+    return tiles
+
+
+def _manhattan(a, b) -> int:
+    return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+
+class RandomPolicy:
+    """Moves to a random reachable tile, sometimes straight through a door."""
+
+    def __init__(self, rng: Optional[random.Random] = None, wait_chance: float = 0.1):
+        self.rng = rng or random.Random()
+        self.wait_chance = wait_chance
+
+    def __call__(self, cm) -> List[list]:
+        here = (cm.player.x, cm.player.y)
+        options = [move_to(t) for t in sorted(cm.player_reachable_tiles) if t != here]
+        for door, entry in door_entries(cm):
+            if entry in cm.player_reachable_tiles:
+                options.append([["click", door[0], door[1]]])
+        if not options or self.rng.random() < self.wait_chance:
+            return END_TURN
+        return self.rng.choice(options)
+
+
+class GreedyPolicy:
+    """Grabs the nearest treasure while dodging telegraphs, then leaves the room."""
+
+    def __init__(self, rng: Optional[random.Random] = None, patience: int = 12):
+        self.rng = rng or random.Random()
+        # Turns spent in a room without treasure before heading for the door
+        self.patience = patience
+        self._room = None
+        self._room_turn = 0
+
+    def __call__(self, cm) -> List[list]:
+        if cm.room_index != self._room:
+            self._room = cm.room_index
+            self._room_turn = cm.turn_count
+        here = (cm.player.x, cm.player.y)
+        reach = cm.player_reachable_tiles
+        danger = danger_tiles(cm)
+        safe = [t for t in reach if t not in danger] or list(reach)
+
+        waited = cm.turn_count - self._room_turn
+        blockers = cm.enemies + cm.decor_objects
+        treasures = [
+            (t.x, t.y) for t in cm.treasure_objects
+            if not any(b.occupies(t.x, t.y) for b in blockers)
+        ]
+        if treasures and waited < 2 * self.patience:
+            goal = min(treasures, key=lambda t: _manhattan(here, t))
+        else:
+            for door, entry in door_entries(cm):
+                if entry in reach and entry not in danger:
+                    return [["click", door[0], door[1]]]
+            if cm.enemies and waited < self.patience:
+                # Let enemies wreck decor and each other for a while
+                goal = here
+            else:
+                goal = min((entry for _, entry in door_entries(cm)), key=lambda t: _manhattan(here, t))
+
+        best = min(safe, key=lambda t: (_manhattan(t, goal), reach.get(t, 0), t))
+        if best == here:
+            return END_TURN
+        return move_to(best)
+
+
+class SolverPolicy:
+    """Ends each turn on the tile TurnSolver scores best, drifting toward treasure or the exit."""
+
+    def __init__(self, rng: Optional[random.Random] = None, patience: int = 12, goal_weight: float = 0.5):
+        self.rng = rng or random.Random()
+        self.patience = patience
+        # Score given up per tile of distance from the current goal
+        self.goal_weight = goal_weight
+        self.solver = TurnSolver()
+        self._room = None
+        self._room_turn = 0
+
+    def __call__(self, cm) -> List[list]:
+        if cm.room_index != self._room:
+            self._room = cm.room_index
+            self._room_turn = cm.turn_count
+        here = (cm.player.x, cm.player.y)
+        reach = cm.player_reachable_tiles
+        self.solver.update(cm)
+        scores = self.solver.scores
+        if not scores:
+            return END_TURN
+
+        waited = cm.turn_count - self._room_turn
+        blockers = cm.enemies + cm.decor_objects
+        treasures = [
+            (t.x, t.y) for t in cm.treasure_objects
+            if not any(b.occupies(t.x, t.y) for b in blockers)
+        ]
+        goal = None
+        if treasures and waited < 2 * self.patience:
+            goal = min(treasures, key=lambda t: _manhattan(here, t))
+        else:
+            for door, entry in door_entries(cm):
+                if entry in scores and scores[entry]['damage'] == 0:
+                    return [["click", door[0], door[1]]]
+            entries = [entry for _, entry in door_entries(cm)]
+            if entries and (not cm.enemies or waited >= self.patience):
+                goal = min(entries, key=lambda t: _manhattan(here, t))
+
+        def value(t):
+            bias = self.goal_weight * _manhattan(t, goal) if goal is not None else 0.0
+            return (scores[t]['score'] - bias, -reach.get(t, 0), t)
+
+        best = max(scores, key=value)
+        if best == here:
+            return END_TURN
+        return move_to(best)
+
+
+def _mcts_policy(rng: Optional[random.Random] = None):
+    # mcts builds on this module, so import it on first use
+    from mcts import MCTSPolicy
+    return MCTSPolicy(rng)
+
+
+POLICIES = {
+    'random': RandomPolicy,
+    'greedy': GreedyPolicy,
+    'solver': SolverPolicy,
+    'mcts': _mcts_policy,
+}
+
+
+def make_policy(name: str, rng: Optional[random.Random] = None):
+    try:
+        cls = POLICIES[name]
+    except KeyError:
+        raise ValueError(f"Unknown policy {name!r}; choose from {sorted(POLICIES)}") from None
+    return cls(rng)
@@ -0,0 +1,69 @@
+"""Clearance maps: how large a square footprint fits at every tile.
+
+clear[y * MAP_WIDTH + x] = k means the k x k square with top-left tile
+(x, y), the way Entity.occupies lays out a footprint, is in bounds and free
+(capped at MAX_CLEARANCE). Whether a width x height entity can stand
+somewhere is then one lookup instead of a check of every footprint cell:
+
+    clear = clearance_map(free)           # free: flat grid, non-zero = free
+    fits(clear, x, y, 2, 2)               # a 2x2 boss anchored at (x, y)
+    update(clear, free, x0, y0, x1, y1)   # after free[] changed in that box
+
+The cap keeps updates local: a tile only affects the anchors up to
+MAX_CLEARANCE - 1 tiles above and to the left of it.
+"""
+from constants import MAP_WIDTH, MAP_HEIGHT
+
+# Largest footprint side answered by a single lookup (3x3 bosses and below)
+MAX_CLEARANCE = 4
+
+
+def _recompute(clear, free, x0: int, y0: int, x1: int, y1: int):
+    # Bottom-right first: each tile depends on its right, lower and diagonal neighbours
+    for y in range(y1, y0 - 1, -1):
+        row = y * MAP_WIDTH
+        below = row + MAP_WIDTH
+        last_row = y == MAP_HEIGHT - 1
+        for x in range(x1, x0 - 1, -1):
+            i = row + x
+            if not free[i]:
+                clear[i] = 0
+            elif last_row or x == MAP_WIDTH - 1:
+                clear[i] = 1
+            else:
+                clear[i] = min(MAX_CLEARANCE, 1 + min(clear[i + 1], clear[below + x], clear[below + x + 1]))
+
+
+def clearance_map(free) -> bytearray:
+    clear = bytearray(MAP_WIDTH * MAP_HEIGHT)
+    _recompute(clear, free, 0, 0, MAP_WIDTH - 1, MAP_HEIGHT - 1)
+    return clear
+
+
+def update(clear, free, x0: int, y0: int, x1: int, y1: int):
+    """Bring `clear` up to date after free[] changed for tiles in [x0, x1] x [y0, y1]."""
+    reach = MAX_CLEARANCE - 1
+    _recompute(
+        clear, free,
+        max(0, x0 - reach), max(0, y0 - reach),
+        min(MAP_WIDTH - 1, x1), min(MAP_HEIGHT - 1, y1),
+    )
+
+
+def fits(clear, x: int, y: int, width: int = 1, height: int = 1) -> bool:
+    """True if a width x height footprint anchored at (x, y) is in bounds and free."""
+    if x < 0 or y < 0 or x + width > MAP_WIDTH or y + height > MAP_HEIGHT:
+        return False
+    i = y * MAP_WIDTH + x
+    if clear[i] >= max(width, height):
+        return True
+    # Otherwise cover the footprint with the largest squares that can answer for it
+    side = min(width, height, MAX_CLEARANCE)
+    if clear[i] < side:
+        return False
+    for j in range(height - side + 1):
+        row = i + j * MAP_WIDTH
+        for k in range(width - side + 1):
+            if clear[row + k] < side:
+                return False
+    return True
@@ -2,11 +2,20 @@ import pyxel
 import time
 import math
 from enum import Enum
-from map import Tilemap, is_walkable_tile
+from map import Tilemap
 from entity import SlimeProjectile, Decor, Treasure, DumbSlime, Spider, Spinner, Phantom
-import random
 import ai
+from rng import RunRng
 from vfx import VfxManager
+from input_provider import PyxelInput
+from snapshot import CombatSnapshot
+from zobrist import ZobristHash
+from occupancy import Occupancy, tile_blocked
+from distance_fields import DistanceFields
+from incremental import IncrementalFields
+from clearance import fits
+import bitboard
+from spawn_tables import load_tables, enemy_weights, decor_range, treasure_odds
 from constants import TILE_SIZE, MAP_WIDTH, MAP_HEIGHT, MAX_FLOORS
 
 
@@ -22,21 +31,16 @@ class _SimEntity:
         return self.x <= x < self.x + self.width and self.y <= y < self.y + self.height
 
     def can_occupy(self, new_x, new_y, all_entities):
+        if (self.width > 1 or self.height > 1) and isinstance(all_entities, Occupancy):
+            return fits(all_entities.clearance(self.tilemap.walkable, self), new_x, new_y, self.width, self.height)
         for i in range(self.width):
             for j in range(self.height):
                 tx = new_x + i
                 ty = new_y + j
-                if not (0 <= tx < MAP_WIDTH and 0 <= ty < MAP_HEIGHT):
+                if not self.tilemap.is_walkable(tx, ty):
                     return False
-                tile = self.tilemap.tiles[ty][tx]
-                door_info = self.tilemap.tile_states.get((tx, ty))
-                if not is_walkable_tile(tile, door_info):
+                if tile_blocked(all_entities, tx, ty, self):
                     return False
-                for entity in all_entities:
-                    if entity is self:
-                        continue
-                    if hasattr(entity, 'occupies') and entity.occupies(tx, ty):
-                        return False
         return True
 
     def move(self, dx, dy, all_entities):
@@ -46,6 +50,8 @@ class _SimEntity:
             return False
         self.x = new_x
         self.y = new_y
+        if isinstance(all_entities, Occupancy):
+            all_entities.refresh(self)
         return True
 
 
@@ -71,9 +77,24 @@ class GamePhase(Enum):
     ENEMY_ATTACK = 3
     PROJECTILE_RESOLUTION = 4
 
+# Enemy planning caches: per-turn BFS fields (see distance_fields) or
+# searches repaired from turn to turn (see incremental)
+PATH_CACHES = ('fields', 'incremental')
+
+
 class CombatManager:
-    def __init__(self, player, enemies, tilemap):
+    def __init__(self, player, enemies, tilemap, input_provider=None, turbo: bool = False, seed: int | None = None,
+                 spawn_tables: dict | None = None, path_cache: str = 'fields'):
+        if path_cache not in PATH_CACHES:
+            raise ValueError(f"unknown path cache {path_cache!r} (expected one of {', '.join(PATH_CACHES)})")
         self.player = player
+        # Source of clicks/keys during PLAYER_ACTION; headless runs inject a
+        # scripted or policy-driven provider instead of the pyxel window.
+        self.input_provider = input_provider if input_provider is not None else PyxelInput()
+        # All randomness for the run comes from seeded streams (see rng.RunRng)
+        self.rng = RunRng(seed)
+        # Enemy, decor and treasure curves (fitted by tools/tune_difficulty.py if present)
+        self.spawn_tables = spawn_tables if spawn_tables is not None else load_tables()
         self.enemies = list(enemies)
         base_variant_count = (
             player.asset_manager.get_tile_variant_count("floor_center")
@@ -84,7 +105,7 @@ class CombatManager:
 
         desired_rooms = max(1, min(MAX_FLOORS, self._tile_variant_count))
         sequence = list(range(self._tile_variant_count))
-        random.shuffle(sequence)
+        self.rng.gameplay.shuffle(sequence)
         self.variant_sequence = sequence[:desired_rooms]
         if not self.variant_sequence:
             self.variant_sequence = [0]
@@ -102,7 +123,7 @@ class CombatManager:
         self.current_phase = GamePhase.ENEMY_MOVE_TELEGRAPH
         self.telegraphs = []
         self.projectiles = []
-        self.vfx_manager = VfxManager()
+        self.vfx_manager = VfxManager(self.rng.cosmetic)
         self.enemy_action_queue = []
         self.action_timer = 0
         self.action_delay = 10
@@ -110,8 +131,16 @@ class CombatManager:
         self.phase_complete = False # New flag to signal phase completion
         self.next_phase_override = None
         self.player_reachable_tiles = {}
-        self.player_reach_parents = {}
+        # Bitboard flood layers (see bitboard) and their union
+        self.player_reach_layers = []
+        self.player_reach_board = 0
         self.player_reach_origin = (player.x, player.y)
+        # Turbo mode: each update() resolves phases to their logical end with
+        # no animation delays, stopping only when player input is needed. A
+        # phase machine that runs turbo_frame_limit frames without asking for
+        # input is stuck, and update() raises instead of returning mid-turn.
+        self.turbo = turbo
+        self.turbo_frame_limit = 10_000
         self._shade_offsets = [(ox, oy) for ox in range(TILE_SIZE) for oy in range(TILE_SIZE) if (ox + oy) % 4 == 0]
         self.room_transition = None
         self.player_dead = False
@@ -146,6 +175,11 @@ class CombatManager:
         self.attack_render_ticks = 0  # frames to render attack overlay
         self.show_attack_order = False  # hide initiative while resolving simultaneously
 
+        # "Best move" hint (toggle with H); the solver works within a per-frame budget
+        self.show_hint = False
+        self.hint_solver = None
+        self.hint_budget = 0.004
+
         # Decor objects (collision while intact; rubble is passable and temporary)
         self.decor_objects: list[Decor] = []
         self._decor_initialized = False
@@ -166,16 +200,62 @@ class CombatManager:
             GamePhase.PROJECTILE_RESOLUTION: GamePhase.ENEMY_MOVE_TELEGRAPH, # Loop back
         }
 
+        # Incremental hash of the room state (see zobrist.ZobristHash)
+        self.zobrist = ZobristHash()
+        # Tile -> entity index over the player, enemies and decor (see occupancy.Occupancy)
+        self.occupancy = Occupancy(track=True)
+        # Enemy planning fields, shared by enemies and hover previews within a turn
+        self.distance_fields = DistanceFields()
+        # With path_cache='incremental', searches repaired from turn to turn instead
+        self.path_cache = path_cache
+        self.enemy_searches = IncrementalFields() if path_cache == 'incremental' else None
+
         self._clear_room_contents()
         self._spawn_room_contents(self._room_progress())
 
     def update(self):
+        if not self.turbo:
+            self._update_frame()
+            return
+        # Run frames until the next one would poll player input a second time
+        polled = False
+        for _ in range(self.turbo_frame_limit):
+            if self.player_dead or self.victory:
+                return
+            if self._frame_polls_input():
+                if polled:
+                    return
+                polled = True
+            self._update_frame()
+        raise RuntimeError(
+            f"turbo update ran {self.turbo_frame_limit} frames without reaching player input "
+            f"(phase {self.current_phase.name}, turn {self.turn_count}, room {self.room_index})"
+        )
+
+    def snapshot(self) -> CombatSnapshot:
+        """Checkpoint the full combat state; see snapshot.CombatSnapshot."""
+        return CombatSnapshot.capture(self)
+
+    def restore(self, snap: CombatSnapshot):
+        snap.restore(self)
+
+    def _frame_polls_input(self) -> bool:
+        if self.player_dead or self.victory or self.room_transition:
+            return False
+        if self.phase_complete:
+            upcoming = self.next_phase_override or self._next_phase[self.current_phase]
+            return upcoming == GamePhase.PLAYER_ACTION
+        return self.current_phase == GamePhase.PLAYER_ACTION
+
+    def _update_frame(self):
         if self.player_dead or self.victory:
             return
         if self.room_transition:
             self._update_room_transition()
             return
 
+        if self.turbo:
+            self.post_player_delay = 0
         if self.phase_complete and self.current_phase == GamePhase.PLAYER_ACTION and self.post_player_delay > 0:
             self.post_player_delay -= 1
             if self.post_player_delay > 0:
@@ -217,7 +297,7 @@ class CombatManager:
             keep_pending = []
             for e in self.treasure_pending:
                 e['t'] -= 1
-                if e['t'] <= 0:
+                if e['t'] <= 0 or self.turbo:
                     self._spawn_treasure(e['x'], e['y'])
                 else:
                     keep_pending.append(e)
@@ -228,6 +308,7 @@ class CombatManager:
 
         if self.current_phase != GamePhase.PLAYER_ACTION:
             self.player_reachable_tiles = {}
+            self.player_reach_board = 0
             self._reset_hover_preview()
 
         # Decay one-frame (or few-frames) attack overlay
@@ -266,40 +347,49 @@ class CombatManager:
             self.phase_started = False
 
         self.action_timer += 1
-        if self.action_timer >= self.action_delay:
+        if self.turbo:
+            self.action_timer = 0
+            while self.enemy_action_queue:
+                self._run_enemy_action(self.enemy_action_queue.pop(0))
+            self._complete_enemy_move_telegraph()
+        elif self.action_timer >= self.action_delay:
             self.action_timer = 0
             if self.enemy_action_queue:
-                action = self.enemy_action_queue.pop(0)
-                enemy = action['enemy']
-                if enemy not in self.enemies or enemy.hp <= 0:
-                    pass
-                elif action['action'] == 'move':
-                    path = action.get('path') or []
-                    old_pos = (enemy.x, enemy.y)
-                    if path:
-                        for step in path:
-                            enemy.x, enemy.y = step
-                    new_pos = (enemy.x, enemy.y)
-                    if new_pos != old_pos:
-                        self.move_arrow = {'start': old_pos, 'end': new_pos}
-                        self.move_arrow_ticks = max(1, self.action_delay - 1)
-                elif action['action'] == 'telegraph':
-                    target = action.get('target')
-                    enemy.current_target = target
-                    all_entities = [self.player] + self.enemies + self.decor_objects
-                    telegraph = enemy.telegraph(target, all_entities)
-                    if telegraph:
-                        if 'attacker' not in telegraph:
-                            telegraph['attacker'] = enemy
-                        self.telegraphs.append(telegraph)
+                self._run_enemy_action(self.enemy_action_queue.pop(0))
             else:
-                # Compute attack order numbers based on initiative and who telegraphed
-                self._compute_attack_order_map()
-                self.phase_complete = True
-                self.locked_enemy_plan = []
+                self._complete_enemy_move_telegraph()
         # Allow passive pickup if standing on treasure
         self._pickup_treasure_under_player()
 
+    def _run_enemy_action(self, action):
+        enemy = action['enemy']
+        if enemy not in self.enemies or enemy.hp <= 0:
+            return
+        if action['action'] == 'move':
+            path = action.get('path') or []
+            old_pos = (enemy.x, enemy.y)
+            if path:
+                for step in path:
+                    enemy.x, enemy.y = step
+            new_pos = (enemy.x, enemy.y)
+            if new_pos != old_pos:
+                self.move_arrow = {'start': old_pos, 'end': new_pos}
+                self.move_arrow_ticks = max(1, self.action_delay - 1)
+        elif action['action'] == 'telegraph':
+            target = action.get('target')
+            enemy.current_target = target
+            telegraph = enemy.telegraph(target, self.occupancy)
+            if telegraph:
+                if 'attacker' not in telegraph:
+                    telegraph['attacker'] = enemy
+                self.telegraphs.append(telegraph)
+
+    def _complete_enemy_move_telegraph(self):
+        # Compute attack order numbers based on initiative and who telegraphed
+        self._compute_attack_order_map()
+        self.phase_complete = True
+        self.locked_enemy_plan = []
+
     def handle_player_action_phase(self):
         if self.phase_started:
             self.player.reset_moves()
@@ -307,11 +397,17 @@ class CombatManager:
             self._clear_pending_move()
             self.phase_started = False
 
-        all_entities = [self.player] + self.enemies + self.decor_objects
+        all_entities = self.occupancy
         self._refresh_player_reachability(all_entities)
+        controls = self.input_provider
+        controls.poll(self)
         self._update_hover_preview()
+        if controls.btnp(pyxel.KEY_H):
+            self.show_hint = not self.show_hint
+        if self.show_hint:
+            self._update_hint()
 
-        if pyxel.btnp(pyxel.MOUSE_BUTTON_LEFT):
+        if controls.btnp(pyxel.MOUSE_BUTTON_LEFT):
             clicked_tile = self._mouse_tile()
             if clicked_tile == (self.player.x, self.player.y):
                 self._finalize_player_turn()
@@ -332,9 +428,8 @@ class CombatManager:
                 self._finalize_player_turn()
                 return
 
-        moved = self.player.try_keyboard_move(all_entities)
+        moved = self.player.try_keyboard_move(all_entities, controls)
         if moved:
-            all_entities = [self.player] + self.enemies + self.decor_objects
             self._refresh_player_reachability(all_entities)
             self._clear_pending_move()
 
@@ -342,7 +437,7 @@ class CombatManager:
             self._finalize_player_turn()
             return
 
-        if pyxel.btnp(pyxel.KEY_SPACE) or pyxel.btnp(pyxel.MOUSE_BUTTON_RIGHT) or getattr(self.player, 'moves_left', 0) <= 0:
+        if controls.btnp(pyxel.KEY_SPACE) or controls.btnp(pyxel.MOUSE_BUTTON_RIGHT) or getattr(self.player, 'moves_left', 0) <= 0:
             self._finalize_player_turn()
 
     def handle_enemy_attack_phase(self):
@@ -440,16 +535,17 @@ class CombatManager:
                     hate_adjustments.append((attacker, self.player, 1))
                     vfx_positions.append((ax, ay))
 
+                occupants = self.occupancy.at(ax, ay)
                 # Enemy hit checks
-                for enemy in self.enemies:
-                    if enemy.occupies(ax, ay):
+                for enemy in occupants:
+                    if enemy is not self.player and not isinstance(enemy, Decor):
                         enemy_dmg[enemy] = enemy_dmg.get(enemy, 0) + 1
                         hate_adjustments.append((attacker, enemy, 1))
                         vfx_positions.append((ax, ay))
 
                 # Decor hit checks
-                for deco in self.decor_objects:
-                    if not deco.is_rubble and deco.occupies(ax, ay):
+                for deco in occupants:
+                    if isinstance(deco, Decor):
                         enemy_dmg[deco] = enemy_dmg.get(deco, 0) + 1
                         decor_vfx_positions.append((ax, ay))
                         decor_break_events.append({'pos': (ax, ay), 'attacker': attacker, 'steps': 0})
@@ -542,31 +638,20 @@ class CombatManager:
         if not names:
             return
         if target_count is None:
-            count = random.randint(3, 5)
+            count = self.rng.gameplay.randint(3, 5)
         else:
             count = max(0, target_count)
         # Collect candidate floor tiles not blocked by doors and not occupied by entities
-        candidates = []
-        for y in range(MAP_HEIGHT):
-            for x in range(MAP_WIDTH):
-                tile = self.tilemap.tiles[y][x]
-                if tile and tile.startswith('floor'):
-                    door_info = self.tilemap.tile_states.get((x, y))
-                    if door_info and door_info.get('state') == 'closed':
-                        continue
-                    # Avoid spawning under existing entities or decor
-                    occupied = False
-                    for ent in [self.player] + self.enemies + self.decor_objects:
-                        if ent.occupies(x, y):
-                            occupied = True
-                            break
-                    if not occupied:
-                        candidates.append((x, y))
-        random.shuffle(candidates)
+        # Avoid spawning under existing entities or decor
+        candidates = [(x, y) for (x, y) in self.tilemap.spawnable_tiles() if not self.occupancy.blocked(x, y)]
+        self.rng.gameplay.shuffle(candidates)
         spots = candidates[:count]
         for (x, y) in spots:
-            sprite = random.choice(names)
-            self.decor_objects.append(Decor(x, y, self.tilemap, self.player.asset_manager, sprite_name=sprite))
+            sprite = self.rng.cosmetic.choice(names)
+            decor = Decor(x, y, self.tilemap, self.player.asset_manager, sprite_name=sprite)
+            self.decor_objects.append(decor)
+            self.zobrist.add(decor)
+            self.occupancy.add(decor)
 
     def _decay_rubble_once(self):
         if not self.decor_objects:
@@ -579,7 +664,8 @@ class CombatManager:
                     keep.append(d)
                 else:
                     # rubble disappears
-                    pass
+                    self.zobrist.remove(d)
+                    self.occupancy.remove(d)
             else:
                 keep.append(d)
         self.decor_objects = keep
@@ -616,6 +702,9 @@ class CombatManager:
 
     def handle_projectile_resolution_phase(self):
         self.update_projectiles()
+        # Turbo: fly every projectile to impact within this frame
+        while self.turbo and self.projectiles and not self.player_dead:
+            self.update_projectiles()
         if not self.projectiles:
             # If there are more sequential attacks pending, go back to ENEMY_ATTACK
             if self.attack_index < len(self.attack_queue):
@@ -669,8 +758,8 @@ class CombatManager:
                     return
 
             # Check if any enemy is at the target position
-            for enemy in list(self.enemies):
-                if enemy.occupies(target_pos[0], target_pos[1]):
+            for enemy in list(self.occupancy.at(target_pos[0], target_pos[1])):
+                if enemy is not self.player and not isinstance(enemy, Decor):
                     dmg = 1
                     enemy.take_damage(dmg)
                     # Hate adjust: victim increases hate toward attacker; attacker decreases toward victim
@@ -742,8 +831,8 @@ class CombatManager:
                         return
 
                 # Check if any enemy is at the target position
-                for enemy in self.enemies:
-                    if enemy.occupies(target_pos[0], target_pos[1]):
+                for enemy in list(self.occupancy.at(target_pos[0], target_pos[1])):
+                    if enemy is not self.player and not isinstance(enemy, Decor):
                         enemy.take_damage(1)
                         # Grief: bump attacker to the top of victim's hate list
                         if attacker and hasattr(enemy, 'register_grief'):
@@ -785,9 +874,7 @@ class CombatManager:
                         self.projectiles.remove(p)
                         continue
 
-                tile = self.tilemap.tiles[tile_y][tile_x]
-                door_info = self.tilemap.tile_states.get((tile_x, tile_y))
-                if not is_walkable_tile(tile, door_info):
+                if not self.tilemap.is_walkable(tile_x, tile_y):
                     if not getattr(p, 'cosmetic', False):
                         self.vfx_manager.add_particles(p.x + TILE_SIZE / 2, p.y + TILE_SIZE / 2, 8, 20)
                     if p in self.projectiles:
@@ -805,8 +892,10 @@ class CombatManager:
                         self.player.hp = 0
                         self._on_player_death()
                         return
-                for enemy in self.enemies:
-                    if enemy.occupies(tile_x, tile_y):
+                # Copied: breaking decor below re-indexes the tile
+                occupants = list(self.occupancy.at(tile_x, tile_y))
+                for enemy in occupants:
+                    if enemy is not self.player and not isinstance(enemy, Decor):
                         if not getattr(p, 'cosmetic', False):
                             dmg = 1
                             pre_hp = enemy.hp
@@ -818,8 +907,8 @@ class CombatManager:
                             if pre_hp > 0 and enemy.hp <= 0:
                                 self._queue_treasure(enemy.x, enemy.y)
                 # Decor breaks to rubble on projectile hit
-                for deco in self.decor_objects:
-                    if not deco.is_rubble and deco.occupies(tile_x, tile_y):
+                for deco in occupants:
+                    if isinstance(deco, Decor):
                         if not getattr(p, 'cosmetic', False):
                             deco.break_to_rubble()
                             # Grey splatter for decor
@@ -882,12 +971,13 @@ class CombatManager:
 
         top_doors = getattr(self.tilemap, 'top_door_xs', [])
         bottom_doors = getattr(self.tilemap, 'bottom_door_xs', [])
+        board = self.player_reach_board
         for y in range(MAP_HEIGHT):
             for x in range(MAP_WIDTH):
-                if (x, y) not in self.player_reachable_tiles:
-                    if y == 0 and x in top_doors and (x, 1) in self.player_reachable_tiles:
+                if not bitboard.has(board, x, y):
+                    if y == 0 and x in top_doors and bitboard.has(board, x, 1):
                         continue
-                    if y == MAP_HEIGHT - 1 and x in bottom_doors and (x, MAP_HEIGHT - 2) in self.player_reachable_tiles:
+                    if y == MAP_HEIGHT - 1 and x in bottom_doors and bitboard.has(board, x, MAP_HEIGHT - 2):
                         continue
                     base_x = x * TILE_SIZE
                     base_y = y * TILE_SIZE
@@ -918,6 +1008,24 @@ class CombatManager:
             pyxel.blt(px, py, img_bank, u, v, TILE_SIZE, TILE_SIZE, 0)
             pyxel.pal()
 
+    def _update_hint(self):
+        if self.hint_solver is None:
+            from solver import TurnSolver
+            self.hint_solver = TurnSolver()
+        self.hint_solver.update(self, self.hint_budget)
+
+    def draw_hint(self):
+        if not self.show_hint or self.hint_solver is None or self.player_dead or self.room_transition:
+            return
+        if self.current_phase != GamePhase.PLAYER_ACTION:
+            return
+        tile = self.hint_solver.best
+        if tile is None:
+            return
+        # Bright once every reachable tile has been scored, dim while still searching
+        color = 11 if self.hint_solver.done else 3
+        pyxel.rectb(tile[0] * TILE_SIZE + 1, tile[1] * TILE_SIZE + 1, TILE_SIZE - 2, TILE_SIZE - 2, color)
+
     def draw_room_transition_overlay(self):
         if self.player_dead:
             return
@@ -968,17 +1076,15 @@ class CombatManager:
             if t.x == x and t.y == y:
                 return
         # Only on walkable floor
-        if not (0 <= x < MAP_WIDTH and 0 <= y < MAP_HEIGHT):
-            return
-        tile = self.tilemap.tiles[y][x]
-        door_info = self.tilemap.tile_states.get((x, y))
-        if not is_walkable_tile(tile, door_info):
+        if not self.tilemap.is_walkable(x, y):
             return
         name_list = getattr(self.player.asset_manager, 'treasure_names', [])
         if not name_list:
             return
-        sprite = random.choice(name_list)
-        self.treasure_objects.append(Treasure(x, y, self.tilemap, self.player.asset_manager, sprite_name=sprite))
+        sprite = self.rng.cosmetic.choice(name_list)
+        treasure = Treasure(x, y, self.tilemap, self.player.asset_manager, sprite_name=sprite)
+        self.treasure_objects.append(treasure)
+        self.zobrist.add(treasure)
 
     def _queue_treasure(self, x: int, y: int, delay: int | None = None):
         # Avoid duplicate queued spawns for the same tile at the same moment
@@ -994,6 +1100,7 @@ class CombatManager:
         for t in self.treasure_objects:
             if self.player.occupies(t.x, t.y):
                 picked += 1
+                self.zobrist.remove(t)
             else:
                 keep.append(t)
         if picked > 0:
@@ -1003,29 +1110,27 @@ class CombatManager:
             setattr(self.player, 'coins', coins + picked)
 
     def _refresh_player_reachability(self, all_entities):
-        reachable, parents = self.player.compute_reachable(all_entities)
+        layers = self.player.reach_layers(all_entities)
+        board = 0
+        reachable = {}
+        for cost, layer in enumerate(layers):
+            board |= layer
+            for tile in bitboard.tiles(layer):
+                reachable[tile] = cost
         self.player_reachable_tiles = reachable
-        self.player_reach_parents = parents
+        self.player_reach_layers = layers
+        self.player_reach_board = board
         self.player_reach_origin = (self.player.x, self.player.y)
 
     def _reconstruct_player_path(self, target_tile):
         if target_tile == self.player_reach_origin:
             return []
-
-        path = []
-        current = target_tile
-        while current != self.player_reach_origin:
-            parent = self.player_reach_parents.get(current)
-            if parent is None:
-                return []
-            path.append(current)
-            current = parent
-        path.reverse()
-        return path
+        # Parents are only recovered for the tile actually chosen
+        return bitboard.path_to(self.player_reach_layers, target_tile)
 
     def _mouse_tile(self):
-        tx = pyxel.mouse_x // TILE_SIZE
-        ty = pyxel.mouse_y // TILE_SIZE
+        tx = self.input_provider.mouse_x // TILE_SIZE
+        ty = self.input_provider.mouse_y // TILE_SIZE
         if 0 <= tx < MAP_WIDTH and 0 <= ty < MAP_HEIGHT:
             return (tx, ty)
         return None
@@ -1097,7 +1202,14 @@ class CombatManager:
         for enemy in ordered:
             sim_ordered.append(sim_map[enemy])
 
-        sim_all_entities = [sim_player] + sim_enemies + list(self.decor_objects)
+        sim_all_entities = Occupancy([sim_player] + sim_enemies + list(self.decor_objects))
+        fields = searches = None
+        if self.enemy_searches is not None:
+            searches = self.enemy_searches
+            searches.begin(self.tilemap)
+        else:
+            fields = self.distance_fields
+            fields.begin((self.room_index, self.turn_count), self.tilemap, self.decor_objects)
 
         for sim_enemy in sim_enemies:
             ai.init_ai(sim_enemy, sim_player, sim_enemies)
@@ -1115,7 +1227,7 @@ class CombatManager:
             else:
                 target_actual = rev_map.get(target_sim, self.player)
 
-            path = ai.find_closest_attack_position(sim_enemy, target_sim, sim_all_entities)
+            path = ai.find_closest_attack_position(sim_enemy, target_sim, sim_all_entities, fields, searches)
             travel_steps = []
             if path and len(path) > 1:
                 steps = min(sim_enemy.move_speed, len(path) - 1)
@@ -1170,6 +1282,7 @@ class CombatManager:
 
     def _register_enemy_death(self, enemy):
         if enemy in self._counted_dead:
+            self.occupancy.remove(enemy)
             if enemy in self.enemies:
                 try:
                     self.enemies.remove(enemy)
@@ -1183,6 +1296,7 @@ class CombatManager:
             return
         self._counted_dead.add(enemy)
         self.monsters_killed += 1
+        self.occupancy.remove(enemy)
         if enemy in self.enemies:
             try:
                 self.enemies.remove(enemy)
@@ -1206,6 +1320,7 @@ class CombatManager:
             if enemy.hp > 0:
                 alive.append(enemy)
             else:
+                self.occupancy.remove(enemy)
                 if enemy not in self._counted_dead:
                     self._counted_dead.add(enemy)
                     self.monsters_killed += 1
@@ -1243,12 +1358,15 @@ class CombatManager:
         self.enemies = []
         self.enemy_initiative = []
         self._decor_initialized = False
+        self.occupancy.rebuild(self)
 
     def _spawn_room_contents(self, progress: float):
         self._spawn_random_decor(target_count=self._sample_decor_count(progress))
         self._decor_initialized = True
         self._spawn_enemies_for_room(progress)
         self.enemy_initiative = list(self.enemies)
+        self.zobrist.rebuild(self)
+        self.occupancy.rebuild(self)
 
     def _spawn_enemies_for_room(self, progress: float):
         try:
@@ -1257,36 +1375,24 @@ class CombatManager:
             from entity import DumbSlime as _DS, Spider as _Sp
             enemy_classes = [_DS, _Sp]
 
-        candidates = []
-        for y in range(MAP_HEIGHT):
-            for x in range(MAP_WIDTH):
-                tile = self.tilemap.tiles[y][x]
-                if tile and tile.startswith('floor') and not self.tilemap.is_open_door(x, y):
-                    door_info = self.tilemap.tile_states.get((x, y))
-                    if door_info and door_info.get('state') == 'closed':
-                        continue
-                    occupied = False
-                    for ent in [self.player] + self.enemies + self.decor_objects:
-                        if ent.occupies(x, y):
-                            occupied = True
-                            break
-                    if not occupied:
-                        candidates.append((x, y))
+        candidates = [(x, y) for (x, y) in self.tilemap.spawnable_tiles() if not self.occupancy.blocked(x, y)]
 
         if not candidates:
             return
 
-        random.shuffle(candidates)
+        self.rng.gameplay.shuffle(candidates)
         num_enemies = min(self._sample_enemy_count(progress), len(candidates))
         enemy_spots = candidates[:num_enemies]
         for (x, y) in enemy_spots:
-            cls = random.choice(enemy_classes)
-            self.enemies.append(cls(x, y, self.tilemap, self.player.asset_manager))
+            cls = self.rng.gameplay.choice(enemy_classes)
+            enemy = cls(x, y, self.tilemap, self.player.asset_manager)
+            self.enemies.append(enemy)
+            self.occupancy.add(enemy)
 
         reserved = set(enemy_spots)
         remaining = [pos for pos in candidates if pos not in reserved]
         free = self._sample_free_treasure(progress, len(remaining))
-        random.shuffle(remaining)
+        self.rng.gameplay.shuffle(remaining)
         for (x, y) in remaining[:free]:
             self._queue_treasure(x, y, delay=0)
 
@@ -1296,67 +1402,24 @@ class CombatManager:
         return max(0.0, min(1.0, (self.room_index - 1) / (self.max_rooms - 1)))
 
     def _sample_enemy_count(self, progress: float) -> int:
-        weights = []
-        for count in range(1, 6):
-            early_weight = 6 - count
-            late_weight = count
-            weight = (1.0 - progress) * early_weight + progress * late_weight
-            weights.append(max(0.01, weight))
-        pick = random.random() * sum(weights)
-        cumulative = 0.0
-        for count, weight in zip(range(1, 6), weights):
-            cumulative += weight
-            if pick <= cumulative:
-                return count
-        return 5
-
-    def _sample_decor_count(self, progress: float) -> int:
-        base = 1 + int(progress * 3)
-        max_decor = min(5, base + 1)
-        min_decor = min(base, max_decor)
-        return random.randint(min_decor, max_decor)
-
-    def _sample_free_treasure(self, progress: float, max_slots: int) -> int:
-        attempts = max(1, 3 - int(progress * 2))
-        chance = max(0.15, 0.75 - 0.5 * progress)
-        count = 0
-        for _ in range(attempts):
-            if random.random() < chance:
-                count += 1
-        return min(count, max_slots)
-
-    def _room_progress(self) -> float:
-        if self.max_rooms <= 1:
-            return 0.0
-        return max(0.0, min(1.0, (self.room_index - 1) / (self.max_rooms - 1)))
-
-    def _sample_enemy_count(self, progress: float) -> int:
-        weights = []
-        for count in range(1, 6):
-            early_weight = 6 - count
-            late_weight = count
-            weight = (1.0 - progress) * early_weight + progress * late_weight
-            weights.append(max(0.01, weight))
-        pick = random.random() * sum(weights)
+        weights = enemy_weights(self.spawn_tables, progress)
+        pick = self.rng.gameplay.random() * sum(weights)
         cumulative = 0.0
-        for count, weight in zip(range(1, 6), weights):
+        for count, weight in enumerate(weights, start=1):
             cumulative += weight
             if pick <= cumulative:
                 return count
-        return 5
+        return len(weights)
 
     def _sample_decor_count(self, progress: float) -> int:
-        base = 1 + int(progress * 3)
-        max_decor = min(5, base + 1)
-        min_decor = min(base, max_decor)
-        return random.randint(min_decor, max_decor)
+        min_decor, max_decor = decor_range(self.spawn_tables, progress)
+        return self.rng.gameplay.randint(min_decor, max_decor)
 
     def _sample_free_treasure(self, progress: float, max_slots: int) -> int:
-        attempts = max(1, 3 - int(progress * 2))
-        chance = max(0.15, 0.75 - 0.5 * progress)
+        attempts, chance = treasure_odds(self.spawn_tables, progress)
         count = 0
         for _ in range(attempts):
-            if random.random() < chance:
+            if self.rng.gameplay.random() < chance:
                 count += 1
         return min(count, max_slots)
 
@@ -1373,7 +1436,8 @@ class CombatManager:
             'door_x': door_x,
         }
         self.player_reachable_tiles = {}
-        self.player_reach_parents = {}
+        self.player_reach_layers = []
+        self.player_reach_board = 0
         self._reset_hover_preview()
         self.locked_enemy_plan = []
         return True
@@ -1383,8 +1447,9 @@ class CombatManager:
             return
         rt = self.room_transition
         rt['timer'] += 1
+        fade_frames = 1 if self.turbo else self._transition_frames
         if rt['state'] == 'fade_out':
-            if rt['timer'] >= self._transition_frames:
+            if rt['timer'] >= fade_frames:
                 entry_from = rt['entry_from']
                 door_x = rt['door_x']
                 generated = self._generate_room(entry_from, door_x)
@@ -1397,7 +1462,7 @@ class CombatManager:
                     'door_x': door_x,
                 }
         elif rt['state'] == 'fade_in':
-            if rt['timer'] >= self._transition_frames:
+            if rt['timer'] >= fade_frames:
                 self.room_transition = None
 
     def _on_player_death(self):
@@ -1465,12 +1530,12 @@ class CombatManager:
     def _check_keyboard_room_transition(self):
         # Top doors: player stands at y==1 and presses up into the top wall
         if self.player.y == 1 and self.player.x in getattr(self.tilemap, 'top_door_xs', []):
-            if pyxel.btnp(pyxel.KEY_W):
+            if self.input_provider.btnp(pyxel.KEY_W):
                 self._generate_room('top', self.player.x)
                 return True
         # Bottom doors: player stands at y==MAP_HEIGHT-2 and presses down into the bottom wall
         if self.player.y == MAP_HEIGHT - 2 and self.player.x in getattr(self.tilemap, 'bottom_door_xs', []):
-            if pyxel.btnp(pyxel.KEY_S):
+            if self.input_provider.btnp(pyxel.KEY_S):
                 self._generate_room('bottom', self.player.x)
                 return True
         return False
@@ -0,0 +1,94 @@
+"""Shared reverse distance fields ("Dijkstra maps") for enemy planning.
+
+A field holds, for every tile, the number of steps to the nearest of a set
+of goal tiles (a target's attack positions), over the walkable grid minus
+the obstacles that stay put while enemies plan (intact decor). Enemies
+that share a target and an attack pattern share one field per turn:
+
+    fields = DistanceFields()
+    fields.begin((room, turn), tilemap, decor_objects)
+    dist = fields.get(goal_tiles)       # list indexed by y * MAP_WIDTH + x
+
+Moving entities are left out of the field. ai.find_closest_attack_position
+uses it to restrict its breadth-first search to tiles that lie on a shortest
+path, and falls back to the full search when entities block all of them.
+Because the field never overestimates, this returns exactly the path the
+full search would.
+"""
+from constants import MAP_WIDTH, MAP_HEIGHT
+from occupancy import footprint
+
+INF = 1 << 30
+_OFFSETS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+
+
+def _neighbour_table() -> list:
+    """In-bounds 4-neighbours of every flat tile index, in _OFFSETS order."""
+    table = []
+    for y in range(MAP_HEIGHT):
+        for x in range(MAP_WIDTH):
+            table.append([
+                (y + dy) * MAP_WIDTH + x + dx for dx, dy in _OFFSETS
+                if 0 <= x + dx < MAP_WIDTH and 0 <= y + dy < MAP_HEIGHT
+            ])
+    return table
+
+
+NEIGHBOURS = _neighbour_table()
+
+
+def reverse_field(passable, goals) -> list:
+    """Multi-source BFS distances from `goals` over tiles where `passable` is set."""
+    dist = [INF] * (MAP_WIDTH * MAP_HEIGHT)
+    frontier = []
+    for (x, y) in goals:
+        i = y * MAP_WIDTH + x
+        if 0 <= x < MAP_WIDTH and 0 <= y < MAP_HEIGHT and passable[i] and dist[i]:
+            dist[i] = 0
+            frontier.append(i)
+    d = 0
+    while frontier:
+        d += 1
+        nxt = []
+        for i in frontier:
+            for j in NEIGHBOURS[i]:
+                if dist[j] == INF and passable[j]:
+                    dist[j] = d
+                    nxt.append(j)
+        frontier = nxt
+    return dist
+
+
+class DistanceFields:
+    """Per-turn cache of reverse distance fields, keyed by goal set and static obstacles."""
+
+    def __init__(self, max_fields: int = 256):
+        self.max_fields = max_fields
+        self.fields: dict = {}
+        self.turn = None
+        self.passable = None
+        self._static_key = None
+        self.hits = 0
+        self.misses = 0
+
+    def begin(self, turn, tilemap, static_entities=()):
+        """Start planning for `turn`; fields from other turns are dropped."""
+        if turn != self.turn or len(self.fields) >= self.max_fields:
+            self.fields = {}
+            self.turn = turn
+        passable = bytearray(tilemap.walkable)
+        for ent in static_entities:
+            for i in footprint(ent):
+                passable[i] = 0
+        self.passable = passable
+        self._static_key = bytes(passable)
+
+    def get(self, goals) -> list:
+        key = (self._static_key, frozenset(goals))
+        field = self.fields.get(key)
+        if field is None:
+            self.misses += 1
+            field = self.fields[key] = reverse_field(self.passable, goals)
+        else:
+            self.hits += 1
+        return field
@@ -1,9 +1,15 @@
 import pyxel
-from collections import deque
-from map import is_walkable_tile
 import ai
 from typing import List, Optional, Tuple, Dict
 from constants import TILE_SIZE, MAP_WIDTH, MAP_HEIGHT, DOOR
+from zobrist import HASHED_ATTRS
+from occupancy import OCCUPANCY_ATTRS, Occupancy, blocked_board, tile_blocked
+from clearance import fits
+import bitboard
+from path_table import table_for
+
+# Neighbour order of Entity.pathfinding; its BFS tie-breaking depends on it
+PATHFINDING_DIRS = ((0, 1), (0, -1), (1, 0), (-1, 0))
 
 class Entity:
     def __init__(self, x, y, tilemap, asset_manager, width=1, height=1):
@@ -20,26 +26,38 @@ class Entity:
         self.palette_swap = None  # Optional dict of {src_color: dst_color}
         self.colkey = 0  # Default transparency color index
 
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        # Keep the room's Zobrist hash in step with position/hp/rubble/hate changes
+        if name in HASHED_ATTRS:
+            zobrist = self.__dict__.get('zobrist')
+            if zobrist is not None:
+                zobrist.refresh(self)
+            # ...and the room's tile occupancy index
+            if name in OCCUPANCY_ATTRS:
+                occupancy = self.__dict__.get('occupancy')
+                if occupancy is not None:
+                    occupancy.refresh(self)
+
     def occupies(self, x, y):
         return self.x <= x < self.x + self.width and self.y <= y < self.y + self.height
 
     def can_occupy(self, new_x: int, new_y: int, all_entities) -> bool:
         """Check whether the entity could stand at the given tile."""
+        if (self.width > 1 or self.height > 1) and isinstance(all_entities, Occupancy):
+            # One lookup in the index's clearance map instead of a check per footprint cell
+            clear = all_entities.clearance(self.tilemap.walkable, self)
+            return fits(clear, new_x, new_y, self.width, self.height)
         for i in range(self.width):
             for j in range(self.height):
                 tx = new_x + i
                 ty = new_y + j
-                if not (0 <= tx < MAP_WIDTH and 0 <= ty < MAP_HEIGHT):
-                    return False
-                tile = self.tilemap.tiles[ty][tx]
-                door_info = self.tilemap.tile_states.get((tx, ty))
-                if not is_walkable_tile(tile, door_info):
+                if not self.tilemap.is_walkable(tx, ty):
                     return False
 
                 # Check for collision with other entities
-                for entity in all_entities:
-                    if entity is not self and entity.occupies(tx, ty):
-                        return False
+                if tile_blocked(all_entities, tx, ty, self):
+                    return False
 
         return True
 
@@ -76,46 +94,9 @@ class Entity:
                     pyxel.pal()
 
     def pathfinding(self, target_x, target_y):
-        q = deque([[(self.x, self.y)]])
-        visited = set([(self.x, self.y)])
-
-        while q:
-            path = q.popleft()
-            x, y = path[-1]
-
-            if (x, y) == (target_x, target_y):
-                return path
-
-            for dx, dy in [(0, 1), (0, -1), (1, 0), (-1, 0)]:
-                new_x, new_y = x + dx, y + dy
-
-                if (new_x, new_y) in visited:
-                    continue
-
-                # Validate footprint
-                valid = True
-                for i in range(self.width):
-                    for j in range(self.height):
-                        tx, ty = new_x + i, new_y + j
-                        if not (0 <= tx < MAP_WIDTH and 0 <= ty < MAP_HEIGHT):
-                            valid = False
-                            break
-                        tile = self.tilemap.tiles[ty][tx]
-                        door_info = self.tilemap.tile_states.get((tx, ty))
-                        if not is_walkable_tile(tile, door_info):
-                            valid = False
-                            break
-                    if not valid:
-                        break
-
-                if not valid:
-                    continue
-
-                visited.add((new_x, new_y))
-                new_path = list(path)
-                new_path.append((new_x, new_y))
-                q.append(new_path)
-        return None
+        # Entity-free BFS path, looked up in the room's all-pairs table
+        table = table_for(self.tilemap, self.width, self.height, PATHFINDING_DIRS)
+        return table.path((self.x, self.y), (target_x, target_y))
 
 class Player(Entity):
     def __init__(self, x, y, tilemap, asset_manager):
@@ -124,47 +105,35 @@ class Player(Entity):
         self.anim_name = "player"
         self.moves_left = 4
 
-    def try_keyboard_move(self, all_entities) -> bool:
+    def try_keyboard_move(self, all_entities, input_provider=None) -> bool:
         if self.moves_left <= 0:
             return False
 
+        btnp = input_provider.btnp if input_provider is not None else pyxel.btnp
         moved = False
-        if pyxel.btnp(pyxel.KEY_W):
+        if btnp(pyxel.KEY_W):
             moved = self.move(0, -1, all_entities)
-        elif pyxel.btnp(pyxel.KEY_S):
+        elif btnp(pyxel.KEY_S):
             moved = self.move(0, 1, all_entities)
-        elif pyxel.btnp(pyxel.KEY_A):
+        elif btnp(pyxel.KEY_A):
             moved = self.move(-1, 0, all_entities)
-        elif pyxel.btnp(pyxel.KEY_D):
+        elif btnp(pyxel.KEY_D):
             moved = self.move(1, 0, all_entities)
 
         if moved:
             self.moves_left = max(0, self.moves_left - 1)
         return moved
 
-    def compute_reachable(self, all_entities):
-        moves = max(0, self.moves_left)
-        origin = (self.x, self.y)
-        reachable = {origin: 0}
-        parents = {}
-        frontier = deque([origin])
-
-        while frontier:
-            cx, cy = frontier.popleft()
-            cost = reachable[(cx, cy)]
-            if cost >= moves:
-                continue
-            for dx, dy in [(0, 1), (0, -1), (1, 0), (-1, 0)]:
-                nx, ny = cx + dx, cy + dy
-                if (nx, ny) in reachable:
-                    continue
-                if not self.can_occupy(nx, ny, all_entities):
-                    continue
-                reachable[(nx, ny)] = cost + 1
-                parents[(nx, ny)] = (cx, cy)
-                frontier.append((nx, ny))
-
-        return reachable, parents
+    def reach_layers(self, all_entities) -> list:
+        """Tiles reachable with moves_left steps as bitboard layers: layers[k] holds the tiles first reached in k steps."""
+        free = self.tilemap.walkable_bits & ~blocked_board(all_entities, self)
+        # Anchor tiles whose whole footprint is free
+        base = free
+        for i in range(self.width):
+            for j in range(self.height):
+                if i or j:
+                    free &= bitboard.shift(base, -i, -j)
+        return bitboard.flood(bitboard.bit(self.x, self.y), free, max(0, self.moves_left))
 
     def follow_path(self, path, all_entities) -> bool:
         if not path:
@@ -518,11 +487,8 @@ class Phantom(Enemy):
             for dx, dy in ((-dist, 0), (dist, 0), (0, -dist), (0, dist)):
                 cx = target.x + dx
                 cy = target.y + dy
-                if 0 <= cx < MAP_WIDTH and 0 <= cy < MAP_HEIGHT:
-                    tile = self.tilemap.tiles[cy][cx]
-                    door_info = self.tilemap.tile_states.get((cx, cy))
-                    if is_walkable_tile(tile, door_info):
-                        candidates.append((cx, cy))
+                if self.tilemap.is_walkable(cx, cy):
+                    candidates.append((cx, cy))
             if candidates:
                 break
         if not candidates:
@@ -562,9 +528,7 @@ class Phantom(Enemy):
             tx = self.x + step_x * i
             ty = self.y + step_y * i
             if 0 <= tx < MAP_WIDTH and 0 <= ty < MAP_HEIGHT:
-                tile = self.tilemap.tiles[ty][tx]
-                door_info = self.tilemap.tile_states.get((tx, ty))
-                if not is_walkable_tile(tile, door_info):
+                if not self.tilemap.is_walkable(tx, ty):
                     break
                 tiles.append((tx, ty))
             if not tiles:
@@ -0,0 +1,224 @@
+"""Reset/step environment around the headless combat loop.
+
+    from env import DungeonEnv
+
+    env = DungeonEnv(seed=0)
+    obs, info = env.reset()
+    while True:
+        action = policy(obs, info['action_mask'])    # flat tile index y * MAP_WIDTH + x
+        obs, reward, terminated, truncated, info = env.step(action)
+        if terminated or truncated:
+            break
+
+An action names a target tile: a reachable tile moves the player there, the
+player's own tile ends the turn in place and a door tile walks through that
+door when its entry tile is reachable. Anything else also ends the turn.
+Observations are int8 tensors of shape (len(OBS_CHANNELS), MAP_HEIGHT,
+MAP_WIDTH). The API follows gymnasium, but gymnasium itself is not needed.
+
+Requires: numpy (pip install numpy)
+"""
+from typing import List, Optional
+
+import numpy as np
+
+from bots import END_TURN, danger_tiles, door_entries, move_to
+from constants import MAP_WIDTH, MAP_HEIGHT
+from headless import HeadlessGame
+from input_provider import ScriptedInput
+from rng import derive_seed
+
+OBS_CHANNELS = (
+    'walkable', 'door', 'player',
+    'slime', 'spider', 'spinner', 'phantom',
+    'decor', 'rubble', 'treasure', 'telegraph',
+)
+_CH = {name: i for i, name in enumerate(OBS_CHANNELS)}
+ENEMY_CHANNELS = {
+    'Slime': _CH['slime'],
+    'DumbSlime': _CH['slime'],
+    'Spider': _CH['spider'],
+    'Spinner': _CH['spinner'],
+    'Phantom': _CH['phantom'],
+}
+N_ACTIONS = MAP_WIDTH * MAP_HEIGHT
+
+
+class DungeonEnv:
+    """One headless turbo run; each step is one player turn."""
+
+    def __init__(self, seed: int = 0, max_turns: int = 400, room_reward: float = 1.0,
+                 death_penalty: float = 1.0):
+        self.base_seed = seed
+        self.max_turns = max_turns
+        # Reward per step: coins picked up, plus room_reward per new room, minus death_penalty on death
+        self.room_reward = room_reward
+        self.death_penalty = death_penalty
+        self.episode = 0
+        self.game: Optional[HeadlessGame] = None
+        self._input = ScriptedInput()
+        self._static = np.zeros((2, MAP_HEIGHT, MAP_WIDTH), dtype=np.int8)
+        self._static_for = None
+        self._doors: dict = {}
+
+    @property
+    def combat_manager(self):
+        return self.game.combat_manager
+
+    def reset(self, seed: int | None = None):
+        if seed is None:
+            seed = derive_seed(self.base_seed, self.episode)
+        self.episode += 1
+        self._input.actions.clear()
+        if self.game is None:
+            self.game = HeadlessGame(self._input, seed=seed)
+        else:
+            self.game.reset_world(seed)
+        # Run up to the first player turn; the idle poll refreshes reachability
+        self.game.step()
+        return self.observe(), self._info()
+
+    def step(self, action: int):
+        reward, terminated, truncated = self._advance(action)
+        return self.observe(), reward, terminated, truncated, self._info()
+
+    def _advance(self, action: int):
+        cm = self.combat_manager
+        coins, room = self._progress()
+        self._input.feed(*self._actions_for(int(action)))
+        # One turbo step per queued action, then an idle poll to open the next turn
+        for _ in range(len(self._input.actions) + 1):
+            if self.game.finished:
+                break
+            self.game.step()
+        self._input.actions.clear()
+        new_coins, new_room = self._progress()
+        reward = float(new_coins - coins) + self.room_reward * (new_room - room)
+        if cm.player_dead:
+            reward -= self.death_penalty
+        terminated = self.game.finished
+        truncated = not terminated and cm.turn_count >= self.max_turns
+        return reward, terminated, truncated
+
+    def _progress(self):
+        cm = self.combat_manager
+        return getattr(cm.player, 'coins', 0), cm.room_index
+
+    def _actions_for(self, action: int) -> List[list]:
+        cm = self.combat_manager
+        tile = (action % MAP_WIDTH, action // MAP_WIDTH)
+        if tile == (cm.player.x, cm.player.y):
+            return END_TURN
+        if tile in cm.player_reachable_tiles:
+            return move_to(tile)
+        entry = self._door_entries().get(tile)
+        if entry is not None and entry in cm.player_reachable_tiles:
+            return [["click", tile[0], tile[1]]]
+        return END_TURN
+
+    def _door_entries(self) -> dict:
+        self._refresh_static()
+        return self._doors
+
+    def _refresh_static(self):
+        tilemap = self.combat_manager.tilemap
+        if self._static_for is tilemap:
+            return
+        self._static_for = tilemap
+        self._static[:] = 0
+        for y in range(MAP_HEIGHT):
+            for x in range(MAP_WIDTH):
+                self._static[0, y, x] = tilemap.is_walkable(x, y)
+                self._static[1, y, x] = (x, y) in tilemap.tile_states
+        self._doors = dict(door_entries(self.combat_manager))
+
+    def action_mask(self, out=None):
+        """Flat bool mask of the reachable tiles and usable doors.
+
+        The player's own tile is reachable at cost 0, so it is always set:
+        that action ends the turn in place, and the mask is never empty
+        while the run goes on.
+        """
+        cm = self.combat_manager
+        mask = np.zeros(N_ACTIONS, dtype=bool) if out is None else out
+        mask[:] = False
+        if self.game.finished:
+            return mask
+        for (x, y) in cm.player_reachable_tiles:
+            mask[y * MAP_WIDTH + x] = True
+        for (x, y), entry in self._door_entries().items():
+            if entry in cm.player_reachable_tiles:
+                mask[y * MAP_WIDTH + x] = True
+        return mask
+
+    def observe(self, out=None):
+        cm = self.combat_manager
+        self._refresh_static()
+        obs = np.zeros((len(OBS_CHANNELS), MAP_HEIGHT, MAP_WIDTH), dtype=np.int8) if out is None else out
+        obs[:2] = self._static
+        obs[2:] = 0
+        obs[_CH['player'], cm.player.y, cm.player.x] = max(0, cm.player.hp)
+        for enemy in cm.enemies:
+            ch = ENEMY_CHANNELS.get(type(enemy).__name__)
+            if ch is not None and enemy.hp > 0:
+                obs[ch, enemy.y, enemy.x] = enemy.hp
+        for d in cm.decor_objects:
+            obs[_CH['rubble'] if d.is_rubble else _CH['decor'], d.y, d.x] = 1
+        for t in cm.treasure_objects:
+            obs[_CH['treasure'], t.y, t.x] = 1
+        for (x, y) in danger_tiles(cm):
+            if 0 <= x < MAP_WIDTH and 0 <= y < MAP_HEIGHT:
+                obs[_CH['telegraph'], y, x] = 1
+        return obs
+
+    def _info(self) -> dict:
+        cm = self.combat_manager
+        info = {
+            'action_mask': self.action_mask(),
+            'room': cm.room_index,
+            'turn': cm.turn_count,
+            'coins': getattr(cm.player, 'coins', 0),
+        }
+        if self.game.finished:
+            info['summary'] = self.game.summary()
+        return info
+
+
+class VecDungeonEnv:
+    """Steps `num_envs` DungeonEnvs per call and resets finished ones automatically.
+
+    Observations and masks are written into preallocated arrays of shape
+    (num_envs, ...). When an episode ends, its final summary is reported in
+    infos['final_summary'][i] and the returned observation is the next
+    episode's first one.
+    """
+
+    def __init__(self, num_envs: int, seed: int = 0, **env_kwargs):
+        self.envs = [DungeonEnv(seed=derive_seed(seed, i), **env_kwargs) for i in range(num_envs)]
+        self.num_envs = num_envs
+        self.obs = np.zeros((num_envs, len(OBS_CHANNELS), MAP_HEIGHT, MAP_WIDTH), dtype=np.int8)
+        self.action_masks = np.zeros((num_envs, N_ACTIONS), dtype=bool)
+
+    def reset(self):
+        for i, env in enumerate(self.envs):
+            env.reset()
+            self._collect(i, env)
+        return self.obs, {'action_mask': self.action_masks}
+
+    def step(self, actions):
+        rewards = np.zeros(self.num_envs, dtype=np.float32)
+        terminated = np.zeros(self.num_envs, dtype=bool)
+        truncated = np.zeros(self.num_envs, dtype=bool)
+        final_summary = [None] * self.num_envs
+        for i, env in enumerate(self.envs):
+            rewards[i], terminated[i], truncated[i] = env._advance(actions[i])
+            if terminated[i] or truncated[i]:
+                final_summary[i] = env.game.summary()
+                env.reset()
+            self._collect(i, env)
+        infos = {'action_mask': self.action_masks, 'final_summary': final_summary}
+        return self.obs, rewards, terminated, truncated, infos
+
+    def _collect(self, i, env):
+        env.observe(out=self.obs[i])
+        env.action_mask(out=self.action_masks[i])
@@ -0,0 +1,98 @@
+"""Run Dungeon Breach without a pyxel window.
+
+HeadlessGame mirrors App.reset_world/App.update but never calls pyxel.init or
+any draw function; input comes from an injected provider (see input_provider).
+
+    from headless import HeadlessGame
+    from input_provider import ScriptedInput
+
+    game = HeadlessGame(ScriptedInput([["click", 3, 2], ["click", 3, 2]]))
+    game.run(max_frames=2000)
+    print(game.summary())
+"""
+import os
+
+from asset_manager import AssetManager
+from map import Tilemap
+from entity import Player
+from combat import CombatManager
+
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+_shared_assets = None
+
+
+def load_headless_assets() -> AssetManager:
+    """Parse the asset mappings once (no image banks) and share them."""
+    global _shared_assets
+    if _shared_assets is None:
+        # Asset paths in AssetManager are relative to the repo root
+        cwd = os.getcwd()
+        os.chdir(REPO_ROOT)
+        try:
+            _shared_assets = AssetManager(load_images=False)
+        finally:
+            os.chdir(cwd)
+    return _shared_assets
+
+
+class HeadlessGame:
+    def __init__(self, input_provider, asset_manager=None, turbo: bool = True, seed: int | None = None,
+                 spawn_tables: dict | None = None, path_cache: str = 'fields'):
+        self.input_provider = input_provider
+        self.turbo = turbo
+        self.spawn_tables = spawn_tables
+        self.path_cache = path_cache
+        self.asset_manager = asset_manager or load_headless_assets()
+        self.frames = 0
+        self.reset_world(seed)
+
+    def reset_world(self, seed: int | None = None):
+        self.tilemap = Tilemap(self.asset_manager)
+        start_x = getattr(self.tilemap, 'top_door_xs', [1])[0]
+        self.player = Player(start_x, 1, self.tilemap, self.asset_manager)
+        setattr(self.player, 'coins', 0)
+        self.combat_manager = CombatManager(
+            self.player, [], self.tilemap, input_provider=self.input_provider,
+            turbo=self.turbo, seed=seed, spawn_tables=self.spawn_tables, path_cache=self.path_cache,
+        )
+        self.tilemap = self.combat_manager.tilemap
+        self.frames = 0
+
+    def skip_to_room(self, room: int):
+        """Generate rooms through the normal top-door transition until `room` (1-based) is reached."""
+        cm = self.combat_manager
+        while cm.room_index < min(room, cm.max_rooms):
+            door_x = getattr(cm.tilemap, 'top_door_xs', [cm.player.x])[0]
+            cm._generate_room('top', door_x)
+        self.tilemap = cm.tilemap
+
+    @property
+    def finished(self) -> bool:
+        return self.combat_manager.player_dead or self.combat_manager.victory
+
+    def step(self):
+        self.combat_manager.update()
+        self.tilemap = self.combat_manager.tilemap
+        self.frames += 1
+
+    def run(self, max_frames: int = 100_000) -> bool:
+        """Step until the run ends or `max_frames` update calls elapse; True if it ended."""
+        while not self.finished and self.frames < max_frames:
+            self.step()
+        return self.finished
+
+    def summary(self) -> dict:
+        cm = self.combat_manager
+        return {
+            'victory': cm.victory,
+            'dead': cm.player_dead,
+            'room': cm.room_index,
+            'max_rooms': cm.max_rooms,
+            'hp': self.player.hp,
+            'coins': getattr(self.player, 'coins', 0),
+            'turns': cm.turn_count,
+            'monsters_killed': cm.monsters_killed,
+            'frames': self.frames,
+            'seed': cm.rng.seed,
+        }
@@ -0,0 +1,194 @@
+"""Incremental distance-to-goal fields that are repaired instead of rebuilt.
+
+An IncrementalField is a Lifelong Planning A* search (with a zero
+heuristic) over the room: for every tile, the steps to the nearest goal
+tile through passable tiles. It keeps its values and queue between calls.
+When the passable tiles or the goals change, only the changed tiles are
+re-queued, and the repair stops once the mover's neighbours are settled:
+
+    search = IncrementalField()
+    search.update(passable, goals)      # bitboards (see bitboard)
+    steps = search.settle(start)        # search.g is indexed by y * MAP_WIDTH + x
+
+The mover's own tile may be blocked (it stands there), so one search serves
+every mover heading for the same goal tiles; IncrementalFields keeps them
+keyed by goal set. Between enemy turns a few tiles change: enemies step,
+decor breaks, the player moves a little. The work then follows those
+changes rather than the room size. When settle(start) returns, every tile
+closer to the goals than `start` holds its exact distance. That is all
+ai._descend_field reads, so the path it picks is the one the full
+breadth-first search would pick.
+
+On the game's 10x10 rooms a repair costs about as much as a fresh
+breadth-first field, so combat keeps the per-turn DistanceFields cache by
+default; CombatManager(path_cache='incremental') (tools/simulate.py
+--incremental) plans enemy moves with these instead.
+"""
+from collections import OrderedDict
+
+from bitboard import tiles, to_grid
+from constants import MAP_WIDTH, MAP_HEIGHT
+from distance_fields import INF, NEIGHBOURS, reverse_field
+
+
+class IncrementalField:
+    def __init__(self):
+        self.passable = 0
+        self.goals = 0
+        # The two boards as a flat grid: 0 blocked, 1 passable, 2 goal
+        self.cells = bytearray(MAP_WIDTH * MAP_HEIGHT)
+        self.g = [INF] * (MAP_WIDTH * MAP_HEIGHT)
+        self.rhs = [INF] * (MAP_WIDTH * MAP_HEIGHT)
+        # Locally inconsistent tiles bucketed by key (distances are small
+        # integers); stale entries are skipped. `low` is at or below the
+        # smallest non-empty bucket.
+        self.buckets = [[] for _ in range(MAP_WIDTH * MAP_HEIGHT)]
+        self.low = 0
+        self.expanded = 0
+
+    def update(self, passable: int, goals: int):
+        """Switch to new passable and goal boards, queueing the tiles they affect."""
+        goals &= passable
+        changed = (self.passable ^ passable) | (self.goals ^ goals)
+        if not changed:
+            return
+        fresh = not self.passable
+        self.passable = passable
+        self.goals = goals
+        cells = self.cells
+        if fresh:
+            # A new search starts from a plain breadth-first field, consistent everywhere
+            cells = self.cells = to_grid(passable)
+            goal_tiles = list(tiles(goals))
+            for (x, y) in goal_tiles:
+                cells[y * MAP_WIDTH + x] = 2
+            self.g = reverse_field(cells, goal_tiles)
+            self.rhs = list(self.g)
+            return
+        # Only the changed tiles need new rhs values: neighbours catch up when
+        # those tiles are settled or raised in settle()
+        for (x, y) in tiles(changed):
+            i = y * MAP_WIDTH + x
+            cells[i] = 2 if (goals >> i) & 1 else (passable >> i) & 1
+            self._update_tile(i)
+
+    def _update_tile(self, i: int):
+        cell = self.cells[i]
+        if cell == 2:
+            rhs = 0
+        elif not cell:
+            rhs = INF
+        else:
+            g = self.g
+            rhs = min([g[j] for j in NEIGHBOURS[i]]) + 1
+            if rhs > INF:
+                rhs = INF
+        self.rhs[i] = rhs
+        g = self.g[i]
+        if g != rhs:
+            key = g if g < rhs else rhs
+            self.buckets[key].append(i)
+            if key < self.low:
+                self.low = key
+
+    def settle(self, start: tuple) -> int:
+        """Steps from `start` to the nearest goal (INF if none), repairing until they are exact.
+
+        `start` itself may be blocked (the mover stands on it). On return,
+        every tile nearer to the goals than `start` holds its exact distance
+        in self.g.
+        """
+        s = start[1] * MAP_WIDTH + start[0]
+        g, rhs, buckets = self.g, self.rhs, self.buckets
+        cells = self.cells
+        if cells[s] == 2:
+            return 0
+        around = NEIGHBOURS[s]
+        top = len(buckets)
+        low = self.low
+        expanded = 0
+        while True:
+            while low < top and not buckets[low]:
+                low += 1
+            if low == top:
+                break
+            bucket = buckets[low]
+            i = bucket[-1]
+            gi, ri = g[i], rhs[i]
+            if gi == ri or low != (gi if gi < ri else ri):
+                bucket.pop()
+                continue
+            if low > min([g[j] for j in around]):
+                break
+            bucket.pop()
+            expanded += 1
+            if gi > ri:
+                # Settled lower: it can only lower its neighbours' rhs
+                g[i] = ri
+                d = ri + 1
+                for j in NEIGHBOURS[i]:
+                    if d < rhs[j] and cells[j]:
+                        rhs[j] = d
+                        gj = g[j]
+                        if gj != d:
+                            key = d if d < gj else gj
+                            buckets[key].append(j)
+                            if key < low:
+                                low = key
+            else:
+                # Raised: re-derive itself and the neighbours it was supporting
+                g[i] = INF
+                for j in (i, *NEIGHBOURS[i]):
+                    if j != i and rhs[j] != gi + 1:
+                        continue
+                    cell = cells[j]
+                    if cell == 2:
+                        r = 0
+                    elif not cell:
+                        r = INF
+                    else:
+                        r = min([g[k] for k in NEIGHBOURS[j]]) + 1
+                        if r > INF:
+                            r = INF
+                    rhs[j] = r
+                    gj = g[j]
+                    if gj != r:
+                        key = gj if gj < r else r
+                        buckets[key].append(j)
+                        if key < low:
+                            low = key
+        self.low = low
+        self.expanded += expanded
+        steps = min([g[j] for j in around]) + 1
+        return steps if steps < INF else INF
+
+
+class IncrementalFields:
+    """IncrementalFields keyed by goal set, kept across turns while the room layout stays the same."""
+
+    def __init__(self, max_fields: int = 64):
+        self.max_fields = max_fields
+        self.searches: OrderedDict = OrderedDict()
+        self._walkable = None
+        self.hits = 0
+        self.misses = 0
+
+    def begin(self, tilemap):
+        walkable = bytes(tilemap.walkable)
+        if walkable != self._walkable:
+            self.searches = OrderedDict()
+            self._walkable = walkable
+
+    def get(self, goals) -> IncrementalField:
+        key = frozenset(goals)
+        search = self.searches.get(key)
+        if search is None:
+            self.misses += 1
+            if len(self.searches) >= self.max_fields:
+                # Drop the least recently used
+                self.searches.popitem(last=False)
+            search = self.searches[key] = IncrementalField()
+        else:
+            self.hits += 1
+            self.searches.move_to_end(key)
+        return search
@@ -0,0 +1,153 @@
+import json
+from collections import deque
+from typing import Callable, Iterable, List, Optional
+
+import pyxel
+from constants import TILE_SIZE
+
+# Scripted actions are small JSON-friendly lists so they can be written to and
+# read back from replay files unchanged:
+#   ["click", x, y]   left click on tile (x, y)
+#   ["right_click"]   right click (ends the turn)
+#   ["key", "W"]      press a key by name (see KEY_NAMES)
+#   ["wait"]          do nothing this poll
+KEY_NAMES = {
+    "W": pyxel.KEY_W,
+    "A": pyxel.KEY_A,
+    "S": pyxel.KEY_S,
+    "D": pyxel.KEY_D,
+    "SPACE": pyxel.KEY_SPACE,
+    "Q": pyxel.KEY_Q,
+    "H": pyxel.KEY_H,
+}
+WAIT = ["wait"]
+
+
+class PyxelInput:
+    """Reads the live pyxel keyboard and mouse; requires an open window."""
+
+    def poll(self, combat=None):
+        pass
+
+    def btnp(self, key) -> bool:
+        return pyxel.btnp(key)
+
+    @property
+    def mouse_x(self) -> int:
+        return pyxel.mouse_x
+
+    @property
+    def mouse_y(self) -> int:
+        return pyxel.mouse_y
+
+
+class ScriptedInput:
+    """Feeds one queued action per poll; idle (mouse off-map) once drained."""
+
+    def __init__(self, actions: Optional[Iterable[list]] = None):
+        self.actions = deque(list(a) for a in (actions or []))
+        self._pressed = set()
+        self._mouse = (-1, -1)
+
+    def feed(self, *actions: list):
+        for action in actions:
+            self.actions.append(list(action))
+
+    def poll(self, combat=None):
+        self._apply(self.actions.popleft() if self.actions else WAIT)
+
+    def _apply(self, action: list):
+        self._pressed = set()
+        self._mouse = (-1, -1)
+        kind = action[0] if action else "wait"
+        if kind == "click":
+            x, y = action[1], action[2]
+            self._pressed.add(pyxel.MOUSE_BUTTON_LEFT)
+            self._mouse = (x * TILE_SIZE + TILE_SIZE // 2, y * TILE_SIZE + TILE_SIZE // 2)
+        elif kind == "right_click":
+            self._pressed.add(pyxel.MOUSE_BUTTON_RIGHT)
+        elif kind == "key":
+            key = KEY_NAMES.get(str(action[1]).upper())
+            if key is None:
+                raise ValueError(f"Unknown key in scripted action: {action!r}")
+            self._pressed.add(key)
+        elif kind != "wait":
+            raise ValueError(f"Unknown scripted action: {action!r}")
+
+    def btnp(self, key) -> bool:
+        return key in self._pressed
+
+    @property
+    def mouse_x(self) -> int:
+        return self._mouse[0]
+
+    @property
+    def mouse_y(self) -> int:
+        return self._mouse[1]
+
+
+class PolicyInput(ScriptedInput):
+    """Asks `policy(combat)` for a list of actions whenever the queue runs dry."""
+
+    def __init__(self, policy: Callable[[object], Iterable[list]]):
+        super().__init__()
+        self.policy = policy
+
+    def poll(self, combat=None):
+        if not self.actions and combat is not None:
+            self.feed(*(self.policy(combat) or [WAIT]))
+        super().poll(combat)
+
+
+class RecordingInput:
+    """Wraps another provider and records every non-idle poll as an action."""
+
+    def __init__(self, inner):
+        self.inner = inner
+        self.recorded: List[list] = []
+
+    def poll(self, combat=None):
+        self.inner.poll(combat)
+        action = self._current_action()
+        if action != WAIT:
+            self.recorded.append(action)
+
+    def _current_action(self) -> list:
+        if self.inner.btnp(pyxel.MOUSE_BUTTON_LEFT):
+            return ["click", self.inner.mouse_x // TILE_SIZE, self.inner.mouse_y // TILE_SIZE]
+        if self.inner.btnp(pyxel.MOUSE_BUTTON_RIGHT):
+            return ["right_click"]
+        for name, key in KEY_NAMES.items():
+            if self.inner.btnp(key):
+                return ["key", name]
+        return WAIT
+
+    def btnp(self, key) -> bool:
+        return self.inner.btnp(key)
+
+    @property
+    def mouse_x(self) -> int:
+        return self.inner.mouse_x
+
+    @property
+    def mouse_y(self) -> int:
+        return self.inner.mouse_y
+
+    def save(self, path: str):
+        save_replay(path, self.recorded)
+
+
+def save_replay(path: str, actions: Iterable[list]):
+    with open(path, "w", encoding="utf-8") as fh:
+        for action in actions:
+            fh.write(json.dumps(list(action)) + "\n")
+
+
+def load_replay(path: str) -> ScriptedInput:
+    actions = []
+    with open(path, "r", encoding="utf-8") as fh:
+        for line in fh:
+            line = line.strip()
+            if line:
+                actions.append(json.loads(line))
+    return ScriptedInput(actions)
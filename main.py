@@ -18,6 +18,7 @@ from map import Tilemap
 from entity import Player, DumbSlime, Spider, Spinner, Phantom
 from combat import CombatManager
 from constants import TILE_SIZE
+from input_provider import PyxelInput
 
 LEADERBOARD_URL = os.getenv("DUNGEON_BREACH_LEADERBOARD", "").strip()
 DEFAULT_PLAYER_NAME = os.getenv("DUNGEON_BREACH_PLAYER", "Player")[:12] or "Player"
@@ -26,6 +27,7 @@ class App:
     def __init__(self):
         pyxel.init(160, 160, title="DUNGEON BREACH")
         pyxel.mouse(True)
+        self.input_provider = PyxelInput()
         self.asset_manager = None
         self.tilemap = None
         self.player = None
@@ -48,22 +50,23 @@ class App:
         pyxel.run(self.update, self.draw)
 
     def update(self):
-        if pyxel.btnp(pyxel.KEY_Q):
+        btnp = self.input_provider.btnp
+        if btnp(pyxel.KEY_Q):
             pyxel.quit()
         if self.in_title:
             self.title_frame_counter += 1
             if self.title_frame_counter >= 10:
                 self.title_input_armed = True
-            if self.title_input_armed and (pyxel.btnp(pyxel.MOUSE_BUTTON_LEFT) or pyxel.btnp(pyxel.KEY_SPACE)):
+            if self.title_input_armed and (btnp(pyxel.MOUSE_BUTTON_LEFT) or btnp(pyxel.KEY_SPACE)):
                 self.in_title = False
                 self.reset_world()
             return
         if self.combat_manager and self.combat_manager.player_dead:
-            if pyxel.btnp(pyxel.MOUSE_BUTTON_LEFT) or pyxel.btnp(pyxel.KEY_SPACE):
+            if btnp(pyxel.MOUSE_BUTTON_LEFT) or btnp(pyxel.KEY_SPACE):
                 self.reset_world()
             return
         if self.combat_manager and self.combat_manager.victory:
-            if pyxel.btnp(pyxel.MOUSE_BUTTON_LEFT) or pyxel.btnp(pyxel.KEY_SPACE):
+            if btnp(pyxel.MOUSE_BUTTON_LEFT) or btnp(pyxel.KEY_SPACE):
                 self.reset_world()
             return
         if self.combat_manager is None:
@@ -93,6 +96,7 @@ class App:
         self.combat_manager.draw_telegraphs()
         self.player.draw()
         self.combat_manager.draw_pending_move_preview(self.player.anim_frame, self.player.anim_name, self.player.asset_manager)
+        self.combat_manager.draw_hint()
         for enemy in self.enemies:
             enemy.draw()
         self.combat_manager.draw_attack_renders()
@@ -117,7 +121,7 @@ class App:
         self.player = Player(start_x, 1, self.tilemap, self.asset_manager)
         setattr(self.player, 'coins', 0)
         self.enemies = []
-        self.combat_manager = CombatManager(self.player, self.enemies, self.tilemap)
+        self.combat_manager = CombatManager(self.player, self.enemies, self.tilemap, input_provider=self.input_provider)
         self.tilemap = self.combat_manager.tilemap
         self._score_submitted = False
 
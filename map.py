@@ -1,6 +1,7 @@
 import pyxel
 from map_layout import get_layout
 from constants import TILE_SIZE, MAP_WIDTH, MAP_HEIGHT
+from bitboard import from_grid
 
 # Tile types (now strings)
 FLOOR = "floor_center"
@@ -35,6 +36,61 @@ class Tilemap:
             self.tile_states[(x, 0)] = {'state': 'closed', 'orientation': 'horizontal'}
         for x in self.bottom_door_xs:
             self.tile_states[(x, MAP_HEIGHT - 1)] = {'state': 'closed', 'orientation': 'horizontal'}
+        self._walkable = None
+        self._walkable_bits = None
+        self._spawnable = None
+
+    # --- Walkability grid -------------------------------------------------
+    # Collision checks read a flat bytearray (index y * MAP_WIDTH + x) built
+    # from tiles + tile_states. Change tiles and doors through set_tile /
+    # set_door_state, or call invalidate() after editing them directly.
+
+    def invalidate(self):
+        self._walkable = None
+        self._walkable_bits = None
+        self._spawnable = None
+
+    @property
+    def walkable(self) -> bytearray:
+        grid = self._walkable
+        if grid is None:
+            grid = bytearray(MAP_WIDTH * MAP_HEIGHT)
+            for y in range(MAP_HEIGHT):
+                row = self.tiles[y]
+                for x in range(MAP_WIDTH):
+                    grid[y * MAP_WIDTH + x] = is_walkable_tile(row[x], self.tile_states.get((x, y)))
+            self._walkable = grid
+        return grid
+
+    @property
+    def walkable_bits(self) -> int:
+        """The walkability grid as a bitboard (see bitboard)."""
+        if self._walkable_bits is None:
+            self._walkable_bits = from_grid(self.walkable)
+        return self._walkable_bits
+
+    def is_walkable(self, x: int, y: int) -> bool:
+        if not (0 <= x < MAP_WIDTH and 0 <= y < MAP_HEIGHT):
+            return False
+        return bool(self.walkable[y * MAP_WIDTH + x])
+
+    def spawnable_tiles(self) -> list:
+        """Walkable tiles that are not doorways, in row order."""
+        if self._spawnable is None:
+            grid = self.walkable
+            self._spawnable = [
+                (x, y) for y in range(MAP_HEIGHT) for x in range(MAP_WIDTH)
+                if grid[y * MAP_WIDTH + x] and (x, y) not in self.tile_states
+            ]
+        return self._spawnable
+
+    def set_tile(self, x: int, y: int, tile_name: str):
+        self.tiles[y][x] = tile_name
+        self.invalidate()
+
+    def set_door_state(self, x: int, y: int, state: str):
+        self.tile_states[(x, y)]['state'] = state
+        self.invalidate()
 
     def is_open_door(self, x: int, y: int) -> bool:
         info = self.tile_states.get((x, y))
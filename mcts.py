@@ -0,0 +1,254 @@
+"""Anytime Monte Carlo Tree Search player.
+
+The forward model is the CombatManager itself: a simulated turn restores a
+snapshot (see snapshot.CombatSnapshot), feeds the turn's clicks to a scripted
+input and runs the game's own frames through telegraph, attack and
+projectile resolution. Rooms are deterministic once generated, so every tree
+node stores the snapshot it was reached in and selection jumps straight to it.
+Walking through a door ends a simulation; the next room is never generated.
+
+Candidate moves come from solver.TurnSolver without look-ahead (the best
+`max_actions` tiles plus every reachable door), rollouts dodge the telegraphs
+on screen and pick up treasure. The search runs until its node or time budget
+is spent, and the subtree under the move actually played is kept for the next
+turn when the game reaches the predicted state.
+
+    player = MCTSPlayer(budget=0.25)
+    actions = player(cm)            # scripted actions, as for bots policies
+    player.stats['rollouts_per_sec']
+"""
+import math
+import random
+import time
+from typing import Optional, Tuple
+
+from bots import END_TURN, danger_tiles, door_entries, move_to
+from constants import MAP_HEIGHT
+from input_provider import ScriptedInput
+from solver import TurnSolver
+
+DEFAULT_REWARDS = {
+    'coin': 1.0,
+    'damage': -3.0,      # per hp lost
+    'death': -20.0,
+    'kill': 0.5,
+    'exit': 1.0,         # walking out of the room (or winning)
+}
+
+
+class _Node:
+    __slots__ = ('key', 'snap', 'actions', 'children', 'visits', 'value', 'reward', 'terminal')
+
+    def __init__(self, key, snap, reward: float = 0.0, terminal: bool = False):
+        self.key = key
+        self.snap = snap
+        self.actions = None     # untried actions, best first
+        self.children: dict = {}
+        self.visits = 0
+        self.value = 0.0        # sum of returns, including this node's reward
+        self.reward = reward
+        self.terminal = terminal
+
+
+def state_key(cm) -> tuple:
+    return (cm.room_index, cm.turn_count, getattr(cm.player, 'moves_left', 0), cm.zobrist.value)
+
+
+def actions_for(cm, action: Tuple[int, int]) -> list:
+    """Scripted clicks for ending the turn on (or walking out through) `action`."""
+    if action == (cm.player.x, cm.player.y):
+        return END_TURN
+    if action[1] in (0, MAP_HEIGHT - 1):
+        return [["click", action[0], action[1]]]
+    return move_to(action)
+
+
+class MCTSPlayer:
+    def __init__(self, budget: Optional[float] = None, iterations: Optional[int] = 64,
+                 rollout_depth: int = 4, max_actions: int = 8, exploration: float = 1.4,
+                 rng: Optional[random.Random] = None, rewards: Optional[dict] = None):
+        # Search stops at whichever budget runs out first; at least one must be set
+        if budget is None and iterations is None:
+            raise ValueError("MCTSPlayer needs a time budget or an iteration budget")
+        self.budget = budget
+        self.iterations = iterations
+        self.rollout_depth = rollout_depth
+        self.max_actions = max_actions
+        self.exploration = exploration
+        self.rng = rng or random.Random()
+        self.rewards = dict(DEFAULT_REWARDS, **(rewards or {}))
+        self.solver = TurnSolver(threat=False)
+        self.stats = {'searches': 0, 'rollouts': 0, 'turns': 0, 'seconds': 0.0, 'reused': 0,
+                      'rollouts_per_sec': 0.0, 'turns_per_sec': 0.0}
+        self._root: Optional[_Node] = None
+        self._played = None
+        self._input = ScriptedInput()
+        self._lo = math.inf
+        self._hi = -math.inf
+
+    def __call__(self, cm) -> list:
+        return actions_for(cm, self.choose(cm))
+
+    def choose(self, cm) -> Tuple[int, int]:
+        """Search from the current decision point and return the tile to play."""
+        root = self._reuse(cm)
+        cm_input, particles = cm.input_provider, cm.vfx_manager.particles
+        cosmetic = cm.rng.cosmetic.getstate()
+        cm.input_provider = self._input
+        start = time.perf_counter()
+        deadline = None if self.budget is None else start + self.budget
+        rollouts = turns = 0
+        try:
+            while True:
+                if self.iterations is not None and rollouts >= self.iterations:
+                    break
+                if deadline is not None and time.perf_counter() >= deadline:
+                    break
+                turns += self._iterate(cm, root)
+                rollouts += 1
+        finally:
+            cm.restore(root.snap)
+            self._input.actions.clear()
+            cm.input_provider = cm_input
+            cm.vfx_manager.particles = particles
+            cm.rng.cosmetic.setstate(cosmetic)
+        self._record(rollouts, turns, time.perf_counter() - start)
+
+        best = max(root.children.items(), key=lambda kv: (kv[1].visits, kv[1].value / max(1, kv[1].visits)),
+                   default=None)
+        action = best[0] if best else (cm.player.x, cm.player.y)
+        self._root, self._played = root, action
+        return action
+
+    def _reuse(self, cm) -> _Node:
+        key = state_key(cm)
+        root = None
+        if self._root is not None:
+            child = self._root.children.get(self._played)
+            if child is not None and child.key == key and not child.terminal:
+                root = child
+                self.stats['reused'] += 1
+        if root is None:
+            root = _Node(key, None)
+            self._lo, self._hi = math.inf, -math.inf
+        # Always restart from the live objects rather than the simulated ones
+        root.snap = cm.snapshot()
+        return root
+
+    def _record(self, rollouts: int, turns: int, seconds: float):
+        s = self.stats
+        s['searches'] += 1
+        s['rollouts'] += rollouts
+        s['turns'] += turns
+        s['seconds'] += seconds
+        if s['seconds'] > 0:
+            s['rollouts_per_sec'] = s['rollouts'] / s['seconds']
+            s['turns_per_sec'] = s['turns'] / s['seconds']
+
+    def _iterate(self, cm, root: _Node) -> int:
+        """One selection/expansion/rollout/backup pass; returns simulated turns."""
+        node, path, turns = root, [root], 0
+        while not node.terminal and node.actions is not None and not node.actions and node.children:
+            node = self._select(node)
+            path.append(node)
+        if not node.terminal:
+            cm.restore(node.snap)
+            if node.actions is None:
+                node.actions = self._candidates(cm)
+            if node.actions:
+                action = node.actions.pop(0)
+                reward, terminal = self._play(cm, action)
+                turns += 1
+                child = _Node(state_key(cm), None if terminal else cm.snapshot(), reward, terminal)
+                node.children[action] = child
+                node, path = child, path + [child]
+
+        ret = 0.0
+        if not node.terminal:
+            ret, depth = self._rollout(cm)
+            turns += depth
+        for n in reversed(path):
+            ret += n.reward
+            n.visits += 1
+            n.value += ret
+            self._lo = min(self._lo, n.value / n.visits)
+            self._hi = max(self._hi, n.value / n.visits)
+        return turns
+
+    def _select(self, node: _Node) -> _Node:
+        span = self._hi - self._lo if self._hi > self._lo else 1.0
+        log_n = math.log(max(1, node.visits))
+
+        def ucb(child):
+            q = (child.value / child.visits - self._lo) / span
+            return q + self.exploration * math.sqrt(log_n / child.visits)
+
+        return max(node.children.values(), key=ucb)
+
+    def _candidates(self, cm) -> list:
+        here = (cm.player.x, cm.player.y)
+        reach = cm.player_reachable_tiles
+        self.solver.update(cm)
+        scores = self.solver.scores
+        ranked = sorted(scores, key=lambda t: (-scores[t]['score'], self.rng.random()))
+        actions = ranked[:self.max_actions]
+        if here in reach and here not in actions:
+            actions.append(here)
+        for door, entry in door_entries(cm):
+            if entry in reach:
+                actions.insert(0, door)
+        return actions
+
+    def _play(self, cm, action) -> Tuple[float, bool]:
+        """Advance one player turn in place; returns (reward, terminal)."""
+        player = cm.player
+        hp, coins, kills = player.hp, getattr(player, 'coins', 0), cm.monsters_killed
+        actions = actions_for(cm, action)
+        self._input.actions.clear()
+        self._input.feed(*actions)
+        # One frame per click, then the idle poll that opens the next turn
+        polls = len(actions) + 1
+        while polls and not (cm.player_dead or cm.victory or cm.room_transition):
+            if cm._frame_polls_input():
+                polls -= 1
+            cm._update_frame()
+        w = self.rewards
+        reward = (w['coin'] * (getattr(player, 'coins', 0) - coins)
+                  + w['damage'] * max(0, hp - player.hp)
+                  + w['kill'] * (cm.monsters_killed - kills))
+        if cm.player_dead:
+            return reward + w['death'], True
+        if cm.victory or cm.room_transition:
+            return reward + w['exit'], True
+        return reward, False
+
+    def _rollout(self, cm) -> Tuple[float, int]:
+        total, depth = 0.0, 0
+        while depth < self.rollout_depth:
+            reward, terminal = self._play(cm, self._rollout_action(cm))
+            total += reward
+            depth += 1
+            if terminal:
+                break
+        return total, depth
+
+    def _rollout_action(self, cm) -> Tuple[int, int]:
+        here = (cm.player.x, cm.player.y)
+        reach = cm.player_reachable_tiles
+        danger = danger_tiles(cm)
+        safe = [t for t in reach if t not in danger] or list(reach) or [here]
+        loot = [(t.x, t.y) for t in cm.treasure_objects if (t.x, t.y) in reach and (t.x, t.y) not in danger]
+        if loot:
+            return self.rng.choice(loot)
+        if not cm.enemies and not cm.treasure_objects:
+            for door, entry in door_entries(cm):
+                if entry in reach:
+                    return door
+        return self.rng.choice(sorted(safe))
+
+
+class MCTSPolicy(MCTSPlayer):
+    """bots-style policy: fixed node budget so batches stay reproducible."""
+
+    def __init__(self, rng: Optional[random.Random] = None, iterations: int = 64):
+        super().__init__(budget=None, iterations=iterations, rng=rng)
@@ -0,0 +1,108 @@
+"""Play many complete headless dungeon runs and aggregate the results.
+
+Each run is an independent HeadlessGame in turbo mode with its own seed
+(rng.derive_seed), so batches are reproducible regardless of worker count.
+See tools/simulate.py for the command line entry point.
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from statistics import mean, median
+from typing import Iterable, List, Optional
+
+import bots
+from headless import HeadlessGame
+from input_provider import PolicyInput
+from rng import RunRng, derive_seed
+
+
+def play_run(seed: int, policy: str = 'greedy', max_turns: int = 400, spawn_tables: dict | None = None,
+             path_cache: str = 'fields') -> dict:
+    """Play one dungeon to victory, death or `max_turns` player turns."""
+    agent = bots.make_policy(policy, RunRng(seed).stream("policy"))
+    game = HeadlessGame(PolicyInput(agent), seed=seed, spawn_tables=spawn_tables, path_cache=path_cache)
+    cm = game.combat_manager
+    # Each turbo step polls input once; a turn needs at most a handful of polls
+    max_steps = max_turns * 8
+    room_coins = []
+    while not game.finished and cm.turn_count < max_turns and game.frames < max_steps:
+        room = cm.room_index
+        game.step()
+        if cm.room_index != room:
+            room_coins.append(getattr(cm.player, 'coins', 0))
+    result = game.summary()
+    result['timed_out'] = not game.finished
+    # Coins collected in each room the run reached (the last one may be unfinished)
+    room_coins.append(result['coins'])
+    result['coins_per_room'] = [b - a for a, b in zip([0] + room_coins, room_coins)]
+    return result
+
+
+def _play_task(task) -> dict:
+    return play_run(*task)
+
+
+def run_batch(runs: int, policy: str = 'greedy', base_seed: int = 0, workers: Optional[int] = None,
+              max_turns: int = 400, path_cache: str = 'fields') -> List[dict]:
+    tasks = [(derive_seed(base_seed, i), policy, max_turns, None, path_cache) for i in range(runs)]
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1:
+        return [_play_task(t) for t in tasks]
+    chunksize = max(1, runs // (workers * 8))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_play_task, tasks, chunksize=chunksize))
+
+
+def summarize(results: Iterable[dict]) -> dict:
+    results = list(results)
+    if not results:
+        return {'runs': 0}
+    max_rooms = max(r['max_rooms'] for r in results)
+    survival = []
+    for room in range(1, max_rooms + 1):
+        reached = [r for r in results if r['room'] >= room]
+        # A room counts as survived once the player walks out of it alive
+        cleared = [r for r in reached if r['room'] > room or r['victory']]
+        survival.append({
+            'room': room,
+            'reached': len(reached),
+            'survived': len(cleared),
+            'rate': len(cleared) / len(reached) if reached else 0.0,
+        })
+
+    def _stats(key):
+        values = [r[key] for r in results]
+        return {'mean': mean(values), 'median': median(values), 'max': max(values)}
+
+    return {
+        'runs': len(results),
+        'victories': sum(1 for r in results if r['victory']),
+        'deaths': sum(1 for r in results if r['dead']),
+        'timeouts': sum(1 for r in results if r.get('timed_out')),
+        'survival_per_room': survival,
+        'coins': _stats('coins'),
+        'turns': _stats('turns'),
+        'monsters_killed': _stats('monsters_killed'),
+    }
+
+
+def format_summary(summary: dict, elapsed: float | None = None) -> str:
+    lines = [
+        f"runs: {summary['runs']}  victories: {summary['victories']}  "
+        f"deaths: {summary['deaths']}  timeouts: {summary['timeouts']}",
+    ]
+    if elapsed:
+        lines.append(f"elapsed: {elapsed:.2f}s  ({summary['runs'] / elapsed:.1f} runs/s)")
+    lines.append("room  reached  survived  rate")
+    for row in summary['survival_per_room']:
+        lines.append(f"{row['room']:>4}  {row['reached']:>7}  {row['survived']:>8}  {row['rate']:.3f}")
+    for key in ('coins', 'turns', 'monsters_killed'):
+        s = summary[key]
+        lines.append(f"{key}: mean {s['mean']:.2f}  median {s['median']}  max {s['max']}")
+    return "\n".join(lines)
+
+
+def timed_batch(*args, **kwargs):
+    start = time.perf_counter()
+    results = run_batch(*args, **kwargs)
+    return results, time.perf_counter() - start
@@ -0,0 +1,223 @@
+"""Tile -> entity index for constant-time "is anything standing here" queries.
+
+An Occupancy holds a set of entities and, for every tile, the entities whose
+footprint covers it (per their own `occupies`, so rubble and treasure take no
+tiles). It can stand in wherever an `all_entities` list is expected: it
+iterates over its entities in insertion order, and can_occupy, the
+bitboards behind Player.reach_layers (`blocked_board`) and the AI
+pathfinding query it in O(1) instead of scanning every entity.
+
+A tracking index registers itself on its entities (ent.occupancy) and
+Entity.__setattr__ reports moves and rubble to it, the same way the Zobrist
+hash is kept up to date; CombatManager adds and removes room contents as they
+spawn, die or decay. An untracked index (the enemy-plan simulation) has to be
+told about moves with refresh().
+
+For entities bigger than one tile, clearance() also keeps a clearance map
+(see clearance) of the walkable, unoccupied tiles. It is built the first
+time it is asked for and updated around each footprint that changes after
+that, so multi-tile moves and searches check a footprint with one lookup.
+"""
+from constants import MAP_WIDTH, MAP_HEIGHT
+import clearance
+
+# Entity attributes that change which tiles an entity covers
+OCCUPANCY_ATTRS = frozenset({'x', 'y', 'is_rubble'})
+
+
+def footprint(ent) -> tuple:
+    """Flat indices (y * MAP_WIDTH + x) of the in-bounds tiles `ent` blocks."""
+    x0, y0 = ent.x, ent.y
+    return tuple(
+        ty * MAP_WIDTH + tx
+        for ty in range(max(0, y0), min(MAP_HEIGHT, y0 + ent.height))
+        for tx in range(max(0, x0), min(MAP_WIDTH, x0 + ent.width))
+        if ent.occupies(tx, ty)
+    )
+
+
+class Occupancy:
+    def __init__(self, entities=(), track: bool = False):
+        self.track = track
+        self.cells: list[list] = [[] for _ in range(MAP_WIDTH * MAP_HEIGHT)]
+        # Bitboard of the non-empty cells (see bitboard)
+        self.bits = 0
+        # id(entity) -> (entity, footprint)
+        self._placed: dict[int, tuple] = {}
+        # Clearance map and the walkability grid it was built over (see clearance())
+        self._walkable = None
+        self._free = None
+        self._clear = None
+        # Bumped on every cell change; keys the cached map that ignores one entity
+        self._version = 0
+        self._ignoring = None
+        for ent in entities:
+            self.add(ent)
+
+    def __iter__(self):
+        return (ent for ent, _ in self._placed.values())
+
+    def __len__(self) -> int:
+        return len(self._placed)
+
+    def __contains__(self, ent) -> bool:
+        return id(ent) in self._placed
+
+    def clear(self):
+        for ent, tiles in self._placed.values():
+            if self.track and ent.__dict__.get('occupancy') is self:
+                del ent.occupancy
+            for i in tiles:
+                self.cells[i].clear()
+        self._placed = {}
+        self.bits = 0
+        self._walkable = self._free = self._clear = self._ignoring = None
+        self._version += 1
+
+    def rebuild(self, cm):
+        """Index the player and current room contents from scratch."""
+        self.clear()
+        for ent in [cm.player] + cm.enemies + cm.decor_objects:
+            self.add(ent)
+
+    def add(self, ent):
+        if id(ent) in self._placed:
+            return
+        tiles = footprint(ent)
+        self._placed[id(ent)] = (ent, tiles)
+        for i in tiles:
+            self.cells[i].append(ent)
+            self.bits |= 1 << i
+        self._changed(tiles)
+        if self.track:
+            ent.occupancy = self
+
+    def remove(self, ent):
+        placed = self._placed.pop(id(ent), None)
+        if placed is None:
+            return
+        for i in placed[1]:
+            self._vacate(i, ent)
+        self._changed(placed[1])
+        if self.track and ent.__dict__.get('occupancy') is self:
+            del ent.occupancy
+
+    def refresh(self, ent):
+        """Re-index one entity after it moved or changed shape."""
+        placed = self._placed.get(id(ent))
+        if placed is None:
+            return
+        tiles = footprint(ent)
+        if tiles == placed[1]:
+            return
+        for i in placed[1]:
+            self._vacate(i, ent)
+        for i in tiles:
+            self.cells[i].append(ent)
+            self.bits |= 1 << i
+        self._placed[id(ent)] = (ent, tiles)
+        self._changed(placed[1] + tiles)
+
+    def _vacate(self, i: int, ent):
+        cell = self.cells[i]
+        cell.remove(ent)
+        if not cell:
+            self.bits &= ~(1 << i)
+
+    def _changed(self, tiles: tuple):
+        self._version += 1
+        if self._clear is None or not tiles:
+            return
+        free, cells, walkable = self._free, self.cells, self._walkable
+        for i in tiles:
+            free[i] = walkable[i] and not cells[i]
+        xs = [i % MAP_WIDTH for i in tiles]
+        ys = [i // MAP_WIDTH for i in tiles]
+        clearance.update(self._clear, free, min(xs), min(ys), max(xs), max(ys))
+
+    def clearance(self, walkable, ignore=None) -> bytearray:
+        """Clearance map of the tiles that are walkable and not blocked by entities other than `ignore`."""
+        if self._walkable is not walkable:
+            free = bytearray(walkable)
+            for i, cell in enumerate(self.cells):
+                if cell:
+                    free[i] = 0
+            self._walkable = walkable
+            self._free = free
+            self._clear = clearance.clearance_map(free)
+            self._ignoring = None
+        placed = self._placed.get(id(ignore))
+        if placed is None:
+            return self._clear
+        key = (id(ignore), self._version)
+        if self._ignoring is None or self._ignoring[0] != key:
+            # The shared map with `ignore` lifted off its own tiles
+            free, clear = bytearray(self._free), bytearray(self._clear)
+            tiles = placed[1]
+            for i in tiles:
+                free[i] = walkable[i] and len(self.cells[i]) == 1
+            xs = [i % MAP_WIDTH for i in tiles]
+            ys = [i // MAP_WIDTH for i in tiles]
+            if tiles:
+                clearance.update(clear, free, min(xs), min(ys), max(xs), max(ys))
+            self._ignoring = (key, clear)
+        return self._ignoring[1]
+
+    def at(self, x: int, y: int) -> list:
+        """Entities blocking tile (x, y)."""
+        if not (0 <= x < MAP_WIDTH and 0 <= y < MAP_HEIGHT):
+            return []
+        return self.cells[y * MAP_WIDTH + x]
+
+    def board(self, ignore=None) -> int:
+        """Bitboard of the tiles blocked by entities other than `ignore`."""
+        bits = self.bits
+        placed = self._placed.get(id(ignore))
+        if placed is not None:
+            for i in placed[1]:
+                if len(self.cells[i]) == 1:
+                    bits &= ~(1 << i)
+        return bits
+
+    def blocked(self, x: int, y: int, ignore=None) -> bool:
+        """True if an entity other than `ignore` blocks tile (x, y)."""
+        if not (0 <= x < MAP_WIDTH and 0 <= y < MAP_HEIGHT):
+            return False
+        for ent in self.cells[y * MAP_WIDTH + x]:
+            if ent is not ignore:
+                return True
+        return False
+
+
+def blocked_board(entities, ignore=None) -> int:
+    """Occupancy.board for an index, or built by scanning a plain entity list."""
+    if isinstance(entities, Occupancy):
+        return entities.board(ignore)
+    bits = 0
+    for ent in entities:
+        if ent is not ignore:
+            for i in footprint(ent):
+                bits |= 1 << i
+    return bits
+
+
+def clearance_for(entities, walkable, ignore=None) -> bytearray:
+    """Occupancy.clearance for an index, or built from scratch for a plain entity list."""
+    if isinstance(entities, Occupancy):
+        return entities.clearance(walkable, ignore)
+    free = bytearray(walkable)
+    for ent in entities:
+        if ent is not ignore:
+            for i in footprint(ent):
+                free[i] = 0
+    return clearance.clearance_map(free)
+
+
+def tile_blocked(entities, x: int, y: int, ignore=None) -> bool:
+    """Occupancy.blocked for an index, or a linear scan for a plain entity list."""
+    if isinstance(entities, Occupancy):
+        return entities.blocked(x, y, ignore)
+    for ent in entities:
+        if ent is not ignore and ent.occupies(x, y):
+            return True
+    return False
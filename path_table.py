@@ -0,0 +1,102 @@
+"""All-pairs shortest paths over a room's walkability grid.
+
+Rooms are small and their layout only changes when a door does, so the
+breadth-first tree from every start tile can be kept and reused: a
+PathTable answers "path from A to B ignoring entities" by walking parent
+links, in O(path length). Trees are built the first time a start tile is
+queried and shared by every Tilemap with the same walkability:
+
+    table = table_for(tilemap, width=1, height=1, dirs=DIRS)
+    path = table.path((x0, y0), (x1, y1))   # [(x0, y0), ..., (x1, y1)] or None
+
+Each tree expands neighbours in `dirs` order, exactly like the per-call BFS
+it replaces, so it returns the same path: the lexicographically smallest
+(by direction order) among the shortest ones. That also makes it a safe
+first guess for searches that avoid entities. If no entity stands on the
+table path, the entity-aware BFS would return that same path (see
+ai._pathfinding_avoid_entities).
+"""
+from constants import MAP_WIDTH, MAP_HEIGHT
+from clearance import clearance_map, fits
+
+# Cached tables, keyed by (walkability bytes, footprint, dirs)
+MAX_TABLES = 64
+_tables: dict = {}
+
+
+def passable_positions(walkable, width: int = 1, height: int = 1) -> bytearray:
+    """1 where a width x height footprint anchored at the tile is in bounds and walkable."""
+    if width == 1 and height == 1:
+        return bytearray(walkable)
+    clear = clearance_map(walkable)
+    out = bytearray(MAP_WIDTH * MAP_HEIGHT)
+    for y in range(MAP_HEIGHT - height + 1):
+        for x in range(MAP_WIDTH - width + 1):
+            out[y * MAP_WIDTH + x] = fits(clear, x, y, width, height)
+    return out
+
+
+class PathTable:
+    def __init__(self, walkable, width: int = 1, height: int = 1, dirs=((1, 0), (-1, 0), (0, 1), (0, -1))):
+        self.passable = passable_positions(walkable, width, height)
+        self.neighbours = [
+            [(y + dy) * MAP_WIDTH + x + dx for dx, dy in dirs
+             if 0 <= x + dx < MAP_WIDTH and 0 <= y + dy < MAP_HEIGHT]
+            for y in range(MAP_HEIGHT) for x in range(MAP_WIDTH)
+        ]
+        # Per start tile: parent of every tile (-1 for the start, -2 if unreachable)
+        self.trees: dict[int, list] = {}
+
+    def tree(self, start: int) -> list:
+        parents = self.trees.get(start)
+        if parents is None:
+            parents = [-2] * (MAP_WIDTH * MAP_HEIGHT)
+            parents[start] = -1
+            passable, neighbours = self.passable, self.neighbours
+            frontier = [start]
+            while frontier:
+                nxt = []
+                for i in frontier:
+                    for j in neighbours[i]:
+                        if parents[j] == -2 and passable[j]:
+                            parents[j] = i
+                            nxt.append(j)
+                frontier = nxt
+            self.trees[start] = parents
+        return parents
+
+    def build_all(self):
+        """Fill in the tree of every start tile (otherwise built on demand)."""
+        for start in range(MAP_WIDTH * MAP_HEIGHT):
+            self.tree(start)
+
+    def path(self, start: tuple, goal: tuple):
+        if start == goal:
+            return [start]
+        (sx, sy), (gx, gy) = start, goal
+        if not (0 <= sx < MAP_WIDTH and 0 <= sy < MAP_HEIGHT and 0 <= gx < MAP_WIDTH and 0 <= gy < MAP_HEIGHT):
+            return None
+        parents = self.tree(sy * MAP_WIDTH + sx)
+        i = gy * MAP_WIDTH + gx
+        if parents[i] == -2:
+            return None
+        path = []
+        while i != -1:
+            path.append((i % MAP_WIDTH, i // MAP_WIDTH))
+            i = parents[i]
+        path.reverse()
+        return path
+
+    def distance(self, start: tuple, goal: tuple) -> int | None:
+        path = self.path(start, goal)
+        return None if path is None else len(path) - 1
+
+
+def table_for(tilemap, width: int = 1, height: int = 1, dirs=((1, 0), (-1, 0), (0, 1), (0, -1))) -> PathTable:
+    key = (bytes(tilemap.walkable), width, height, dirs)
+    table = _tables.get(key)
+    if table is None:
+        if len(_tables) >= MAX_TABLES:
+            _tables.clear()
+        table = _tables[key] = PathTable(tilemap.walkable, width, height, dirs)
+    return table
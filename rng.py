@@ -0,0 +1,27 @@
+import random
+
+
+class RunRng:
+    """Seeded random streams for one dungeon run.
+
+    `gameplay` drives everything that changes the simulation (room variants,
+    spawns, counts); `cosmetic` drives sprite picks and particles, so visual
+    effects never shift the gameplay sequence.
+    """
+
+    def __init__(self, seed: int | None = None):
+        if seed is None:
+            seed = random.SystemRandom().getrandbits(63)
+        self.seed = seed
+        self.gameplay = self.stream("gameplay")
+        self.cosmetic = self.stream("cosmetic")
+
+    def stream(self, name: str) -> random.Random:
+        # String seeds are hashed with SHA-512, so streams are stable across
+        # processes and Python runs regardless of PYTHONHASHSEED.
+        return random.Random(f"{self.seed}:{name}")
+
+
+def derive_seed(base_seed: int, index: int) -> int:
+    """Independent, reproducible seed for run `index` of a batch."""
+    return random.Random(f"{base_seed}/{index}").getrandbits(63)
@@ -0,0 +1,309 @@
+"""Host many headless Dungeon Breach sessions in one asyncio process.
+
+Clients talk newline-delimited JSON over a Unix socket (or localhost TCP);
+every request is one object and gets exactly one reply carrying the same
+"id", so requests for different sessions can be pipelined on one connection:
+
+    {"id": 1, "op": "new", "seed": 7}              -> {"id": 1, "ok": true, "session": 3, "state": {...}}
+    {"id": 2, "op": "act", "session": 3, "tile": [4, 2]}
+    {"id": 3, "op": "state", "session": 3}
+    {"id": 4, "op": "close", "session": 3}
+    {"id": 5, "op": "stats"}
+
+A tile is handled like an env.DungeonEnv action: a reachable tile moves the
+player there, the player's own tile ends the turn and a door tile walks out
+through it. Turns are resolved by one scheduler task that runs a single game
+frame per session in round-robin order and yields to the event loop after
+every time slice, so a session whose enemy planning is slow only delays the
+others by a frame. Each session holds one request at a time; sessions idle
+for longer than `idle_timeout` are dropped. A turn that does not resolve
+within MAX_FRAMES_PER_TURN frames fails its request and closes the session.
+Each connection has at most `max_inflight` requests in progress; further
+lines stay unread until one of them is answered.
+
+    server = GameServer()
+    await server.start_unix('/tmp/dungeon.sock')
+"""
+import asyncio
+import json
+import time
+from collections import deque
+from typing import Optional
+
+from bots import END_TURN, danger_tiles, door_entries, move_to
+from constants import MAP_WIDTH
+from headless import HeadlessGame
+from input_provider import ScriptedInput
+
+# A turbo turn takes a handful of frames; anything longer means a stuck session
+MAX_FRAMES_PER_TURN = 256
+
+
+class ProtocolError(Exception):
+    pass
+
+
+class Session:
+    def __init__(self, sid: int, seed: int | None = None):
+        self.sid = sid
+        self.input = ScriptedInput()
+        self.game = HeadlessGame(self.input, seed=seed)
+        self.last_used = time.monotonic()
+        self.pending: Optional[asyncio.Future] = None
+        self._polls = 0
+        self._frames = 0
+        # Why the last turn could not be resolved, if it could not
+        self.failed: Optional[str] = None
+
+    @property
+    def cm(self):
+        return self.game.combat_manager
+
+    def queue(self, actions: list):
+        """Queue one turn's scripted actions; step() then resolves it frame by frame."""
+        self.input.actions.clear()
+        self.input.feed(*actions)
+        # One poll per action, then the idle poll that opens the next turn
+        self._polls = len(actions) + 1
+        self._frames = 0
+
+    def step(self) -> bool:
+        """Run one frame; True once the queued turn is resolved."""
+        cm = self.cm
+        if self.game.finished or self._polls <= 0:
+            return True
+        if self._frames >= MAX_FRAMES_PER_TURN:
+            self.failed = f"turn did not resolve within {MAX_FRAMES_PER_TURN} frames"
+            return True
+        if cm._frame_polls_input():
+            self._polls -= 1
+        cm._update_frame()
+        self.game.frames += 1
+        self._frames += 1
+        return self.game.finished or self._polls <= 0
+
+    def actions_for(self, tile) -> list:
+        cm = self.cm
+        tile = tuple(tile)
+        if tile == (cm.player.x, cm.player.y):
+            return END_TURN
+        if tile in cm.player_reachable_tiles:
+            return move_to(tile)
+        for door, entry in door_entries(cm):
+            if door == tile and entry in cm.player_reachable_tiles:
+                return [["click", tile[0], tile[1]]]
+        raise ProtocolError(f"tile {list(tile)} is not a legal move")
+
+    def state(self) -> dict:
+        cm = self.cm
+        player = cm.player
+        return {
+            'room': cm.room_index,
+            'turn': cm.turn_count,
+            'hp': player.hp,
+            'coins': getattr(player, 'coins', 0),
+            'player': [player.x, player.y],
+            'enemies': [[type(e).__name__, e.x, e.y, e.hp] for e in cm.enemies if e.hp > 0],
+            'decor': [[d.x, d.y, int(d.is_rubble)] for d in cm.decor_objects],
+            'treasure': [[t.x, t.y] for t in cm.treasure_objects],
+            'danger': sorted(y * MAP_WIDTH + x for x, y in danger_tiles(cm)),
+            'reachable': sorted(y * MAP_WIDTH + x for x, y in cm.player_reachable_tiles),
+            'doors': [list(door) for door, entry in door_entries(cm) if entry in cm.player_reachable_tiles],
+            'dead': cm.player_dead,
+            'victory': cm.victory,
+        }
+
+
+class GameServer:
+    def __init__(self, max_sessions: int = 4096, idle_timeout: float = 600.0, slice_seconds: float = 0.002,
+                 max_inflight: int = 256):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        # Requests a single connection may have in progress at once
+        self.max_inflight = max_inflight
+        # Longest stretch of game frames before yielding to socket I/O
+        self.slice_seconds = slice_seconds
+        self.sessions: dict[int, Session] = {}
+        self.turns = 0
+        self.frames = 0
+        self._next_sid = 1
+        self._ready: deque = deque()
+        self._wakeup = asyncio.Event()
+        self._tasks: list = []
+        self._servers: list = []
+        self._clients: set = set()
+
+    # --- Sessions -----------------------------------------------------------
+
+    def create(self, seed: int | None = None) -> Session:
+        if len(self.sessions) >= self.max_sessions:
+            self._evict_idle()
+            if len(self.sessions) >= self.max_sessions:
+                raise ProtocolError("server is full")
+        session = Session(self._next_sid, seed)
+        self._next_sid += 1
+        self.sessions[session.sid] = session
+        return session
+
+    def close(self, sid: int):
+        session = self.sessions.pop(sid, None)
+        if session is not None and session.pending is not None and not session.pending.done():
+            session.pending.cancel()
+
+    def _evict_idle(self):
+        cutoff = time.monotonic() - self.idle_timeout
+        for sid in [s.sid for s in self.sessions.values() if s.last_used < cutoff and s.pending is None]:
+            self.close(sid)
+
+    def submit(self, session: Session, actions: list) -> asyncio.Future:
+        """Schedule one turn for `session`; the future resolves once it is played out."""
+        if session.pending is not None:
+            raise ProtocolError(f"session {session.sid} is busy")
+        session.queue(actions)
+        session.pending = asyncio.get_running_loop().create_future()
+        self._ready.append(session)
+        self._wakeup.set()
+        return session.pending
+
+    # --- Scheduling ---------------------------------------------------------
+
+    async def _schedule(self):
+        ready = self._ready
+        while True:
+            if not ready:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+            deadline = time.perf_counter() + self.slice_seconds
+            while ready and time.perf_counter() < deadline:
+                session = ready.popleft()
+                if self.sessions.get(session.sid) is not session:
+                    continue
+                done = session.step()
+                self.frames += 1
+                if not done:
+                    ready.append(session)
+                    continue
+                self.turns += 1
+                future, session.pending = session.pending, None
+                session.last_used = time.monotonic()
+                if future is not None and not future.done():
+                    future.set_result(session)
+            await asyncio.sleep(0)
+
+    async def _reap(self):
+        while True:
+            await asyncio.sleep(max(1.0, self.idle_timeout / 4))
+            self._evict_idle()
+
+    def _start_tasks(self):
+        if not self._tasks:
+            self._tasks = [asyncio.create_task(self._schedule()), asyncio.create_task(self._reap())]
+
+    async def start_unix(self, path: str):
+        self._start_tasks()
+        self._servers.append(await asyncio.start_unix_server(self.handle_client, path=path))
+
+    async def start_tcp(self, host: str = '127.0.0.1', port: int = 8765):
+        self._start_tasks()
+        self._servers.append(await asyncio.start_server(self.handle_client, host, port))
+
+    async def stop(self):
+        for server in self._servers:
+            server.close()
+        for writer in list(self._clients):
+            writer.close()
+        # Let the client handlers see the closed connections and return
+        await asyncio.sleep(0)
+        for server in self._servers:
+            await server.wait_closed()
+        for task in self._tasks:
+            task.cancel()
+        self._servers, self._tasks = [], []
+
+    # --- Protocol -----------------------------------------------------------
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        inflight = set()
+        slots = asyncio.Semaphore(self.max_inflight)
+
+        def finished(task):
+            inflight.discard(task)
+            slots.release()
+
+        self._clients.add(writer)
+        try:
+            while True:
+                # Stop reading while the connection has max_inflight requests in progress
+                await slots.acquire()
+                line = await reader.readline()
+                if not line:
+                    break
+                task = asyncio.create_task(self._reply(line, writer))
+                inflight.add(task)
+                task.add_done_callback(finished)
+            if inflight:
+                await asyncio.gather(*inflight, return_exceptions=True)
+        finally:
+            self._clients.discard(writer)
+            writer.close()
+
+    async def _reply(self, line: bytes, writer: asyncio.StreamWriter):
+        rid = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ProtocolError("request must be a JSON object")
+            rid = request.get('id')
+            reply = await self.handle(request)
+        except (ProtocolError, ValueError, KeyError, TypeError) as exc:
+            reply = {'ok': False, 'error': str(exc)}
+        reply['id'] = rid
+        try:
+            writer.write(json.dumps(reply, separators=(',', ':')).encode() + b'\n')
+            await writer.drain()
+        except ConnectionError:
+            # The client went away; nobody is left to read the reply
+            pass
+
+    async def handle(self, request: dict) -> dict:
+        op = request.get('op')
+        if op == 'new':
+            session = self.create(request.get('seed'))
+            # An empty turn runs up to the first player decision
+            await self._play(session, [])
+            return {'ok': True, 'session': session.sid, 'state': session.state()}
+        if op == 'stats':
+            return {'ok': True, 'sessions': len(self.sessions), 'turns': self.turns, 'frames': self.frames}
+        session = self.sessions.get(request.get('session'))
+        if session is None:
+            raise ProtocolError(f"unknown session {request.get('session')!r}")
+        session.last_used = time.monotonic()
+        if op == 'act':
+            if session.game.finished:
+                raise ProtocolError(f"session {session.sid} has finished")
+            tile = request['tile']
+            if isinstance(tile, int):
+                tile = (tile % MAP_WIDTH, tile // MAP_WIDTH)
+            await self._play(session, session.actions_for(tile))
+            return {'ok': True, 'state': session.state()}
+        if op == 'state':
+            return {'ok': True, 'state': session.state()}
+        if op == 'close':
+            self.close(session.sid)
+            return {'ok': True}
+        raise ProtocolError(f"unknown op {op!r}")
+
+    async def _play(self, session: Session, actions: list):
+        future = self.submit(session, actions)
+        try:
+            # Shielded, so cancelling this request leaves the future alone and
+            # a cancelled future can only mean close() dropped the session
+            await asyncio.shield(future)
+        except asyncio.CancelledError:
+            if future.cancelled():
+                raise ProtocolError(f"session {session.sid} closed") from None
+            raise
+        if session.failed is not None:
+            # The game is stuck mid-turn; its state cannot be trusted any more
+            self.close(session.sid)
+            raise ProtocolError(f"session {session.sid} closed: {session.failed}")
@@ -0,0 +1,164 @@
+"""BatchRooms state in shared memory, stepped in place by worker processes.
+
+SharedRooms lays every BatchRooms array (tile grid, positions, hp, hate,
+telegraphs...) out as one fixed-size block of multiprocessing.shared_memory,
+plus one target tile per room. The coordinator and the workers map the same
+block, so handing a worker its rooms costs a (name, start, stop) tuple
+instead of a pickled object graph:
+
+    with SharedRooms(100_000) as shared, SharedWorkers(shared, workers=8) as pool:
+        pool.fill_random(progress=0.5, seed=1)
+        while not shared.rooms.dead.all():
+            shared.target_x[:], shared.target_y[:] = my_policy(shared.rooms)
+            pool.step()
+
+Door states need no array of their own: doors stay closed for the whole
+room, so they are part of `walkable`.
+
+Requires: numpy (pip install numpy)
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from batch_sim import MAX_ENEMIES, PLAYER_HP, BatchRooms
+from rng import derive_seed
+
+_ALIGN = 64
+# Target tile per room for the next step; -1 ends the turn in place
+_TARGETS = ('target_x', 'target_y')
+
+
+def layout(batch: int, enemies: int = MAX_ENEMIES):
+    """[(name, shape, dtype, offset)] for every array, and the block size in bytes."""
+    template = BatchRooms(1, enemies)
+    fields = [(name, getattr(template, name).shape[1:], getattr(template, name).dtype) for name in BatchRooms.ARRAYS]
+    fields += [(name, (), np.dtype(np.int16)) for name in _TARGETS]
+    out, offset = [], 0
+    for name, shape, dtype in fields:
+        out.append((name, (batch,) + shape, dtype, offset))
+        offset += -(-batch * int(np.prod(shape, dtype=np.int64)) * dtype.itemsize // _ALIGN) * _ALIGN
+    return out, max(offset, 1)
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Before Python 3.13 attaching registers the block again, which is harmless
+        # for pool workers: they share the coordinator's resource tracker
+        return shared_memory.SharedMemory(name=name)
+
+
+class SharedRooms:
+    def __init__(self, batch: int, enemies: int = MAX_ENEMIES, name: str | None = None):
+        fields, size = layout(batch, enemies)
+        self.batch = batch
+        self.enemies = enemies
+        self.owner = name is None
+        self.shm = shared_memory.SharedMemory(create=True, size=size) if self.owner else _attach(name)
+        arrays = {
+            field: np.ndarray(shape, dtype=dtype, buffer=self.shm.buf, offset=offset)
+            for field, shape, dtype, offset in fields
+        }
+        self.rooms = BatchRooms.from_arrays(arrays)
+        self.target_x, self.target_y = arrays['target_x'], arrays['target_y']
+        if self.owner:
+            # New blocks start zeroed; match the non-zero defaults of BatchRooms()
+            self.rooms.player_hp[:] = PLAYER_HP
+            self.rooms.target[:] = -1
+            self.target_x[:] = -1
+            self.target_y[:] = -1
+
+    @property
+    def handle(self) -> tuple:
+        """Small picklable description that SharedRooms.attach turns back into a view."""
+        return self.shm.name, self.batch, self.enemies
+
+    @classmethod
+    def attach(cls, handle: tuple) -> 'SharedRooms':
+        name, batch, enemies = handle
+        return cls(batch, enemies, name=name)
+
+    def close(self):
+        # Views must go before the mapping can be closed
+        self.rooms = self.target_x = self.target_y = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Blocks this worker process has mapped, by name
+_attached: dict = {}
+
+
+def _worker_rooms(handle) -> SharedRooms:
+    shared = _attached.get(handle[0])
+    if shared is None:
+        shared = _attached[handle[0]] = SharedRooms.attach(handle)
+    return shared
+
+
+def _step_task(task):
+    handle, start, stop = task
+    shared = _worker_rooms(handle)
+    shared.rooms.view(start, stop).step(shared.target_x[start:stop], shared.target_y[start:stop])
+
+
+def _random_task(task):
+    handle, start, stop, progress, seed = task
+    shared = _worker_rooms(handle)
+    shared.rooms.view(start, stop).assign(BatchRooms.random(stop - start, progress, seed))
+
+
+class SharedWorkers:
+    """Process pool in which each worker steps a fixed range of the shared rooms."""
+
+    def __init__(self, shared: SharedRooms, workers: int | None = None, chunks: int | None = None):
+        self.shared = shared
+        self.workers = workers or os.cpu_count() or 1
+        # A few chunks per worker keeps them busy when rooms finish at different speeds
+        chunks = max(1, min(shared.batch, chunks or self.workers * 4))
+        edges = np.linspace(0, shared.batch, chunks + 1).astype(int)
+        self.ranges = [(int(a), int(b)) for a, b in zip(edges[:-1], edges[1:]) if b > a]
+        self.pool = ProcessPoolExecutor(max_workers=self.workers) if self.workers > 1 else None
+        if self.pool is None:
+            # Tasks run in this process; use the coordinator's own mapping
+            _attached[shared.shm.name] = shared
+
+    def _run(self, fn, tasks):
+        if self.pool is None:
+            for task in tasks:
+                fn(task)
+        else:
+            list(self.pool.map(fn, tasks))
+
+    def fill_random(self, progress: float = 0.0, seed: int = 0):
+        """Spawn fresh rooms like BatchRooms.random; each chunk draws from its own derived seed."""
+        handle = self.shared.handle
+        self._run(_random_task, [(handle, a, b, progress, derive_seed(seed, i)) for i, (a, b) in enumerate(self.ranges)])
+
+    def step(self):
+        """One turn for every room, toward shared.target_x / shared.target_y."""
+        handle = self.shared.handle
+        self._run(_step_task, [(handle, a, b) for a, b in self.ranges])
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+        _attached.pop(self.shared.shm.name, None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
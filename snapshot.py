@@ -0,0 +1,70 @@
+"""Checkpoint and roll back a CombatManager without deep-copying it.
+
+A CombatSnapshot records the attribute dicts of the manager and of every
+live game object (player, enemies, decor, treasure, projectiles). Objects
+keep their identity across a restore, so references held by telegraphs,
+hate maps and plans stay valid. Only containers one level deep are copied.
+The static parts are shared rather than copied: tile layout, assets, input
+provider and the VFX manager. VFX particles and the cosmetic RNG stream
+only affect visuals and are not rolled back.
+
+    snap = cm.snapshot()
+    ...play a hypothetical turn...
+    cm.restore(snap)        # may be restored any number of times
+"""
+
+# CombatManager attributes that never change during a run (or are cosmetic)
+_SHARED_ATTRS = frozenset({
+    'input_provider', 'rng', 'vfx_manager', 'variant_sequence', '_next_phase',
+    '_shade_offsets', '_tile_variant_count', 'max_rooms', 'turbo_frame_limit', 'spawn_tables',
+    'distance_fields', 'path_cache', 'enemy_searches',
+})
+_CONTAINERS = (list, dict, set)
+
+
+def _copy_items(attrs: dict, skip=frozenset()) -> dict:
+    return {
+        k: (v.copy() if isinstance(v, _CONTAINERS) else v)
+        for k, v in attrs.items() if k not in skip
+    }
+
+
+def _copy_pending(pending: list) -> list:
+    return [dict(e) for e in pending]
+
+
+class CombatSnapshot:
+    __slots__ = ('manager', 'objects', 'tilemap', 'tile_states', 'rng_state')
+
+    def __init__(self, manager: dict, objects: list, tilemap, tile_states: dict, rng_state: tuple):
+        self.manager = manager
+        self.objects = objects
+        self.tilemap = tilemap
+        self.tile_states = tile_states
+        self.rng_state = rng_state
+
+    @classmethod
+    def capture(cls, cm) -> 'CombatSnapshot':
+        manager = _copy_items(cm.__dict__, _SHARED_ATTRS)
+        manager['treasure_pending'] = _copy_pending(cm.treasure_pending)
+        seen = set()
+        objects = []
+        for obj in [cm.player, *cm.enemies, *cm.enemy_initiative, *cm.decor_objects,
+                    *cm.treasure_objects, *cm.projectiles, cm.zobrist]:
+            if id(obj) not in seen:
+                seen.add(id(obj))
+                objects.append((obj, _copy_items(obj.__dict__)))
+        tile_states = {pos: dict(info) for pos, info in cm.tilemap.tile_states.items()}
+        rng_state = cm.rng.gameplay.getstate()
+        return cls(manager, objects, cm.tilemap, tile_states, rng_state)
+
+    def restore(self, cm):
+        for obj, attrs in self.objects:
+            obj.__dict__.clear()
+            obj.__dict__.update(_copy_items(attrs))
+        cm.__dict__.update(_copy_items(self.manager))
+        cm.treasure_pending = _copy_pending(self.manager['treasure_pending'])
+        self.tilemap.tile_states = {pos: dict(info) for pos, info in self.tile_states.items()}
+        self.tilemap.invalidate()
+        cm.occupancy.rebuild(cm)
+        cm.rng.gameplay.setstate(self.rng_state)
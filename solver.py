@@ -0,0 +1,274 @@
+"""Turn solver: score every tile the player can end the turn on.
+
+For each reachable tile the solver resolves the telegraphs already on screen
+with the player standing there (slime recoil, simultaneous melee, then
+projectiles segment by segment, as in handle_enemy_attack_phase and
+update_projectiles) and looks one step further: the enemies follow
+_compute_enemy_plan for that tile and telegraph again. Nothing in the
+CombatManager is modified.
+
+Telegraph effects that do not depend on the player's tile are prepared once
+per turn; candidates are then evaluated one at a time until the per-call
+time budget runs out, so a caller can spread the work over several frames:
+
+    solver = TurnSolver()
+    solver.update(cm, budget=0.004)   # call every frame
+    solver.best                       # best tile evaluated so far
+"""
+import time
+from typing import Optional, Tuple
+
+from combat import _SimPlayer
+
+DEFAULT_WEIGHTS = {
+    'damage': -10.0,         # hp the player loses this turn
+    'death': -1000.0,
+    'friendly_fire': 2.0,    # hp enemies lose to each other's attacks
+    'kills': 3.0,
+    'decor_broken': 1.0,
+    'treasure_exposed': 2.0,
+    'treasure_picked': 4.0,
+    'threat': -3.0,          # next turn's telegraphs covering the tile
+}
+
+
+def _is_slime(enemy) -> bool:
+    return enemy is not None and 'slime' in (getattr(enemy, 'anim_name', '') or '')
+
+
+def _step_toward(src, dst) -> Tuple[int, int]:
+    # Same cardinal choice as melee_dir resolution
+    dx, dy = dst[0] - src[0], dst[1] - src[1]
+    if abs(dx) >= abs(dy):
+        return (1 if dx > 0 else -1 if dx < 0 else 0), 0
+    return 0, (1 if dy > 0 else -1 if dy < 0 else 0)
+
+
+class _TurnContext:
+    """Player-independent parts of resolving the current telegraphs."""
+
+    def __init__(self, cm):
+        self.cm = cm
+        self.hp = {e: e.hp for e in cm.enemies}
+        self.recoil_kills = 0
+        self.projectiles = []
+        # (attacker, tiles or None for melee toward the player)
+        self.melee = []
+        for t in cm.telegraphs:
+            attacker = t.get('attacker')
+            kind = t.get('type')
+            if kind in ('bouncing', 'ranged'):
+                self.projectiles.append(list(t['path']) if kind == 'bouncing' else [t['pos']])
+                if _is_slime(attacker) and attacker in self.hp:
+                    self.hp[attacker] -= 1
+                    if self.hp[attacker] <= 0:
+                        del self.hp[attacker]
+                        self.recoil_kills += 1
+            elif kind == 'melee_dir':
+                target = getattr(attacker, 'current_target', None)
+                if target is None or getattr(target, 'hp', 0) <= 0:
+                    continue
+                if target is cm.player:
+                    self.melee.append((attacker, None))
+                else:
+                    dx, dy = _step_toward((attacker.x, attacker.y), (target.x, target.y))
+                    self.melee.append((attacker, [(attacker.x + dx, attacker.y + dy)]))
+            elif kind in ('plus', 'phantom_dash'):
+                self.melee.append((attacker, list(t.get('tiles', []))))
+            elif t.get('pos') is not None:
+                self.melee.append((attacker, [tuple(t['pos'])]))
+        self.decor = {(d.x, d.y) for d in cm.decor_objects if not d.is_rubble}
+        self.treasure = {(t.x, t.y) for t in cm.treasure_objects}
+        self.treasure.update((e['x'], e['y']) for e in cm.treasure_pending)
+
+
+class TurnSolver:
+    def __init__(self, weights: Optional[dict] = None, threat: bool = True):
+        self.weights = dict(DEFAULT_WEIGHTS, **(weights or {}))
+        # Looking ahead needs one enemy plan per tile, by far the costliest part
+        self.threat = threat
+        self.scores: dict = {}
+        self._key = None
+        self._pending: list = []
+        self._ctx: Optional[_TurnContext] = None
+
+    @property
+    def done(self) -> bool:
+        return self._key is not None and not self._pending
+
+    @property
+    def best(self) -> Optional[Tuple[int, int]]:
+        if not self.scores:
+            return None
+        return max(self.scores, key=lambda t: (self.scores[t]['score'], -self._reach_cost(t)))
+
+    def _reach_cost(self, tile) -> int:
+        return self._ctx.cm.player_reachable_tiles.get(tile, 0) if self._ctx else 0
+
+    def update(self, cm, budget: Optional[float] = None) -> bool:
+        """Evaluate candidates for `budget` seconds (None: all); True once every tile is scored."""
+        key = (cm.zobrist.value, cm.turn_count, getattr(cm.player, 'moves_left', 0), len(cm.telegraphs))
+        if key != self._key:
+            self._key = key
+            self.scores = {}
+            self._ctx = _TurnContext(cm)
+            self._pending = sorted(cm.player_reachable_tiles, key=lambda t: (cm.player_reachable_tiles[t], t))
+        deadline = None if budget is None else time.perf_counter() + budget
+        while self._pending:
+            tile = self._pending.pop(0)
+            self.scores[tile] = self.evaluate(tile)
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+        return not self._pending
+
+    def solve(self, cm, budget: Optional[float] = None) -> Optional[Tuple[int, int]]:
+        self.update(cm, budget)
+        return self.best
+
+    def evaluate(self, tile) -> dict:
+        ctx = self._ctx
+        cm = ctx.cm
+        result = self._resolve(ctx, tile)
+        if self.threat and not result['death']:
+            result['threat'] = self._threat(cm, tile, result['alive'])
+        else:
+            result['threat'] = 0
+        del result['alive']
+        w = self.weights
+        result['score'] = sum(w[k] * float(result[k]) for k in w)
+        return result
+
+    def _resolve(self, ctx, tile) -> dict:
+        cm = ctx.cm
+        player_hp = cm.player.hp
+        hp = dict(ctx.hp)
+        decor = set(ctx.decor)
+        picked = 1 if tile in ctx.treasure else 0
+        result = {
+            'tile': tile, 'damage': 0, 'death': False, 'friendly_fire': 0,
+            'kills': ctx.recoil_kills, 'decor_broken': 0, 'treasure_exposed': 0,
+            'treasure_picked': picked, 'alive': hp,
+        }
+
+        # Simultaneous melee against a snapshot of positions
+        player_dmg = 0
+        enemy_dmg: dict = {}
+        broken = set()
+        for attacker, tiles in ctx.melee:
+            if tiles is None:
+                dx, dy = _step_toward((attacker.x, attacker.y), tile)
+                tiles = [(attacker.x + dx, attacker.y + dy)]
+            for pos in tiles:
+                if pos == tile:
+                    player_dmg += 1
+                for enemy in hp:
+                    if (enemy.x, enemy.y) == pos:
+                        enemy_dmg[enemy] = enemy_dmg.get(enemy, 0) + 1
+                if pos in decor:
+                    broken.add(pos)
+        if player_dmg:
+            result['damage'] = min(player_dmg, player_hp)
+            if player_dmg >= player_hp:
+                result['death'] = True
+                return result
+            player_hp -= player_dmg
+        exposed = set(broken)
+        for enemy, dmg in enemy_dmg.items():
+            result['friendly_fire'] += dmg
+            pre = hp[enemy]
+            hp[enemy] = pre - dmg
+            if pre > 0 and hp[enemy] <= 0:
+                result['kills'] += 1
+                exposed.add((enemy.x, enemy.y))
+        hp = {e: v for e, v in hp.items() if v > 0}
+        decor -= broken
+        result['decor_broken'] = len(broken)
+
+        # Projectiles advance one segment at a time and stop at the first hit
+        paths = [list(p) for p in ctx.projectiles]
+        segment = 0
+        while any(segment < len(p) for p in paths):
+            present = list(hp)
+            for path in paths:
+                if segment >= len(path):
+                    continue
+                pos = path[segment]
+                hit = False
+                if pos == tile:
+                    hit = True
+                    player_hp -= 1
+                    result['damage'] += 1
+                    if player_hp <= 0:
+                        result['death'] = True
+                        result['alive'] = hp
+                        return result
+                for enemy in present:
+                    if (enemy.x, enemy.y) == pos:
+                        hit = True
+                        result['friendly_fire'] += 1
+                        pre = hp[enemy]
+                        hp[enemy] = pre - 1
+                        if pre > 0 and hp[enemy] <= 0:
+                            result['kills'] += 1
+                            exposed.add(pos)
+                if pos in decor:
+                    hit = True
+                    decor.discard(pos)
+                    result['decor_broken'] += 1
+                    exposed.add(pos)
+                if hit:
+                    del path[segment + 1:]
+            hp = {e: v for e, v in hp.items() if v > 0}
+            segment += 1
+
+        tilemap = cm.tilemap
+        result['treasure_exposed'] = sum(
+            1 for (x, y) in exposed if (x, y) not in ctx.treasure and tilemap.is_walkable(x, y)
+        )
+        result['alive'] = hp
+        return result
+
+    def _threat(self, cm, tile, alive: dict) -> int:
+        """Number of next-turn telegraphs that would cover `tile`."""
+        plan = cm._compute_enemy_plan(tile)
+        sim_player = _SimPlayer(cm.player, tile)
+        finals = {entry['enemy']: entry['final'] for entry in plan}
+        threat = 0
+        for entry in plan:
+            enemy = entry['enemy']
+            if enemy not in alive:
+                continue
+            target = entry['target']
+            if target is cm.player:
+                target_view = sim_player
+            elif target in alive:
+                target_view = _SimPlayer(target, finals.get(target, (target.x, target.y)))
+            else:
+                continue
+            telegraph = self._telegraph_from(enemy, entry['final'], target_view)
+            if telegraph and tile in self._telegraph_tiles(telegraph, entry['final'], target_view):
+                threat += 1
+        return threat
+
+    @staticmethod
+    def _telegraph_from(enemy, pos, target):
+        # Telegraph from the planned tile without disturbing the live enemy
+        saved = dict(enemy.__dict__)
+        enemy.__dict__['x'], enemy.__dict__['y'] = pos
+        try:
+            return enemy.telegraph(target, [])
+        finally:
+            enemy.__dict__.clear()
+            enemy.__dict__.update(saved)
+
+    @staticmethod
+    def _telegraph_tiles(telegraph, pos, target):
+        kind = telegraph.get('type')
+        if kind == 'bouncing':
+            return telegraph.get('path', [])
+        if kind in ('plus', 'phantom_dash'):
+            return telegraph.get('tiles', [])
+        if kind == 'melee_dir':
+            dx, dy = _step_toward(pos, (target.x, target.y))
+            return [(pos[0] + dx, pos[1] + dy)]
+        return [tuple(telegraph['pos'])] if telegraph.get('pos') is not None else []
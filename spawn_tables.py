@@ -0,0 +1,72 @@
+"""Difficulty curves for room contents, optionally fitted by tools/tune_difficulty.py.
+
+Each curve is interpolated over room progress (0.0 in the first room, 1.0 in
+the last). DEFAULT_TABLES reproduces the hand-written curves; a fitted set is
+written to TABLES_PATH and picked up by every CombatManager created after
+that. Keys missing from the file keep their defaults.
+"""
+import json
+import os
+
+TABLES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static_assets', 'spawn_tables.json')
+
+DEFAULT_TABLES = {
+    # Relative odds of 1..5 enemies in the first and in the last room
+    'enemy_weights_early': [5.0, 4.0, 3.0, 2.0, 1.0],
+    'enemy_weights_late': [1.0, 2.0, 3.0, 4.0, 5.0],
+    # Decor count is drawn from [base, base + spread], capped at decor_max
+    'decor_base': 1,
+    'decor_growth': 3.0,
+    'decor_spread': 1,
+    'decor_max': 5,
+    # Free treasure: `attempts` coin flips with probability `chance`
+    'treasure_attempts': 3,
+    'treasure_attempts_drop': 2.0,
+    'treasure_chance': 0.75,
+    'treasure_chance_drop': 0.5,
+    'treasure_chance_min': 0.15,
+}
+# Keys that must stay whole numbers when tuned
+INT_KEYS = frozenset({'decor_base', 'decor_spread', 'decor_max', 'treasure_attempts'})
+
+_cache: dict = {}
+
+
+def load_tables(path: str = TABLES_PATH) -> dict:
+    """Defaults overlaid with the tables stored at `path` (read once per process)."""
+    if path not in _cache:
+        tables = dict(DEFAULT_TABLES)
+        try:
+            with open(path, 'r', encoding='utf-8') as fh:
+                stored = json.load(fh)
+        except (OSError, ValueError):
+            stored = {}
+        tables.update({k: v for k, v in stored.get('tables', {}).items() if k in DEFAULT_TABLES})
+        _cache[path] = tables
+    return _cache[path]
+
+
+def save_tables(tables: dict, path: str = TABLES_PATH, **meta):
+    """Write `tables` (plus any metadata such as the fit targets) to `path`."""
+    payload = dict(meta, tables={k: tables[k] for k in DEFAULT_TABLES})
+    with open(path, 'w', encoding='utf-8') as fh:
+        json.dump(payload, fh, indent=1)
+    _cache.pop(path, None)
+
+
+def enemy_weights(tables: dict, progress: float) -> list:
+    early, late = tables['enemy_weights_early'], tables['enemy_weights_late']
+    return [max(0.01, (1.0 - progress) * e + progress * l) for e, l in zip(early, late)]
+
+
+def decor_range(tables: dict, progress: float) -> tuple:
+    base = tables['decor_base'] + int(progress * tables['decor_growth'])
+    max_decor = min(tables['decor_max'], base + tables['decor_spread'])
+    return min(base, max_decor), max_decor
+
+
+def treasure_odds(tables: dict, progress: float) -> tuple:
+    """(attempts, chance per attempt) for free treasure."""
+    attempts = max(1, tables['treasure_attempts'] - int(progress * tables['treasure_attempts_drop']))
+    chance = max(tables['treasure_chance_min'], tables['treasure_chance'] - tables['treasure_chance_drop'] * progress)
+    return attempts, chance
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark batch_sim stepping across processes: state pickled to and from
+the workers every turn versus shared_state's zero-copy shared memory.
+
+Usage:
+  python3 tools/batch_bench.py --rooms 20000 --turns 20 --workers 8
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batch_sim import BatchRooms
+from constants import MAP_WIDTH
+from shared_state import SharedRooms, SharedWorkers
+
+
+def random_targets(rooms: BatchRooms, rng):
+    """A random reachable tile per room (-1 where the player cannot move)."""
+    reach = rooms.player_reachable().reshape(rooms.batch, -1)
+    keys = np.where(reach, rng.random(reach.shape), -1.0)
+    flat = keys.argmax(axis=1)
+    ok = keys.max(axis=1) >= 0
+    return np.where(ok, flat % MAP_WIDTH, -1), np.where(ok, flat // MAP_WIDTH, -1)
+
+
+def _step_pickled(task):
+    rooms, tx, ty = task
+    rooms.step(tx, ty)
+    return rooms
+
+
+def bench_pickled(args, pool, ranges) -> float:
+    rooms = [BatchRooms.random(b - a, args.progress, args.seed + i) for i, (a, b) in enumerate(ranges)]
+    rng = np.random.default_rng(args.seed)
+    start = time.perf_counter()
+    for _ in range(args.turns):
+        targets = [random_targets(r, rng) for r in rooms]
+        rooms = list(pool.map(_step_pickled, [(r, tx, ty) for r, (tx, ty) in zip(rooms, targets)]))
+    return time.perf_counter() - start
+
+
+def bench_shared(args, workers: int) -> float:
+    with SharedRooms(args.rooms) as shared, SharedWorkers(shared, workers=workers) as pool:
+        pool.fill_random(args.progress, args.seed)
+        rng = np.random.default_rng(args.seed)
+        start = time.perf_counter()
+        for _ in range(args.turns):
+            shared.target_x[:], shared.target_y[:] = random_targets(shared.rooms, rng)
+            pool.step()
+        return time.perf_counter() - start
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--rooms', type=int, default=20000, help='Rooms stepped in lockstep (default 20000)')
+    ap.add_argument('--turns', type=int, default=20, help='Turns to step (default 20)')
+    ap.add_argument('--workers', type=int, default=None, help='Worker processes (default: all cores)')
+    ap.add_argument('--progress', type=float, default=0.5, help='Room progress for spawning (default 0.5)')
+    ap.add_argument('--seed', type=int, default=0, help='Seed (default 0)')
+    args = ap.parse_args()
+    workers = args.workers or os.cpu_count() or 1
+    room_turns = args.rooms * args.turns
+
+    elapsed = bench_shared(args, 1)
+    print(f"single process:        {room_turns / elapsed:>9.0f} room-turns/s")
+    # Same chunking as SharedWorkers
+    edges = np.linspace(0, args.rooms, min(args.rooms, workers * 4) + 1).astype(int)
+    ranges = [(int(a), int(b)) for a, b in zip(edges[:-1], edges[1:]) if b > a]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        elapsed = bench_pickled(args, pool, ranges)
+    print(f"{workers} workers, pickled:  {room_turns / elapsed:>9.0f} room-turns/s")
+    elapsed = bench_shared(args, workers)
+    print(f"{workers} workers, shared:   {room_turns / elapsed:>9.0f} room-turns/s")
+
+if __name__ == '__main__':
+    main()
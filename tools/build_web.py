@@ -12,12 +12,24 @@ APP_NAME = "a_link_to_the_breach"
 FILES_TO_COPY = [
     "main.py",
     "asset_manager.py",
+    "bitboard.py",
+    "clearance.py",
     "entity.py",
     "combat.py",
     "constants.py",
+    "distance_fields.py",
+    "incremental.py",
     "map.py",
     "map_layout.py",
+    "path_table.py",
     "ai.py",
+    "input_provider.py",
+    "occupancy.py",
+    "rng.py",
+    "snapshot.py",
+    "solver.py",
+    "spawn_tables.py",
+    "zobrist.py",
     "ui.py",
     "vfx.py",
 ]
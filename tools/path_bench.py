@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Benchmark the informed searches in astar against breadth-first search as
+rooms grow: nodes expanded and time per query, on random arenas with
+scattered pits and the same start/goal pairs for every engine.
+
+Usage:
+  python3 tools/path_bench.py --sizes 10 32 64 128 --queries 200 --density 0.2
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from astar import astar_path, bfs_path, jps_path
+
+ENGINES = (('bfs', bfs_path), ('astar', astar_path), ('jps', jps_path))
+
+
+def random_arena(size: int, density: float, rng) -> bytearray:
+    """Walled size x size room with a `density` share of interior pits."""
+    grid = bytearray(size * size)
+    for y in range(1, size - 1):
+        for x in range(1, size - 1):
+            grid[y * size + x] = rng.random() >= density
+    return grid
+
+
+def random_pairs(grid: bytearray, size: int, count: int, rng) -> list:
+    """Start/goal pairs that are connected (checked with BFS)."""
+    free = [(i % size, i // size) for i, v in enumerate(grid) if v]
+    pairs = []
+    while len(pairs) < count and len(free) > 1:
+        start, goal = rng.sample(free, 2)
+        if bfs_path(grid, size, size, start, goal) is not None:
+            pairs.append((start, goal))
+    return pairs
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--sizes', type=int, nargs='+', default=[10, 32, 64, 128], help='Room sides (default 10 32 64 128)')
+    ap.add_argument('--queries', type=int, default=200, help='Start/goal pairs per size (default 200)')
+    ap.add_argument('--density', type=float, default=0.2, help='Share of interior tiles that are pits (default 0.2)')
+    ap.add_argument('--seed', type=int, default=0, help='Seed (default 0)')
+    args = ap.parse_args()
+
+    print(f"{'size':>5} {'engine':>6} {'expanded':>10} {'ms/query':>9} {'speedup':>8}")
+    for size in args.sizes:
+        rng = random.Random(args.seed + size)
+        grid = random_arena(size, args.density, rng)
+        pairs = random_pairs(grid, size, args.queries, rng)
+        if not pairs:
+            continue
+        lengths = None
+        bfs_elapsed = None
+        for name, search in ENGINES:
+            stats = {}
+            found = []
+            start_t = time.perf_counter()
+            for start, goal in pairs:
+                found.append(len(search(grid, size, size, start, goal, stats)))
+            elapsed = time.perf_counter() - start_t
+            if lengths is None:
+                lengths, bfs_elapsed = found, elapsed
+            elif found != lengths:
+                print(f"warning: {name} path lengths differ from bfs at size {size}", file=sys.stderr)
+            print(f"{size:>5} {name:>6} {stats.get('expanded', 0) / len(pairs):>10.1f} "
+                  f"{1000 * elapsed / len(pairs):>9.3f} {bfs_elapsed / elapsed:>7.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+MCTS playtests: play headless dungeons with mcts.MCTSPlayer, optionally
+starting in a late room, and report survival alongside search throughput
+(rollouts/sec is the number to watch when optimising the simulation core).
+
+Usage:
+  python3 tools/playtest.py --runs 20 --start-room 6 --budget 0.25
+  python3 tools/playtest.py --runs 50 --iterations 128 --workers 4 --json playtest.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import montecarlo
+from headless import HeadlessGame
+from input_provider import PolicyInput
+from mcts import MCTSPlayer
+from rng import RunRng, derive_seed
+
+
+def play_run(task) -> dict:
+    seed, start_room, budget, iterations, max_turns = task
+    player = MCTSPlayer(budget=budget, iterations=iterations, rng=RunRng(seed).stream("policy"))
+    game = HeadlessGame(PolicyInput(player), seed=seed)
+    game.skip_to_room(start_room)
+    cm = game.combat_manager
+    max_steps = max_turns * 8
+    while not game.finished and cm.turn_count < max_turns and game.frames < max_steps:
+        game.step()
+    result = game.summary()
+    result['timed_out'] = not game.finished
+    result['search'] = dict(player.stats)
+    return result
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--runs', type=int, default=20, help='Number of dungeons to play (default 20)')
+    ap.add_argument('--seed', type=int, default=0, help='Base seed; run i uses derive_seed(seed, i) (default 0)')
+    ap.add_argument('--start-room', type=int, default=1, help='Room to start in; earlier rooms are skipped (default 1)')
+    ap.add_argument('--budget', type=float, default=None, help='Seconds of search per turn')
+    ap.add_argument('--iterations', type=int, default=None, help='Rollouts per turn (default 64 without --budget)')
+    ap.add_argument('--workers', type=int, default=1, help='Worker processes (default 1)')
+    ap.add_argument('--max-turns', type=int, default=400, help='Give up on a run after this many turns (default 400)')
+    ap.add_argument('--json', dest='json_path', help='Also write the summary and per-run results to this file')
+    args = ap.parse_args()
+    iterations = args.iterations if args.iterations or args.budget else 64
+
+    tasks = [(derive_seed(args.seed, i), args.start_room, args.budget, iterations, args.max_turns)
+             for i in range(args.runs)]
+    start = time.perf_counter()
+    if args.workers <= 1:
+        results = [play_run(t) for t in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=args.workers) as pool:
+            results = list(pool.map(play_run, tasks))
+    elapsed = time.perf_counter() - start
+
+    summary = montecarlo.summarize(results)
+    summary['survival_per_room'] = [row for row in summary['survival_per_room'] if row['room'] >= args.start_room]
+    seconds = sum(r['search']['seconds'] for r in results)
+    rollouts = sum(r['search']['rollouts'] for r in results)
+    turns = sum(r['search']['turns'] for r in results)
+    searches = sum(r['search']['searches'] for r in results)
+    reused = sum(r['search']['reused'] for r in results)
+    summary['search'] = {
+        'rollouts': rollouts,
+        'rollouts_per_sec': rollouts / seconds if seconds else 0.0,
+        'simulated_turns_per_sec': turns / seconds if seconds else 0.0,
+        'tree_reuse': reused / searches if searches else 0.0,
+    }
+    print(montecarlo.format_summary(summary, elapsed))
+    s = summary['search']
+    print(f"search: {s['rollouts_per_sec']:.0f} rollouts/s per process  "
+          f"{s['simulated_turns_per_sec']:.0f} simulated turns/s  tree reused on {s['tree_reuse']:.0%} of turns")
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as fh:
+            json.dump({'summary': summary, 'results': results}, fh, indent=1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Check Player.reach_layers against a breadth-first search that asks
+can_occupy about every step, for footprints from 1x1 up to 3x3 in random
+rooms with pits and decor. Reachable tiles, their step counts and the
+bitboard.path_to paths must all match. Exits with status 1 on a mismatch.
+
+Usage:
+  python3 tools/reach_check.py --rooms 2000 --seed 1
+"""
+import argparse
+import os
+import random
+import sys
+from collections import deque
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bitboard
+from entity import Decor, Player
+from headless import load_headless_assets
+from map import Tilemap
+from occupancy import Occupancy
+
+
+def bfs_reachable(player, all_entities):
+    """Tile -> steps and BFS parents, expanding neighbours in bitboard.STEP_DIRS order."""
+    origin = (player.x, player.y)
+    reachable = {origin: 0}
+    parents = {}
+    frontier = deque([origin])
+    while frontier:
+        cx, cy = frontier.popleft()
+        cost = reachable[(cx, cy)]
+        if cost >= player.moves_left:
+            continue
+        for dx, dy in bitboard.STEP_DIRS:
+            tile = (cx + dx, cy + dy)
+            if tile in reachable or not player.can_occupy(tile[0], tile[1], all_entities):
+                continue
+            reachable[tile] = cost + 1
+            parents[tile] = (cx, cy)
+            frontier.append(tile)
+    return reachable, parents
+
+
+def check_room(rng, assets) -> list:
+    tilemap = Tilemap(assets)
+    for y in range(1, 9):
+        for x in range(1, 9):
+            if rng.random() < 0.1:
+                tilemap.set_tile(x, y, 'pit')
+    player = Player(rng.randint(1, 8), rng.randint(1, 8), tilemap, assets)
+    player.width, player.height = rng.randint(1, 3), rng.randint(1, 3)
+    player.moves_left = rng.randint(0, 6)
+    decor = [Decor(rng.randint(1, 8), rng.randint(1, 8), tilemap, assets, 'pot_1') for _ in range(rng.randint(0, 4))]
+    problems = []
+    for entities in ([player] + decor, Occupancy([player] + decor)):
+        reachable, parents = bfs_reachable(player, entities)
+        layers = player.reach_layers(entities)
+        found = {tile: cost for cost, layer in enumerate(layers) for tile in bitboard.tiles(layer)}
+        label = f"{player.width}x{player.height} at {(player.x, player.y)} with {player.moves_left} moves"
+        if found != reachable:
+            problems.append(f"{label}: reach_layers has {len(found)} tiles, can_occupy BFS {len(reachable)}")
+            continue
+        for tile in reachable:
+            path = []
+            while tile in parents:
+                path.append(tile)
+                tile = parents[tile]
+            path.reverse()
+            if path and bitboard.path_to(layers, path[-1]) != path:
+                problems.append(f"{label}: path_to {path[-1]} differs from the BFS path")
+    return problems
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--rooms', type=int, default=2000, help='Random rooms to check (default 2000)')
+    ap.add_argument('--seed', type=int, default=1, help='Seed (default 1)')
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    assets = load_headless_assets()
+    problems = []
+    for _ in range(args.rooms):
+        problems += check_room(rng, assets)
+    for problem in problems[:20]:
+        print(f"FAIL: {problem}")
+    if problems:
+        sys.exit(1)
+    print(f"ok: {args.rooms} rooms")
+
+if __name__ == '__main__':
+    main()
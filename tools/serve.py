@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Serve headless Dungeon Breach sessions over a local socket (see server.py
+for the protocol), or benchmark the server with many concurrent clients.
+
+Usage:
+  python3 tools/serve.py --socket /tmp/dungeon.sock
+  python3 tools/serve.py --port 8765
+  python3 tools/serve.py --bench 2000 --seconds 20
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from server import GameServer
+
+
+def rss_mb() -> float:
+    try:
+        with open('/proc/self/statm', 'r') as fh:
+            return int(fh.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except OSError:
+        return float('nan')
+
+
+async def bench(sessions: int, seconds: float, connections: int, seed: int):
+    """Random players on `connections` sockets, each pipelining its share of the sessions."""
+    server = GameServer(max_sessions=sessions)
+    path = os.path.join(tempfile.mkdtemp(), 'dungeon.sock')
+    await server.start_unix(path)
+    base_rss = rss_mb()
+    latencies = []
+    finished = 0
+    errors = {}
+    # Seeds for replacement runs, shared by all clients so none repeats
+    next_seed = seed + sessions
+    deadline = None
+
+    async def client(first: int, count: int):
+        nonlocal finished, next_seed
+        reader, writer = await asyncio.open_unix_connection(path)
+        rng = random.Random(seed + first)
+        waiting = {}
+
+        def send(request, sent=None):
+            waiting[request['id']] = (request, sent or time.perf_counter())
+            writer.write(json.dumps(request, separators=(',', ':')).encode() + b'\n')
+
+        for i in range(count):
+            send({'id': i, 'op': 'new', 'seed': seed + first + i})
+        next_id = count
+        while waiting:
+            reply = json.loads(await reader.readline())
+            request, sent = waiting.pop(reply['id'])
+            if not reply.get('ok'):
+                errors[reply.get('error')] = errors.get(reply.get('error'), 0) + 1
+                continue
+            if request['op'] == 'act':
+                latencies.append(time.perf_counter() - sent)
+            state = reply.get('state')
+            if state is None or time.perf_counter() >= deadline:
+                continue
+            if state['dead'] or state['victory']:
+                finished += 1
+                # Free the finished session before its replacement takes a slot
+                sid = reply.get('session', request.get('session'))
+                send({'id': next_id, 'op': 'close', 'session': sid})
+                next_id += 1
+                send({'id': next_id, 'op': 'new', 'seed': next_seed})
+                next_seed += 1
+            else:
+                tiles = state['reachable']
+                options = [t for t in tiles if t not in state['danger']] or tiles
+                tile = rng.choice(state['doors'] + options) if state['doors'] and rng.random() < 0.1 else rng.choice(options)
+                send({'id': next_id, 'op': 'act', 'session': reply.get('session', request.get('session')), 'tile': tile})
+            next_id += 1
+            await writer.drain()
+        writer.close()
+
+    start = time.perf_counter()
+    deadline = start + seconds
+    share = [sessions // connections + (1 if i < sessions % connections else 0) for i in range(connections)]
+    firsts = [sum(share[:i]) for i in range(connections)]
+    await asyncio.gather(*(client(f, n) for f, n in zip(firsts, share) if n))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    await server.stop()
+    print(f"sessions: {len(server.sessions)} live  ({finished} runs finished)")
+    if errors:
+        print(f"errors: {sum(errors.values())}  " + "  ".join(f"{n}x {msg}" for msg, n in errors.items()))
+    print(f"turns: {server.turns}  ({server.turns / elapsed:.0f}/s)  frames: {server.frames}  elapsed {elapsed:.1f}s")
+    if latencies:
+        p = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1e3
+        print(f"act reply ms: p50 {p(0.5):.1f}  p99 {p(0.99):.1f}  max {latencies[-1] * 1e3:.1f}")
+    print(f"rss: {rss_mb():.1f}MB  (+{(rss_mb() - base_rss) * 1024 / max(1, len(server.sessions)):.1f}KB per session)")
+
+
+async def serve(args):
+    server = GameServer(max_sessions=args.max_sessions, idle_timeout=args.idle_timeout,
+                        max_inflight=args.max_inflight)
+    if args.port:
+        await server.start_tcp('127.0.0.1', args.port)
+        print(f"listening on 127.0.0.1:{args.port}")
+    else:
+        await server.start_unix(args.socket)
+        print(f"listening on {args.socket}")
+    await asyncio.Event().wait()
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--socket', default='/tmp/dungeon-breach.sock', help='Unix socket path (default /tmp/dungeon-breach.sock)')
+    ap.add_argument('--port', type=int, default=None, help='Listen on localhost TCP instead of a Unix socket')
+    ap.add_argument('--max-sessions', type=int, default=4096, help='Session limit (default 4096)')
+    ap.add_argument('--idle-timeout', type=float, default=600.0, help='Drop sessions idle this many seconds (default 600)')
+    ap.add_argument('--max-inflight', type=int, default=256, help='Requests one connection may have in progress (default 256)')
+    ap.add_argument('--bench', type=int, metavar='SESSIONS', help='Benchmark with this many concurrent random players')
+    ap.add_argument('--seconds', type=float, default=10.0, help='Benchmark duration (default 10)')
+    ap.add_argument('--connections', type=int, default=8, help='Benchmark client connections (default 8)')
+    ap.add_argument('--seed', type=int, default=0, help='Benchmark base seed (default 0)')
+    args = ap.parse_args()
+    if args.bench:
+        asyncio.run(bench(args.bench, args.seconds, args.connections, args.seed))
+    else:
+        asyncio.run(serve(args))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Monte Carlo balance runs: play N complete headless dungeons across a process
+pool and print survival per room, coins, turns and kills.
+
+Usage:
+  python3 tools/simulate.py --runs 10000 --policy greedy --seed 1
+  python3 tools/simulate.py --runs 500 --workers 1 --json results.json
+  python3 tools/simulate.py --runs 500 --incremental   # enemy searches repaired across turns
+"""
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bots
+import montecarlo
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--runs', type=int, default=1000, help='Number of dungeons to play (default 1000)')
+    ap.add_argument('--policy', default='greedy', choices=sorted(bots.POLICIES), help='Player policy (default greedy)')
+    ap.add_argument('--seed', type=int, default=0, help='Base seed; run i uses derive_seed(seed, i) (default 0)')
+    ap.add_argument('--workers', type=int, default=None, help='Worker processes (default: all cores)')
+    ap.add_argument('--max-turns', type=int, default=400, help='Give up on a run after this many turns (default 400)')
+    ap.add_argument('--incremental', action='store_true',
+                    help='Plan enemy moves with searches repaired across turns (see incremental)')
+    ap.add_argument('--json', dest='json_path', help='Also write the summary and per-run results to this file')
+    args = ap.parse_args()
+
+    results, elapsed = montecarlo.timed_batch(
+        args.runs, policy=args.policy, base_seed=args.seed, workers=args.workers, max_turns=args.max_turns,
+        path_cache='incremental' if args.incremental else 'fields',
+    )
+    summary = montecarlo.summarize(results)
+    print(montecarlo.format_summary(summary, elapsed))
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as fh:
+            json.dump({'summary': summary, 'results': results}, fh, indent=1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Soak test: keep one process playing headless dungeons (reset_world after
+every finished run) for tens of thousands of rooms, sampling RSS, live
+object counts and per-turn latency percentiles as it goes. Exits with
+status 1 when memory, object counts or latency drift past the limits, so it
+can run unattended in CI or next to a kiosk build.
+
+Median latency swings from one sample to the next with room content, so
+latency drift is only judged when each quarter of the samples after warmup
+holds at least MIN_LATENCY_SAMPLES samples, i.e. with --rooms / --interval
+of at least 4 * MIN_LATENCY_SAMPLES + warmup (22 with the defaults).
+
+Usage:
+  python3 tools/soak.py --rooms 20000
+  python3 tools/soak.py --rooms 2000 --interval 100 --json soak.json
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+from statistics import mean
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bots
+from combat import CombatManager
+from entity import Decor, Enemy, SlimeProjectile, Treasure
+from headless import HeadlessGame
+from input_provider import PolicyInput
+from map import Tilemap
+from rng import RunRng, derive_seed
+from vfx import Particle
+
+TRACKED_TYPES = {
+    'Enemy': Enemy,
+    'Decor': Decor,
+    'Treasure': Treasure,
+    'Particle': Particle,
+    'SlimeProjectile': SlimeProjectile,
+    'CombatManager': CombatManager,
+    'Tilemap': Tilemap,
+}
+# Samples each quarter needs before latency drift is judged
+MIN_LATENCY_SAMPLES = 5
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def rss_mb() -> float | None:
+    """Current resident set size, or the peak where /proc is not available."""
+    try:
+        with open('/proc/self/statm', 'r') as fh:
+            return int(fh.read().split()[1]) * _PAGE_SIZE / 2**20
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / 2**20 if sys.platform == 'darwin' else peak / 2**10
+
+
+def live_counts() -> dict:
+    gc.collect()
+    counts = dict.fromkeys(TRACKED_TYPES, 0)
+    for obj in gc.get_objects():
+        for name, cls in TRACKED_TYPES.items():
+            if isinstance(obj, cls):
+                counts[name] += 1
+    return counts
+
+
+def retained(cm) -> dict:
+    """Sizes of the per-room containers that can keep dead objects alive."""
+    live = set(map(id, cm.enemies))
+    live.add(id(cm.player))
+    hate = stale = 0
+    for enemy in cm.enemies:
+        hate += len(enemy.hate_map)
+        stale += sum(1 for target in enemy.hate_map if id(target) not in live)
+    return {
+        'hate_entries': hate,
+        'stale_hate': stale,
+        'counted_dead': len(cm._counted_dead),
+        'telegraphs': len(cm.telegraphs),
+        'attack_renders': len(cm.attack_renders),
+        'treasure_pending': len(cm.treasure_pending),
+        'particles': len(cm.vfx_manager.particles),
+    }
+
+
+def percentile(sorted_values: list, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+class Soak:
+    def __init__(self, policy: str = 'greedy', seed: int = 0, max_turns: int = 400):
+        self.policy = policy
+        self.base_seed = seed
+        self.max_turns = max_turns
+        self.runs = 0
+        self.rooms = 0
+        self.turns = 0
+        self.samples: list = []
+        self._latencies: list = []
+        self.game = HeadlessGame(PolicyInput(self._agent(0)), seed=derive_seed(seed, 0))
+
+    def _agent(self, run: int):
+        return bots.make_policy(self.policy, RunRng(derive_seed(self.base_seed, run)).stream("policy"))
+
+    def _reset(self):
+        self.runs += 1
+        seed = derive_seed(self.base_seed, self.runs)
+        self.game.input_provider.policy = self._agent(self.runs)
+        self.game.input_provider.actions.clear()
+        self.game.reset_world(seed)
+        self.rooms += 1
+
+    def play_rooms(self, count: int):
+        """Play until `count` more rooms have been entered (a reset counts as a room)."""
+        target = self.rooms + count
+        game = self.game
+        clock = time.perf_counter
+        turn_start = clock()
+        while self.rooms < target:
+            cm = game.combat_manager
+            if game.finished or cm.turn_count >= self.max_turns:
+                self._reset()
+                turn_start = clock()
+                continue
+            room, turn = cm.room_index, cm.turn_count
+            game.step()
+            if cm.turn_count != turn:
+                now = clock()
+                self._latencies.append(now - turn_start)
+                turn_start = now
+                self.turns += 1
+            if cm.room_index != room:
+                self.rooms += 1
+
+    def sample(self) -> dict:
+        latencies = sorted(self._latencies)
+        self._latencies = []
+        row = {
+            'rooms': self.rooms,
+            'runs': self.runs,
+            'turns': self.turns,
+            'rss_mb': rss_mb(),
+            'counts': live_counts(),
+            'retained': retained(self.game.combat_manager),
+            'turn_ms': {
+                'p50': percentile(latencies, 0.50) * 1e3,
+                'p95': percentile(latencies, 0.95) * 1e3,
+                'p99': percentile(latencies, 0.99) * 1e3,
+                'max': (latencies[-1] if latencies else 0.0) * 1e3,
+            },
+            'time': time.perf_counter(),
+        }
+        self.samples.append(row)
+        return row
+
+
+def format_sample(row: dict) -> str:
+    rss = f"{row['rss_mb']:.1f}MB" if row['rss_mb'] is not None else "n/a"
+    counts = " ".join(f"{k}={v}" for k, v in row['counts'].items())
+    t = row['turn_ms']
+    return (f"rooms {row['rooms']:>7}  runs {row['runs']:>6}  rss {rss:>8}  "
+            f"turn ms p50 {t['p50']:.2f} p95 {t['p95']:.2f} p99 {t['p99']:.2f} max {t['max']:.1f}  {counts}")
+
+
+def check_drift(samples: list, warmup: int, max_rss_growth: float, max_object_growth: int,
+                max_latency_drift: float) -> list:
+    """Compare the first and last quarter of the samples after warmup; returns problems found."""
+    steady = samples[warmup:]
+    if len(steady) < 4:
+        return []
+    quarter = max(1, len(steady) // 4)
+    head, tail = steady[:quarter], steady[-quarter:]
+    problems = []
+    if head[0]['rss_mb'] is not None:
+        growth = mean(r['rss_mb'] for r in tail) - mean(r['rss_mb'] for r in head)
+        if growth > max_rss_growth:
+            problems.append(f"RSS grew by {growth:.1f}MB (limit {max_rss_growth}MB)")
+    for group in ('counts', 'retained'):
+        for name in head[0][group]:
+            growth = mean(r[group][name] for r in tail) - mean(r[group][name] for r in head)
+            if growth > max_object_growth:
+                problems.append(f"{name} grew by {growth:.0f} (limit {max_object_growth})")
+    if quarter < MIN_LATENCY_SAMPLES:
+        return problems
+    before = mean(r['turn_ms']['p50'] for r in head)
+    after = mean(r['turn_ms']['p50'] for r in tail)
+    if before > 0 and after / before > max_latency_drift:
+        problems.append(f"median turn latency drifted {before:.2f}ms -> {after:.2f}ms (limit x{max_latency_drift})")
+    return problems
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--rooms', type=int, default=20000, help='Rooms to play in total (default 20000)')
+    ap.add_argument('--interval', type=int, default=500, help='Rooms between samples (default 500)')
+    ap.add_argument('--warmup', type=int, default=2, help='Samples ignored by the drift check (default 2)')
+    ap.add_argument('--policy', default='greedy', choices=sorted(bots.POLICIES), help='Player policy (default greedy)')
+    ap.add_argument('--seed', type=int, default=0, help='Base seed; run i uses derive_seed(seed, i) (default 0)')
+    ap.add_argument('--max-turns', type=int, default=400, help='Reset a run after this many turns (default 400)')
+    ap.add_argument('--max-rss-growth', type=float, default=16.0, help='Allowed RSS growth in MB (default 16)')
+    ap.add_argument('--max-object-growth', type=int, default=50, help='Allowed growth of any live object count (default 50)')
+    ap.add_argument('--max-latency-drift', type=float, default=1.5, help='Allowed ratio of late to early median turn latency (default 1.5)')
+    ap.add_argument('--json', dest='json_path', help='Also write every sample to this file')
+    args = ap.parse_args()
+
+    soak = Soak(args.policy, args.seed, args.max_turns)
+    print(format_sample(soak.sample()), flush=True)
+    while soak.rooms < args.rooms:
+        soak.play_rooms(min(args.interval, args.rooms - soak.rooms))
+        print(format_sample(soak.sample()), flush=True)
+
+    problems = check_drift(soak.samples[1:], args.warmup, args.max_rss_growth, args.max_object_growth,
+                           args.max_latency_drift)
+    if len(soak.samples[1 + args.warmup:]) < 4 * MIN_LATENCY_SAMPLES:
+        print(f"note: latency drift not checked; it needs {4 * MIN_LATENCY_SAMPLES} samples after warmup "
+              f"(raise --rooms or lower --interval)")
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as fh:
+            json.dump({'samples': soak.samples, 'problems': problems}, fh, indent=1)
+    for problem in problems:
+        print(f"FAIL: {problem}")
+    if problems:
+        sys.exit(1)
+    print(f"ok: {soak.rooms} rooms, {soak.runs} resets, {soak.turns} turns without drift")
+
+if __name__ == '__main__':
+    main()
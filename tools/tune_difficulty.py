@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Fit the spawn and reward curves (spawn_tables) to target per-room survival
+and coin curves by playing simulated dungeons in a process pool.
+
+Every generation mutates the best tables found so far, plays each candidate
+on the same seeds and keeps the candidate closest to the targets. The result
+is written to static_assets/spawn_tables.json, which CombatManager loads at
+startup.
+
+Usage:
+  python3 tools/tune_difficulty.py
+  python3 tools/tune_difficulty.py --survival 0.95:0.8 --coins 2:3 --runs 300 --generations 20
+  python3 tools/tune_difficulty.py --from-defaults --dry-run
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from statistics import mean
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bots
+import montecarlo
+import spawn_tables
+from rng import derive_seed
+
+# (low, high) bounds for every tuned value
+BOUNDS = {
+    'enemy_weights_early': (0.01, 20.0),
+    'enemy_weights_late': (0.01, 20.0),
+    'decor_base': (0, 5),
+    'decor_growth': (0.0, 6.0),
+    'decor_spread': (0, 3),
+    'decor_max': (1, 8),
+    'treasure_attempts': (1, 6),
+    'treasure_attempts_drop': (0.0, 5.0),
+    'treasure_chance': (0.0, 1.0),
+    'treasure_chance_drop': (-0.5, 1.0),
+    'treasure_chance_min': (0.0, 1.0),
+}
+
+
+def parse_curve(text: str):
+    """'a' for a flat target, 'a:b' for a line from the first room to the last."""
+    parts = [float(p) for p in text.split(':')]
+    start, end = parts[0], parts[-1]
+    return lambda progress: start + (end - start) * progress
+
+
+def mutate(tables: dict, rng: random.Random, scale: float) -> dict:
+    child = {k: (list(v) if isinstance(v, list) else v) for k, v in tables.items()}
+    for key in rng.sample(sorted(BOUNDS), rng.randint(1, 3)):
+        lo, hi = BOUNDS[key]
+        if isinstance(child[key], list):
+            i = rng.randrange(len(child[key]))
+            child[key][i] = min(hi, max(lo, child[key][i] * math.exp(rng.gauss(0.0, scale))))
+        elif key in spawn_tables.INT_KEYS:
+            child[key] = min(hi, max(lo, child[key] + rng.choice((-1, 1))))
+        else:
+            child[key] = min(hi, max(lo, child[key] + rng.gauss(0.0, scale) * (hi - lo) / 4))
+    return child
+
+
+def loss(results: list, survival_target, coin_target, coin_weight: float) -> float:
+    max_rooms = max(r['max_rooms'] for r in results)
+    total = 0.0
+    for row in montecarlo.summarize(results)['survival_per_room']:
+        if not row['reached']:
+            continue
+        progress = (row['room'] - 1) / max(1, max_rooms - 1)
+        total += (row['rate'] - survival_target(progress)) ** 2
+        # Coins only count for rooms the player finished
+        coins = [r['coins_per_room'][row['room'] - 1] for r in results
+                 if r['room'] > row['room'] or (r['victory'] and r['room'] == row['room'])]
+        if coins:
+            target = max(0.1, coin_target(progress))
+            total += coin_weight * ((mean(coins) - target) / target) ** 2
+    return total
+
+
+def evaluate(pool, candidates: list, seeds: list, policy: str, max_turns: int) -> list:
+    tasks = [(seed, policy, max_turns, tables) for tables in candidates for seed in seeds]
+    if pool is None:
+        played = [montecarlo._play_task(t) for t in tasks]
+    else:
+        played = list(pool.map(montecarlo._play_task, tasks, chunksize=max(1, len(seeds) // 8)))
+    return [played[i * len(seeds):(i + 1) * len(seeds)] for i in range(len(candidates))]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--survival', default='0.95:0.8', help='Target survival rate per room, "a" or "first:last" (default 0.95:0.8)')
+    ap.add_argument('--coins', default='2.5', help='Target coins collected per room, "a" or "first:last" (default 2.5)')
+    ap.add_argument('--coin-weight', type=float, default=0.25, help='Weight of the coin curve against survival (default 0.25)')
+    ap.add_argument('--policy', default='greedy', choices=sorted(bots.POLICIES), help='Player policy (default greedy)')
+    ap.add_argument('--runs', type=int, default=200, help='Dungeons played per candidate (default 200)')
+    ap.add_argument('--population', type=int, default=8, help='Candidates per generation (default 8)')
+    ap.add_argument('--generations', type=int, default=12, help='Number of generations (default 12)')
+    ap.add_argument('--seed', type=int, default=0, help='Seed for the played dungeons and the search (default 0)')
+    ap.add_argument('--workers', type=int, default=None, help='Worker processes (default: all cores)')
+    ap.add_argument('--max-turns', type=int, default=400, help='Give up on a run after this many turns (default 400)')
+    ap.add_argument('--from-defaults', action='store_true', help='Start from the built-in curves instead of the saved ones')
+    ap.add_argument('--output', default=spawn_tables.TABLES_PATH, help='Where to write the fitted tables')
+    ap.add_argument('--dry-run', action='store_true', help='Print the fitted tables without writing them')
+    args = ap.parse_args()
+
+    survival_target = parse_curve(args.survival)
+    coin_target = parse_curve(args.coins)
+    rng = random.Random(args.seed)
+    # The same dungeons for every candidate, so differences come from the tables alone
+    seeds = [derive_seed(args.seed, i) for i in range(args.runs)]
+    start_tables = spawn_tables.DEFAULT_TABLES if args.from_defaults else spawn_tables.load_tables(args.output)
+    best = {k: (list(v) if isinstance(v, list) else v) for k, v in start_tables.items()}
+
+    workers = args.workers or os.cpu_count() or 1
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    start = time.perf_counter()
+    try:
+        best_loss = loss(evaluate(pool, [best], seeds, args.policy, args.max_turns)[0],
+                         survival_target, coin_target, args.coin_weight)
+        print(f"start: loss {best_loss:.4f}")
+        scale = 0.5
+        for generation in range(1, args.generations + 1):
+            candidates = [mutate(best, rng, scale) for _ in range(args.population)]
+            batches = evaluate(pool, candidates, seeds, args.policy, args.max_turns)
+            losses = [loss(b, survival_target, coin_target, args.coin_weight) for b in batches]
+            i = min(range(len(losses)), key=losses.__getitem__)
+            if losses[i] < best_loss:
+                best, best_loss = candidates[i], losses[i]
+            else:
+                scale = max(0.05, scale * 0.7)
+            print(f"generation {generation}: loss {best_loss:.4f}  step {scale:.2f}  "
+                  f"({time.perf_counter() - start:.0f}s)")
+        final = evaluate(pool, [best], seeds, args.policy, args.max_turns)[0]
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    summary = montecarlo.summarize(final)
+    print(montecarlo.format_summary(summary, time.perf_counter() - start))
+    for key, value in best.items():
+        shown = [round(v, 2) for v in value] if isinstance(value, list) else round(value, 3)
+        print(f"  {key}: {shown}")
+    if args.dry_run:
+        return
+    spawn_tables.save_tables(
+        best, args.output, policy=args.policy, runs=args.runs, seed=args.seed, loss=best_loss,
+        targets={'survival': args.survival, 'coins': args.coins, 'coin_weight': args.coin_weight},
+    )
+    print(f"wrote {args.output}")
+
+if __name__ == '__main__':
+    main()
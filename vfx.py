@@ -2,13 +2,13 @@ import pyxel
 import random
 
 class Particle:
-    def __init__(self, x, y, color):
+    def __init__(self, x, y, color, rng=random):
         self.x = x
         self.y = y
         self.color = color
         self.life = 10 # 10 frames
-        self.vx = random.uniform(-1, 1)
-        self.vy = random.uniform(-1, 1)
+        self.vx = rng.uniform(-1, 1)
+        self.vy = rng.uniform(-1, 1)
 
     def update(self):
         self.x += self.vx
@@ -19,12 +19,14 @@ class Particle:
         pyxel.pset(self.x, self.y, self.color)
 
 class VfxManager:
-    def __init__(self):
+    def __init__(self, rng=random):
+        # Cosmetic stream only; particles must never consume gameplay randomness
+        self.rng = rng
         self.particles = []
 
     def add_particles(self, x, y, color, count):
         for _ in range(count):
-            self.particles.append(Particle(x, y, color))
+            self.particles.append(Particle(x, y, color, self.rng))
 
     def update(self):
         for p in self.particles:
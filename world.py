@@ -0,0 +1,175 @@
+"""Hierarchical pathfinding over a dungeon of rooms joined by doors.
+
+A World keeps every room it is given, not just the current one. Each door
+becomes a portal: the floor tile just inside it, where the player stands
+to walk through. Portals of the same room are joined by their precomputed
+walking distance, and linked doors by one step, so a route between rooms is
+found on this small abstract graph. Tile paths are then refined one room
+at a time, only when they are needed:
+
+    world = World.stacked([tilemap_1, tilemap_2, tilemap_3])  # rooms 1..3, top doors lead up
+    legs = world.route((1, (4, 8)), (3, (2, 2)))               # [(room, from_tile, to_tile), ...]
+    path = world.refine(legs[0])                               # tiles within room 1
+
+Distances come from each room's walkability grid and ignore entities, like
+Entity.pathfinding. Call add_room again when a room's layout changes; only
+that room's portal distances are recomputed.
+"""
+import heapq
+from typing import Dict, List, Optional, Tuple
+
+from constants import MAP_HEIGHT
+from path_table import PathTable
+
+# Steps charged for walking through a door into the linked room
+PORTAL_COST = 1
+
+Tile = Tuple[int, int]
+Leg = Tuple[int, Tile, Tile]
+
+
+def door_portals(tilemap) -> Dict[Tile, Tile]:
+    """Door tile -> the floor tile inside it, for the top and bottom doors of a room."""
+    portals = {}
+    for x in getattr(tilemap, 'top_door_xs', []):
+        portals[(x, 0)] = (x, 1)
+    for x in getattr(tilemap, 'bottom_door_xs', []):
+        portals[(x, MAP_HEIGHT - 1)] = (x, MAP_HEIGHT - 2)
+    return portals
+
+
+class World:
+    def __init__(self):
+        # room id -> path table of its walkability grid
+        self.tables: Dict[int, PathTable] = {}
+        # room id -> {door tile: entry tile}
+        self.portals: Dict[int, Dict[Tile, Tile]] = {}
+        # (room, door) -> (room, door) on the other side
+        self.links: Dict[Tuple[int, Tile], Tuple[int, Tile]] = {}
+        # room id -> {(door_a, door_b): steps between their entry tiles}
+        self.portal_distances: Dict[int, Dict[Tuple[Tile, Tile], int]] = {}
+
+    @classmethod
+    def stacked(cls, tilemaps) -> 'World':
+        """Rooms 1..n in the order the game visits them: each top door leads to the next room's bottom door."""
+        world = cls()
+        for room, tilemap in enumerate(tilemaps, start=1):
+            world.add_room(room, tilemap)
+            if room > 1:
+                for x in getattr(tilemap, 'bottom_door_xs', []):
+                    if (x, 0) in world.portals[room - 1]:
+                        world.link(room - 1, (x, 0), room, (x, MAP_HEIGHT - 1))
+        return world
+
+    def add_room(self, room: int, tilemap, portals: Optional[Dict[Tile, Tile]] = None):
+        """Register (or re-register) a room and precompute the distances between its portals."""
+        table = PathTable(tilemap.walkable, 1, 1)
+        portals = door_portals(tilemap) if portals is None else dict(portals)
+        self.tables[room] = table
+        self.portals[room] = portals
+        distances = {}
+        for door_a, entry_a in portals.items():
+            for door_b, entry_b in portals.items():
+                if door_a != door_b:
+                    steps = table.distance(entry_a, entry_b)
+                    if steps is not None:
+                        distances[(door_a, door_b)] = steps
+        self.portal_distances[room] = distances
+
+    def link(self, room_a: int, door_a: Tile, room_b: int, door_b: Tile):
+        """Join two doors both ways."""
+        self.links[(room_a, door_a)] = (room_b, door_b)
+        self.links[(room_b, door_b)] = (room_a, door_a)
+
+    def _edges(self, room: int, door: Tile):
+        for (a, b), steps in self.portal_distances[room].items():
+            if a == door:
+                yield (room, b), steps
+        other = self.links.get((room, door))
+        if other is not None:
+            yield other, PORTAL_COST
+
+    def route(self, start: Tuple[int, Tile], goal: Tuple[int, Tile]) -> Optional[List[Leg]]:
+        """Shortest route as per-room legs (room, from_tile, to_tile); None if unreachable.
+
+        Each leg after the first starts where the door ending the previous one leads.
+        """
+        start_room, start_tile = start
+        goal_room, goal_tile = goal
+        if start_room not in self.tables or goal_room not in self.tables:
+            return None
+        start_table = self.tables[start_room]
+        goal_table = self.tables[goal_room]
+
+        best_total = None
+        best_legs = None
+        if start_room == goal_room:
+            steps = start_table.distance(start_tile, goal_tile)
+            if steps is not None:
+                best_total, best_legs = steps, [(start_room, start_tile, goal_tile)]
+
+        # Dijkstra over portals, seeded with the walk from the start to each portal of its room
+        dist: Dict[Tuple[int, Tile], int] = {}
+        parents: Dict[Tuple[int, Tile], Optional[Tuple[int, Tile]]] = {}
+        heap = []
+        counter = 0
+        for door, entry in self.portals[start_room].items():
+            steps = start_table.distance(start_tile, entry)
+            if steps is not None:
+                node = (start_room, door)
+                dist[node] = steps
+                parents[node] = None
+                heap.append((steps, counter, node))
+                counter += 1
+        heapq.heapify(heap)
+        done = set()
+        while heap:
+            d, _, node = heapq.heappop(heap)
+            if node in done:
+                continue
+            done.add(node)
+            if best_total is not None and d >= best_total:
+                break
+            room, door = node
+            if room == goal_room:
+                steps = goal_table.distance(self.portals[room][door], goal_tile)
+                if steps is not None and (best_total is None or d + steps < best_total):
+                    best_total = d + steps
+                    best_legs = self._legs(parents, node, start, goal)
+            for other, steps in self._edges(room, door):
+                nd = d + steps
+                if nd < dist.get(other, nd + 1):
+                    dist[other] = nd
+                    parents[other] = node
+                    heapq.heappush(heap, (nd, counter, other))
+                    counter += 1
+        return best_legs
+
+    def _legs(self, parents: dict, node: Tuple[int, Tile], start: Tuple[int, Tile], goal: Tuple[int, Tile]) -> List[Leg]:
+        chain = []
+        while node is not None:
+            chain.append(node)
+            node = parents[node]
+        chain.reverse()
+        # Portals passed within a room lie on a shortest walk; a leg ends only where a door is crossed
+        legs = []
+        room, tile = start
+        for prev, node in zip(chain, chain[1:]):
+            if prev[0] != node[0]:
+                legs.append((room, tile, self.portals[room][prev[1]]))
+                room, tile = node[0], self.portals[node[0]][node[1]]
+        legs.append((room, tile, goal[1]))
+        return legs
+
+    def refine(self, leg: Leg) -> Optional[List[Tile]]:
+        """Tile path for one leg of a route, [from_tile, ..., to_tile]."""
+        room, from_tile, to_tile = leg
+        return self.tables[room].path(from_tile, to_tile)
+
+    def distance(self, start: Tuple[int, Tile], goal: Tuple[int, Tile]) -> Optional[int]:
+        """Steps along the route from start to goal, door crossings included."""
+        legs = self.route(start, goal)
+        if legs is None:
+            return None
+        steps = sum(self.tables[room].distance(a, b) for room, a, b in legs)
+        return steps + (len(legs) - 1) * PORTAL_COST
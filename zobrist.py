@@ -0,0 +1,160 @@
+"""Incrementally maintained 64-bit Zobrist hash of the room state.
+
+The hash is the XOR of one term per registered entity (kind, tile, hp and,
+for enemies, the ordering of its hate map) plus one term per door state.
+Entities report changes to x, y, hp, is_rubble and hate_map themselves
+(Entity.__setattr__), ai.adjust_hate_on_hit reports in-place hate updates,
+and CombatManager adds or removes treasure, decor and room contents. Keying
+a cache or transposition table on the state is therefore O(1):
+
+    key = cm.zobrist.value
+
+Dead enemies contribute nothing, so a position reached through different
+move orders hashes the same. Hate terms use ids handed out at registration,
+so hashes are comparable within a room (and its snapshots) but not across
+rooms.
+"""
+import random
+
+from constants import MAP_WIDTH, MAP_HEIGHT
+
+# Term tables are generated from a fixed seed so hashes are stable across runs
+_TABLE_SEED = 0x5EED_2B7E
+MAX_HP = 15
+MAX_RANKS = 8
+KIND_CODES = {
+    'Player': 0,
+    'Slime': 1,
+    'DumbSlime': 2,
+    'Spider': 3,
+    'Spinner': 4,
+    'Phantom': 5,
+    'Decor': 6,
+    'Treasure': 8,
+}
+RUBBLE = 7
+_N_KINDS = 9
+_TILES = MAP_WIDTH * MAP_HEIGHT
+DOOR_STATES = {'closed': 1, 'open': 2}
+
+_rng = random.Random(_TABLE_SEED)
+_Z_ENTITY = [_rng.getrandbits(64) for _ in range(_N_KINDS * (MAX_HP + 1) * _TILES)]
+_Z_DOOR = [_rng.getrandbits(64) for _ in range(_TILES * 4)]
+del _rng
+
+_MASK64 = (1 << 64) - 1
+
+
+def _hate_key(eid: int, rank: int, tid: int) -> int:
+    """Term for `tid` holding hate rank `rank` for enemy `eid` (splitmix64 of the triple).
+
+    Ids grow without bound over a run, so the keys are mixed from the ids
+    themselves rather than looked up in a table indexed by id.
+    """
+    z = ((eid * MAX_RANKS + rank) << 32 | tid) ^ _TABLE_SEED
+    z = (z + 0x9E3779B97F4A7C15) & _MASK64
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return z ^ (z >> 31)
+
+
+# Entity attributes that feed the hash
+HASHED_ATTRS = frozenset({'x', 'y', 'hp', 'is_rubble', 'hate_map'})
+
+
+class ZobristHash:
+    def __init__(self):
+        self.value = 0
+        self.door_term = 0
+        self.terms: dict[int, int] = {}
+        self._next_id = 0
+
+    def rebuild(self, cm):
+        """Register the player and current room contents from scratch."""
+        # Ids keep counting up, so entities left over from the last room are ignored
+        self.value = 0
+        self.terms = {}
+        self.door_term = 0
+        self.refresh_doors(cm.tilemap)
+        for ent in [cm.player] + cm.enemies + cm.decor_objects + cm.treasure_objects:
+            self.add(ent)
+        # Hate terms depend on every entity having an id, so compute them last
+        for ent in cm.enemies:
+            self.refresh(ent)
+
+    def add(self, ent):
+        ent.zobrist_id = self._next_id
+        self._next_id += 1
+        ent.zobrist = self
+        self.terms[ent.zobrist_id] = 0
+        self.refresh(ent)
+
+    def remove(self, ent):
+        if ent.__dict__.get('zobrist') is not self:
+            return
+        self.value ^= self.terms.pop(ent.zobrist_id, 0)
+        del ent.zobrist
+
+    def refresh(self, ent):
+        """Recompute one entity's term after it changed."""
+        eid = ent.zobrist_id
+        if eid not in self.terms:
+            return
+        new = self.entity_term(ent)
+        self.value ^= self.terms.get(eid, 0) ^ new
+        self.terms[eid] = new
+
+    def refresh_doors(self, tilemap):
+        new = 0
+        for (x, y), info in tilemap.tile_states.items():
+            if 0 <= x < MAP_WIDTH and 0 <= y < MAP_HEIGHT:
+                new ^= _Z_DOOR[(y * MAP_WIDTH + x) * 4 + DOOR_STATES.get(info.get('state'), 3)]
+        self.value ^= self.door_term ^ new
+        self.door_term = new
+
+    def entity_term(self, ent) -> int:
+        attrs = ent.__dict__
+        kind = KIND_CODES.get(type(ent).__name__)
+        if kind is None:
+            return 0
+        if attrs.get('is_rubble'):
+            kind = RUBBLE
+        hp = attrs.get('hp', 0)
+        if 0 < kind < 6 and hp <= 0:
+            # Dead enemies leave the state
+            return 0
+        x, y = attrs['x'], attrs['y']
+        if not (0 <= x < MAP_WIDTH and 0 <= y < MAP_HEIGHT):
+            return 0
+        hp = min(MAX_HP, max(0, hp))
+        term = _Z_ENTITY[(kind * (MAX_HP + 1) + hp) * _TILES + y * MAP_WIDTH + x]
+        hate = attrs.get('hate_map')
+        if hate:
+            term ^= self._hate_term(attrs['zobrist_id'], hate)
+        return term
+
+    def _hate_term(self, eid: int, hate: dict) -> int:
+        ranked = []
+        for target, value in hate.items():
+            # Only targets registered with this hash take part in the ordering
+            if getattr(target, 'zobrist', None) is self and target.zobrist_id in self.terms:
+                ranked.append((-value, target.zobrist_id))
+        ranked.sort()
+        term = 0
+        for rank, (_, tid) in enumerate(ranked[:MAX_RANKS]):
+            term ^= _hate_key(eid, rank, tid)
+        return term
+
+    def recompute(self, cm) -> int:
+        """Hash of the current state computed from scratch (for checking)."""
+        value = self.door_term
+        for ent in self._registered(cm):
+            value ^= self.entity_term(ent)
+        return value
+
+    def _registered(self, cm):
+        seen = set()
+        for ent in [cm.player] + cm.enemies + cm.enemy_initiative + cm.decor_objects + cm.treasure_objects:
+            if id(ent) not in seen and ent.__dict__.get('zobrist') is self and ent.zobrist_id in self.terms:
+                seen.add(id(ent))
+                yield ent